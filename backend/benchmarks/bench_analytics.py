@@ -0,0 +1,65 @@
+"""Сравнение SQL-агрегаций и NumPy-варианта в service_analytics.
+
+Для каждого размера создается временная SQLite-база, после чего
+замеряются время и пиковая память Python (tracemalloc) для обоих движков.
+
+    python -m benchmarks.bench_analytics --sizes 10000 1000000 10000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.datagen import generate
+from services import service_analytics
+
+FUNCTIONS = [
+    "get_total_expenses",
+    "get_expenses_by_employee",
+    "get_expenses_by_expense_type",
+    "get_average_expense_per_trip",
+]
+
+
+def measure(session, name, engine_name):
+    service_analytics.ANALYTICS_ENGINE = engine_name
+    func = getattr(service_analytics, name)
+    tracemalloc.start()
+    started = time.perf_counter()
+    func(session)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 4), "peak_mib": round(peak / 2 ** 20, 2)}
+
+
+def run(sizes, engines):
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            generate(engine, size)
+            session = sessionmaker(bind=engine)()
+            for name in FUNCTIONS:
+                for engine_name in engines:
+                    row = {"rows": size, "function": name, "engine": engine_name}
+                    row.update(measure(session, name, engine_name))
+                    results.append(row)
+                    print(json.dumps(row, ensure_ascii=False))
+            session.close()
+            engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--engines", nargs="+", default=["sql", "numpy"])
+    args = parser.parse_args()
+    run(args.sizes, args.engines)
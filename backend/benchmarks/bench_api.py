@@ -0,0 +1,414 @@
+"""Замеры всех маршрутов API и функций service_analytics на синтетических данных.
+
+Для каждого размера база заполняется benchmarks.datagen (временная SQLite
+или база --url, которая очищается перед каждым размером). Затем каждый
+маршрут из OpenAPI-схемы приложения вызывается через TestClient по
+сценарию из CASES, а каждая функция get_* из service_analytics — напрямую,
+за все время и за один месяц. Кэш аналитики сбрасывается перед каждым
+замером, поэтому время включает работу с базой. Подготовка запроса
+(например, создание удаляемой записи) в замер не входит.
+
+Результаты записываются в JSON-файл, два файла можно сравнить:
+
+    python -m benchmarks.bench_api --sizes 10000 1000000 --output bench-results.json
+    python -m benchmarks.bench_api compare old.json new.json --threshold 1.2
+
+Маршруты без сценария перечисляются в поле missing результатов.
+"""
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import sqlalchemy
+from sqlalchemy import select, text
+from sqlalchemy.orm import sessionmaker
+
+import models
+from benchmarks.datagen import generate
+from database import create_db_engine
+
+REPEAT = 5
+BULK_SIZE = 1000
+IMPORT_ROWS = 1000
+# Месяц, за который замеряются аналитика с фильтром и операции с периодами
+MONTH = date(2021, 6, 1)
+
+
+class Context:
+    """Клиент приложения, образцы id из базы и создание записей для сценариев."""
+
+    def __init__(self, client, db):
+        self.client = client
+        self.counter = itertools.count()
+        row = db.execute(
+            select(models.Expense.id, models.Expense.business_trip_id,
+                   models.Expense.expense_type_id, models.BusinessTrip.employee_id)
+            .join(models.BusinessTrip, models.BusinessTrip.id == models.Expense.business_trip_id)
+            .order_by(models.Expense.id).limit(1)).one()
+        self.expense_id, self.trip_id, self.expense_type_id, self.employee_id = row
+        self.fio = db.scalar(select(models.Employee.fio).where(models.Employee.id == self.employee_id))
+
+    def unique(self, prefix):
+        return f"{prefix} {next(self.counter)}"
+
+    def create(self, path, body):
+        response = self.client.post(path, json=body)
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def new_employee(self):
+        return self.create("/employees/", {"fio": self.unique("Bench employee")})
+
+    def new_expense_type(self):
+        return self.create("/expense_types/", {"name": self.unique("Bench type")})
+
+    def trip_body(self):
+        return {"employee_id": self.employee_id, "destination": "City 0",
+                "start_trip": "2024-06-01T00:00:00", "end_trip": "2024-06-03T00:00:00"}
+
+    def new_trip(self):
+        return self.create("/business_trips/", self.trip_body())
+
+    def expense_body(self):
+        return {"business_trip_id": self.trip_id, "expense_type_id": self.expense_type_id, "amount": 123.45}
+
+    def new_expense(self):
+        return self.create("/expenses/", self.expense_body())
+
+    def bulk_ids(self, path, body):
+        response = self.client.post(path, json=[body] * BULK_SIZE)
+        response.raise_for_status()
+        return [item["id"] for item in response.json()]
+
+    def report_job(self):
+        job = self.client.post("/analytics/reports", json={"report_type": "json", "data_type": "all"}).json()
+        from services.report_jobs import report_jobs
+        report_jobs.get(job["id"]).finished.wait()
+        return job["id"]
+
+    def import_csv(self):
+        lines = ["fio,destination,start_trip,end_trip,expense_type,amount"]
+        lines += [f"{self.fio},City {i % 10},2024-07-{i % 28 + 1:02d}T00:00:00,"
+                  f"2024-07-{i % 28 + 1:02d}T12:00:00,Type {i % 5},{i % 1000 + 0.5}"
+                  for i in range(IMPORT_ROWS)]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+PERIOD = f"{MONTH:%Y-%m}"
+MONTH_RANGE = {"from": MONTH.isoformat(), "to": date(MONTH.year, MONTH.month, 30).isoformat()}
+
+# (метод, путь из OpenAPI, вариант, подготовка запроса) — подготовка возвращает
+# аргументы client.request и в замер не входит
+CASES = [
+    ("GET", "/employees/", "", lambda ctx: {"url": "/employees/", "params": {"limit": 100}}),
+    ("GET", "/employees/", "expand=none", lambda ctx: {
+        "url": "/employees/", "params": {"limit": 100, "expand": "none"}}),
+    ("POST", "/employees/", "", lambda ctx: {"url": "/employees/", "json": {"fio": ctx.unique("Bench")}}),
+    ("GET", "/employees/{employee_id}", "", lambda ctx: {"url": f"/employees/{ctx.employee_id}"}),
+    ("PUT", "/employees/{employee_id}", "", lambda ctx: {
+        "url": f"/employees/{ctx.employee_id}", "json": {"fio": ctx.fio}}),
+    ("DELETE", "/employees/{employee_id}", "", lambda ctx: {"url": f"/employees/{ctx.new_employee()}"}),
+
+    ("GET", "/expense_types/", "", lambda ctx: {"url": "/expense_types/"}),
+    ("POST", "/expense_types/", "", lambda ctx: {
+        "url": "/expense_types/", "json": {"name": ctx.unique("Bench type")}}),
+    ("GET", "/expense_types/{expense_type_id}", "", lambda ctx: {"url": f"/expense_types/{ctx.expense_type_id}"}),
+    ("PUT", "/expense_types/{expense_type_id}", "", lambda ctx: {
+        "url": f"/expense_types/{ctx.new_expense_type()}", "json": {"name": ctx.unique("Bench type")}}),
+    ("DELETE", "/expense_types/{expense_type_id}", "", lambda ctx: {
+        "url": f"/expense_types/{ctx.new_expense_type()}"}),
+
+    ("GET", "/business_trips/", "", lambda ctx: {"url": "/business_trips/", "params": {"limit": 100}}),
+    ("GET", "/business_trips/", "month", lambda ctx: {"url": "/business_trips/", "params": {
+        "limit": 100, "start_from": f"{MONTH}T00:00:00", "start_to": f"{MONTH_RANGE['to']}T23:59:59"}}),
+    ("POST", "/business_trips/", "", lambda ctx: {"url": "/business_trips/", "json": ctx.trip_body()}),
+    ("POST", "/business_trips/bulk", "", lambda ctx: {
+        "url": "/business_trips/bulk", "json": [ctx.trip_body()] * BULK_SIZE}),
+    ("DELETE", "/business_trips/bulk", "", lambda ctx: {"url": "/business_trips/bulk", "json": {
+        "ids": ctx.bulk_ids("/business_trips/bulk", ctx.trip_body())}}),
+    ("GET", "/business_trips/{business_trips_id}", "", lambda ctx: {"url": f"/business_trips/{ctx.trip_id}"}),
+    ("PUT", "/business_trips/{business_trips_id}", "", lambda ctx: {
+        "url": f"/business_trips/{ctx.new_trip()}", "json": {"destination": "City 1"}}),
+    ("DELETE", "/business_trips/{business_trips_id}", "", lambda ctx: {
+        "url": f"/business_trips/{ctx.new_trip()}"}),
+
+    ("GET", "/expenses/", "", lambda ctx: {"url": "/expenses/", "params": {"limit": 100}}),
+    ("GET", "/expenses/", "employee", lambda ctx: {
+        "url": "/expenses/", "params": {"limit": 100, "employee_id": ctx.employee_id}}),
+    ("POST", "/expenses/", "", lambda ctx: {"url": "/expenses/", "json": ctx.expense_body()}),
+    ("POST", "/expenses/bulk", "", lambda ctx: {"url": "/expenses/bulk", "json": [ctx.expense_body()] * BULK_SIZE}),
+    ("DELETE", "/expenses/bulk", "", lambda ctx: {"url": "/expenses/bulk", "json": {
+        "ids": ctx.bulk_ids("/expenses/bulk", ctx.expense_body())}}),
+    ("GET", "/expenses/{expense_id}", "", lambda ctx: {"url": f"/expenses/{ctx.expense_id}"}),
+    ("PUT", "/expenses/{expense_id}", "", lambda ctx: {
+        "url": f"/expenses/{ctx.new_expense()}", "json": {"amount": 99.99}}),
+    ("DELETE", "/expenses/{expense_id}", "", lambda ctx: {"url": f"/expenses/{ctx.new_expense()}"}),
+
+    ("GET", "/analytics/total_expenses", "", lambda ctx: {"url": "/analytics/total_expenses"}),
+    ("GET", "/analytics/total_expenses", "month", lambda ctx: {
+        "url": "/analytics/total_expenses", "params": MONTH_RANGE}),
+    ("GET", "/analytics/expenses_by_employee", "", lambda ctx: {"url": "/analytics/expenses_by_employee"}),
+    ("GET", "/analytics/expenses_by_employee", "month", lambda ctx: {
+        "url": "/analytics/expenses_by_employee", "params": MONTH_RANGE}),
+    ("GET", "/analytics/expenses_by_expense_type", "", lambda ctx: {"url": "/analytics/expenses_by_expense_type"}),
+    ("GET", "/analytics/employees_with_most_trips", "", lambda ctx: {
+        "url": "/analytics/employees_with_most_trips"}),
+    ("GET", "/analytics/most_popular_destinations", "", lambda ctx: {
+        "url": "/analytics/most_popular_destinations"}),
+    ("GET", "/analytics/average_expense_per_trip", "", lambda ctx: {"url": "/analytics/average_expense_per_trip"}),
+    ("GET", "/analytics/expenses_by_period", "", lambda ctx: {
+        "url": "/analytics/expenses_by_period", "params": {"period": "month"}}),
+    ("GET", "/analytics/all_analytics", "", lambda ctx: {"url": "/analytics/all_analytics"}),
+    ("GET", "/analytics/all_analytics", "month", lambda ctx: {
+        "url": "/analytics/all_analytics", "params": MONTH_RANGE}),
+    ("GET", "/analytics/cache_stats", "", lambda ctx: {"url": "/analytics/cache_stats"}),
+    ("GET", "/analytics/report/{report_type}/{data_type}", "", lambda ctx: {"url": "/analytics/report/csv/all"}),
+    ("POST", "/analytics/reports", "", lambda ctx: {
+        "url": "/analytics/reports", "json": {"report_type": "text", "data_type": "all"}}),
+    ("GET", "/analytics/reports/{job_id}", "", lambda ctx: {"url": f"/analytics/reports/{ctx.report_job()}"}),
+    # Операции с периодами идут парами, чтобы месяц в итоге остался открытым
+    ("GET", "/analytics/periods", "", lambda ctx: {"url": "/analytics/periods"}),
+    ("POST", "/analytics/periods/{period}/close", "", lambda ctx: ctx.client.post(
+        f"/analytics/periods/{PERIOD}/reopen") and {"url": f"/analytics/periods/{PERIOD}/close"}),
+    ("POST", "/analytics/periods/{period}/rebuild", "", lambda ctx: {"url": f"/analytics/periods/{PERIOD}/rebuild"}),
+    ("POST", "/analytics/periods/{period}/reopen", "", lambda ctx: ctx.client.post(
+        f"/analytics/periods/{PERIOD}/rebuild") and {"url": f"/analytics/periods/{PERIOD}/reopen"}),
+
+    ("GET", "/admin/slow_queries", "", lambda ctx: {"url": "/admin/slow_queries"}),
+    # Время профилирования задается параметром; замеряются накладные расходы
+    ("GET", "/debug/profile", "", lambda ctx: {"url": "/debug/profile", "params": {"seconds": 0.1}}),
+    ("GET", "/debug/memory", "", lambda ctx: {"url": "/debug/memory", "params": {"seconds": 0.1}}),
+
+    ("POST", "/import/expenses", "", lambda ctx: {
+        "url": "/import/expenses", "params": {"format": "csv"}, "content": ctx.import_csv()}),
+    ("GET", "/export/{resource}", "", lambda ctx: {"url": "/export/expenses", "params": {"format": "csv"}}),
+]
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0] * 1000, 3),
+        "median_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+    }
+
+
+def time_endpoint(ctx, prepare, repeat):
+    from services.cache import analytics_cache
+
+    samples, statuses = [], set()
+    for attempt in range(repeat + 1):
+        request = prepare(ctx)
+        analytics_cache.clear()
+        started = time.perf_counter()
+        response = ctx.client.request(request.pop("method", None) or ctx.method, **request)
+        elapsed = time.perf_counter() - started
+        statuses.add(response.status_code)
+        if attempt:  # первый вызов — прогрев
+            samples.append(elapsed)
+    return dict(summarize(samples), status=sorted(statuses))
+
+
+def analytics_functions():
+    """Функции get_* модуля service_analytics."""
+    from services import service_analytics
+
+    return [(name, func) for name, func in inspect.getmembers(service_analytics, inspect.isfunction)
+            if name.startswith("get_") and func.__module__ == service_analytics.__name__]
+
+
+def time_function(func, db, kwargs, repeat):
+    samples = []
+    for attempt in range(repeat + 1):
+        db.expire_all()
+        started = time.perf_counter()
+        func(db, **kwargs)
+        elapsed = time.perf_counter() - started
+        db.rollback()
+        if attempt:
+            samples.append(elapsed)
+    return summarize(samples)
+
+
+def openapi_routes(app):
+    return {(method.upper(), path) for path, operations in app.openapi()["paths"].items()
+            for method in operations}
+
+
+def reset_database(engine):
+    models.Base.metadata.drop_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_size(app, engine, size, datagen, repeat, cases):
+    from fastapi.testclient import TestClient
+    from database import get_db, get_read_db
+    from routers.admin import require_admin
+
+    started = time.perf_counter()
+    counts = generate(engine, size, **datagen)
+    load_seconds = round(time.perf_counter() - started, 2)
+    print(json.dumps({"size": size, "load_seconds": load_seconds, "rows": counts}), file=sys.stderr)
+
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    saved = dict(app.dependency_overrides)
+    app.dependency_overrides.update({get_db: override_get_db, get_read_db: override_get_db,
+                                     require_admin: lambda: None})
+    results = []
+    try:
+        with TestClient(app) as client, Session() as db:
+            ctx = Context(client, db)
+            for method, path, variant, prepare in cases:
+                ctx.method = method
+                name = f"{method} {path}" + (f" [{variant}]" if variant else "")
+                row = {"size": size, "kind": "endpoint", "name": name}
+                row.update(time_endpoint(ctx, prepare, repeat))
+                results.append(row)
+                print(json.dumps(row, ensure_ascii=False), file=sys.stderr)
+
+            month = {"date_from": MONTH, "date_to": date(MONTH.year, MONTH.month, 30)}
+            for name, func in analytics_functions():
+                variants = [("", {})]
+                if "date_from" in inspect.signature(func).parameters:
+                    variants.append(("month", month))
+                for variant, kwargs in variants:
+                    row = {"size": size, "kind": "function",
+                           "name": f"service_analytics.{name}" + (f" [{variant}]" if variant else "")}
+                    row.update(time_function(func, db, kwargs, repeat))
+                    results.append(row)
+                    print(json.dumps(row, ensure_ascii=False), file=sys.stderr)
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(saved)
+    return load_seconds, counts, results
+
+
+def run(sizes, url=None, repeat=REPEAT, datagen=None, cases=None):
+    """Замеряет все размеры и возвращает словарь результатов."""
+    datagen = datagen or {}
+    cases = CASES if cases is None else cases
+    with tempfile.TemporaryDirectory() as tmp:
+        urls = {size: url or f"sqlite:///{os.path.join(tmp, f'bench-{size}.db')}" for size in sizes}
+        # Приложение при импорте применяет миграции к DATABASE_URL: пусть это будет база бенчмарка
+        if "main" not in sys.modules:
+            os.environ["DATABASE_URL"] = urls[sizes[0]]
+        from main import app
+        from services.report_jobs import report_jobs
+
+        saved_directory, report_jobs.directory = report_jobs.directory, os.path.join(tmp, "reports")
+        output = {
+            "meta": {
+                "commit": git_commit(),
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlalchemy": sqlalchemy.__version__,
+                "repeat": repeat,
+                "datagen": datagen,
+                "sizes": {},
+            },
+            "missing": sorted(f"{method} {path}" for method, path in
+                              openapi_routes(app) - {(method, path) for method, path, _, _ in CASES}),
+            "results": [],
+        }
+        try:
+            for size in sizes:
+                engine = create_db_engine(urls[size])
+                if url:
+                    reset_database(engine)
+                output["meta"]["dialect"] = engine.dialect.name
+                load_seconds, counts, results = bench_size(app, engine, size, datagen, repeat, cases)
+                output["meta"]["sizes"][size] = {"load_seconds": load_seconds, "rows": counts}
+                output["results"].extend(results)
+                report_jobs.shutdown()
+                engine.dispose()
+        finally:
+            report_jobs.directory = saved_directory
+    return output
+
+
+def compare(old, new, threshold):
+    """Сравнивает медианы двух файлов результатов; возвращает список регрессий."""
+    def key(row):
+        return row["size"], row["kind"], row["name"]
+
+    baseline = {key(row): row for row in old["results"]}
+    regressions = []
+    for row in new["results"]:
+        before = baseline.get(key(row))
+        if before is None or not before["median_ms"]:
+            continue
+        ratio = row["median_ms"] / before["median_ms"]
+        if ratio > threshold or ratio < 1 / threshold:
+            line = (f"{row['size']:>10} {row['name']}: {before['median_ms']:.3f} -> "
+                    f"{row['median_ms']:.3f} ms (x{ratio:.2f})")
+            print(line)
+            if ratio > threshold:
+                regressions.append(line)
+    return regressions
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        parser = argparse.ArgumentParser(description="Сравнение двух файлов результатов")
+        parser.add_argument("command")
+        parser.add_argument("old")
+        parser.add_argument("new")
+        parser.add_argument("--threshold", type=float, default=1.2,
+                            help="во сколько раз медиана может измениться без отчета")
+        args = parser.parse_args()
+        with open(args.old, encoding="utf-8") as old, open(args.new, encoding="utf-8") as new:
+            sys.exit(1 if compare(json.load(old), json.load(new), args.threshold) else 0)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--url", help="база для замеров (PostgreSQL); очищается перед каждым размером")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--expenses-per-trip", type=int, default=10)
+    parser.add_argument("--trips-per-employee", type=int, default=10)
+    parser.add_argument("--employees", type=int)
+    parser.add_argument("--expense-types", type=int, default=20)
+    parser.add_argument("--destinations", type=int, default=100)
+    parser.add_argument("--destination-skew", type=float, default=1.0)
+    args = parser.parse_args()
+    datagen = {
+        "expenses_per_trip": args.expenses_per_trip,
+        "trips_per_employee": args.trips_per_employee,
+        "employees": args.employees,
+        "expense_types": args.expense_types,
+        "destinations": args.destinations,
+        "destination_skew": args.destination_skew,
+    }
+    results = run(args.sizes, args.url, args.repeat, datagen)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+    if results["missing"]:
+        print("routes without a benchmark case:", ", ".join(results["missing"]), file=sys.stderr)
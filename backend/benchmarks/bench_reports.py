@@ -0,0 +1,70 @@
+"""Время генерации и размер отчетов во всех форматах.
+
+Данные отчета строятся синтетически: таблица expenses_by_employee из
+заданного числа групп плюс скалярные показатели, как в
+AnalyticsFacade.get_report_data("all").
+
+    python -m benchmarks.bench_reports --groups 100000
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from services.report_factory import (
+    TextReportFactory, JSONReportFactory, CSVReportFactory, XLSXReportFactory, ParquetReportFactory)
+
+FACTORIES = {
+    "text": TextReportFactory,
+    "json": JSONReportFactory,
+    "csv": CSVReportFactory,
+    "xlsx": XLSXReportFactory,
+    "parquet": ParquetReportFactory,
+}
+
+
+def report_data(groups, seed=42):
+    rng = random.Random(seed)
+    rows = [{"employee": f"Сотрудник {i}", "total_expenses": round(rng.uniform(10, 10_000), 2)}
+            for i in range(groups)]
+    return {
+        "total_expenses": sum(row["total_expenses"] for row in rows),
+        "average_expense_per_trip": "1234.56",
+        "expenses_by_employee": rows,
+    }
+
+
+def measure(report, data):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = 0
+    for chunk in report.stream(data):
+        size += len(chunk.encode() if isinstance(chunk, str) else chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 4), "bytes": size, "peak_mib": round(peak / 2 ** 20, 2)}
+
+
+def run(groups, formats):
+    results = []
+    for count in groups:
+        data = report_data(count)
+        for fmt in formats:
+            row = {"groups": count, "format": fmt}
+            try:
+                row.update(measure(FACTORIES[fmt]().create_report(), data))
+            except ValueError as e:
+                row["error"] = str(e)
+            results.append(row)
+            print(json.dumps(row, ensure_ascii=False))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--groups", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--formats", nargs="+", choices=list(FACTORIES), default=list(FACTORIES))
+    args = parser.parse_args()
+    run(args.groups, args.formats)
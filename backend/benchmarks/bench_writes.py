@@ -0,0 +1,111 @@
+"""Пропускная способность записи при одновременных запросах.
+
+Каждый поток повторяет то, что делает обработчик POST /expenses/: открывает
+сессию, добавляет расход и выполняет commit (с пересчетом агрегатов и
+версий данных в обработчиках событий). Сравниваются профили:
+
+    default  create_engine без настроек (журнал отката, synchronous=FULL)
+    tuned    database.create_db_engine (WAL, synchronous=NORMAL, busy_timeout, ...)
+
+    python -m benchmarks.bench_writes --threads 1 8 32 --seconds 5
+
+Для PostgreSQL передайте --url; тогда замеряется только профиль tuned.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import models
+from benchmarks.datagen import generate
+from database import create_db_engine
+from services import rollups, versions  # noqa: F401 - обработчики событий сессии
+
+
+def writer(Session, trip_ids, type_ids, deadline, latencies, errors, seed):
+    index = seed
+    while time.perf_counter() < deadline:
+        index += 1
+        started = time.perf_counter()
+        db = Session()
+        try:
+            db.add(models.Expense(business_trip_id=trip_ids[index % len(trip_ids)],
+                                  expense_type_id=type_ids[index % len(type_ids)],
+                                  amount=float(index % 1000)))
+            db.commit()
+            latencies.append(time.perf_counter() - started)
+        except OperationalError as e:
+            db.rollback()
+            errors.append(str(e.orig))
+        finally:
+            db.close()
+
+
+def measure(engine, threads, seconds):
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with engine.connect() as connection:
+        trip_ids = [row[0] for row in connection.execute(models.BusinessTrip.__table__.select().limit(1000))]
+        type_ids = [row[0] for row in connection.execute(models.ExpenseType.__table__.select())]
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    workers = [threading.Thread(target=writer, args=(Session, trip_ids, type_ids, deadline,
+                                                     latencies, errors, n * 1_000_000))
+               for n in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "writes": len(latencies),
+        "errors": len(errors),
+        "writes_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p99_ms": round(sorted(latencies)[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+    }
+
+
+def sqlite_engines(path):
+    url = f"sqlite:///{path}"
+    return {
+        "default": lambda: create_engine(url, connect_args={"check_same_thread": False},
+                                         pool_size=64, max_overflow=0),
+        "tuned": lambda: create_db_engine(url, pool_size=64, max_overflow=0),
+    }
+
+
+def run(threads_list, seconds, rows, url=None):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in (["tuned"] if url else ["default", "tuned"]):
+            if url:
+                engine = create_db_engine(url)
+            else:
+                path = os.path.join(tmp, f"{profile}.db")
+                engine = sqlite_engines(path)[profile]()
+            generate(engine, rows)
+            for threads in threads_list:
+                row = {"profile": profile, "threads": threads}
+                row.update(measure(engine, threads, seconds))
+                results.append(row)
+                print(json.dumps(row, ensure_ascii=False))
+            engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=100_000, help="расходов в исходных данных")
+    parser.add_argument("--url", help="адрес базы вместо временных файлов SQLite")
+    args = parser.parse_args()
+    run(args.threads, args.seconds, args.rows, args.url)
@@ -0,0 +1,128 @@
+"""Генератор синтетических данных для бенчмарков.
+
+Заполняет таблицы employees, business_trips, expense_types и expenses
+пакетными вставками через SQLAlchemy Core, поэтому работает и с SQLite,
+и с PostgreSQL. Схема создается миграциями, как при старте приложения.
+
+    python -m benchmarks.datagen --url sqlite:///./bench.db --expenses 1000000 \
+        --trips-per-employee 20 --expense-types 50 --destination-skew 1.2
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Engine
+
+import migrations
+import models
+from database import create_db_engine
+from services import rollups
+
+BATCH_SIZE = 50_000
+
+
+def _batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _reset_sequences(conn):
+    """PostgreSQL: сдвигает последовательности id за вставленные явно значения."""
+    for model in (models.Employee, models.ExpenseType, models.BusinessTrip, models.Expense):
+        table = model.__tablename__
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"))
+
+
+def generate(engine: Engine, expenses: int, expenses_per_trip: int = 10,
+             trips_per_employee: int = 10, expense_types: int = 20,
+             destinations: int = 100, destination_skew: float = 1.0,
+             seed: int = 42, employees: Optional[int] = None):
+    """Создает схему и заполняет ее примерно `expenses` расходами.
+
+    База должна быть пустой. Число сотрудников по умолчанию выводится из
+    trips_per_employee, явное значение employees его переопределяет.
+    destination_skew — показатель распределения Ципфа для направлений:
+    0 дает равномерное распределение, большие значения — сильный перекос.
+    Возвращает словарь с фактическим числом созданных строк.
+    """
+    rnd = random.Random(seed)
+    trips = max(1, expenses // expenses_per_trip)
+    employees = employees or max(1, trips // trips_per_employee)
+
+    destination_names = [f"City {i}" for i in range(destinations)]
+    weights = [1 / (rank + 1) ** destination_skew for rank in range(destinations)]
+    start = datetime(2020, 1, 1)
+
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.ExpenseType), [
+            {"id": i + 1, "name": f"Type {i}"} for i in range(expense_types)])
+        for batch in _batched({"id": i + 1, "fio": f"Employee {i}"} for i in range(employees)):
+            conn.execute(insert(models.Employee), batch)
+
+        def trip_rows():
+            for i in range(trips):
+                start_trip = start + timedelta(days=rnd.randrange(5 * 365))
+                yield {
+                    "id": i + 1,
+                    "employee_id": rnd.randrange(employees) + 1,
+                    "destination": rnd.choices(destination_names, weights)[0],
+                    "start_trip": start_trip,
+                    "end_trip": start_trip + timedelta(days=rnd.randrange(1, 15)),
+                }
+
+        for batch in _batched(trip_rows()):
+            conn.execute(insert(models.BusinessTrip), batch)
+
+        def expense_rows():
+            for i in range(expenses):
+                yield {
+                    "id": i + 1,
+                    "business_trip_id": i // expenses_per_trip + 1 if i // expenses_per_trip < trips else trips,
+                    "expense_type_id": rnd.randrange(expense_types) + 1,
+                    "amount_cents": rnd.randint(100_00, 10_000_00),
+                }
+
+        for batch in _batched(expense_rows()):
+            conn.execute(insert(models.Expense), batch)
+
+        rollups.rebuild(conn)
+        if conn.dialect.name == "postgresql":
+            _reset_sequences(conn)
+
+    return {
+        "employees": employees,
+        "business_trips": trips,
+        "expense_types": expense_types,
+        "expenses": expenses,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="адрес пустой базы")
+    parser.add_argument("--expenses", type=int, default=100_000)
+    parser.add_argument("--expenses-per-trip", type=int, default=10)
+    parser.add_argument("--trips-per-employee", type=int, default=10)
+    parser.add_argument("--employees", type=int, help="переопределяет --trips-per-employee")
+    parser.add_argument("--expense-types", type=int, default=20)
+    parser.add_argument("--destinations", type=int, default=100)
+    parser.add_argument("--destination-skew", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    engine = create_db_engine(args.url)
+    print(json.dumps(generate(
+        engine, args.expenses, args.expenses_per_trip, args.trips_per_employee, args.expense_types,
+        args.destinations, args.destination_skew, args.seed, args.employees)))
+    engine.dispose()
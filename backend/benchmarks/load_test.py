@@ -0,0 +1,94 @@
+"""Нагрузочное сравнение синхронных и асинхронных обработчиков.
+
+Запускаются два сервера над одной базой (например, заполненной
+benchmarks.datagen), с выключенным и включенным ASYNC_DB:
+
+    uvicorn main:app --port 8000
+    ASYNC_DB=1 uvicorn main:app --port 8001
+
+и для каждого числа одновременных клиентов замеряются запросы в секунду
+и задержки (p50, p99):
+
+    python -m benchmarks.load_test --target sync=http://127.0.0.1:8000 \\
+        --target async=http://127.0.0.1:8001 --clients 50 200 1000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+PATHS = [
+    "/employees/?limit=20&expand=none",
+    "/business_trips/?limit=20&expand=none",
+    "/expenses/?limit=50",
+    "/expense_types/",
+    "/analytics/total_expenses",
+    "/analytics/all_analytics",
+]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def client_loop(client, paths, deadline, latencies, errors, offset):
+    index = offset
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def measure(url, clients, duration, paths):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        await client.get(paths[0])  # прогрев
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            client_loop(client, paths, deadline, latencies, errors, offset)
+            for offset in range(clients)))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+    }
+
+
+def run(targets, clients_list, duration, paths):
+    results = []
+    for clients in clients_list:
+        for name, url in targets:
+            row = {"target": name, "clients": clients}
+            row.update(asyncio.run(measure(url, clients, duration, paths)))
+            results.append(row)
+            print(json.dumps(row, ensure_ascii=False))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True,
+                        help="имя=URL сервера, например async=http://127.0.0.1:8001")
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд на каждый замер")
+    parser.add_argument("--path", action="append", help="маршруты для запросов (по умолчанию PATHS)")
+    args = parser.parse_args()
+    run([target.split("=", 1) for target in args.target], args.clients, args.duration, args.path or PATHS)
@@ -0,0 +1,50 @@
+"""Импорт истории расходов из CSV или NDJSON в базу приложения.
+
+    python import_data.py expenses.csv
+    python import_data.py expenses.ndjson --format ndjson --batch-size 10000
+"""
+import argparse
+import json
+import sys
+
+from database import SessionLocal, engine
+from services.importer import DEFAULT_BATCH_SIZE, FORMATS, ExpenseImporter, iter_records
+import migrations
+
+
+def print_progress(stats):
+    print(f"обработано {stats['processed']}, импортировано {stats['imported']}, "
+          f"отклонено {stats['rejected']}", file=sys.stderr)
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"ожидается положительное число, получено {value}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Импорт расходов из CSV или NDJSON")
+    parser.add_argument("path", help="путь к файлу или '-' для стандартного ввода")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="формат файла (по умолчанию определяется по расширению)")
+    parser.add_argument("--batch-size", type=positive_int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    migrations.upgrade(engine)
+
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", newline="")
+    db = SessionLocal()
+    try:
+        importer = ExpenseImporter(db, batch_size=args.batch_size, progress=print_progress)
+        result = importer.run(iter_records(source, fmt))
+    finally:
+        db.close()
+        source.close()
+    print(json.dumps(result, ensure_ascii=False, indent=4))
+
+
+if __name__ == "__main__":
+    main()
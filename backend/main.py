@@ -1,19 +1,54 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine
-from routers import employees, expense_types, business_trips, expenses, analytics
+from database import engine, USE_ASYNC_DB
+from routers import employees, expense_types, business_trips, expenses, analytics, imports, export, admin, debug
+from routers.timing import TimingMiddleware
+from services import metrics, rollups
+from services.period_summaries import ClosedPeriodError
+import migrations
 import uvicorn
-import models
 
-models.Base.metadata.create_all(bind=engine)
+migrations.upgrade(engine)
+with engine.begin() as connection:
+    rollups.rebuild_if_empty(connection)
 
 app = FastAPI()
 
+
+@app.exception_handler(ClosedPeriodError)
+async def closed_period_error_handler(request: Request, exc: ClosedPeriodError):
+    """Изменения данных закрытого месяца отклоняются с 409 Conflict."""
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+
+if USE_ASYNC_DB:
+    from routers.aio import employees as aio_employees, expense_types as aio_expense_types, \
+        business_trips as aio_business_trips, expenses as aio_expenses, analytics as aio_analytics
+
+    # Асинхронные обработчики подключаются первыми и перекрывают одноименные
+    # синхронные; массовые операции, импорт, экспорт и отчеты остаются синхронными.
+    app.include_router(aio_employees.router)
+    app.include_router(aio_expense_types.router)
+    app.include_router(aio_business_trips.router)
+    app.include_router(aio_expenses.router)
+    app.include_router(aio_analytics.router)
+
 app.include_router(employees.router)
 app.include_router(expense_types.router)
 app.include_router(business_trips.router)
 app.include_router(expenses.router)
 app.include_router(analytics.router)
+app.include_router(imports.router)
+app.include_router(export.router)
+app.include_router(admin.router)
+app.include_router(debug.router)
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Гистограммы времени запросов по маршрутам в текстовом формате Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # Настройка CORS
@@ -23,7 +58,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Server-Timing и метрики запросов; подключается последним, чтобы замерять весь запрос
+app.add_middleware(TimingMiddleware)
+
 if __name__ == "__main__":
     uvicorn.run("main:app", reload=True)
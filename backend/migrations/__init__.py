@@ -0,0 +1,21 @@
+"""Миграции схемы (Alembic).
+
+upgrade(engine) вызывается при старте приложения и в import_data.py.
+Схема создается и меняется только миграциями: база, созданная в обход
+них, осталась бы без отметки ревизии в alembic_version.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def upgrade(engine, revision: str = "head"):
+    """Приводит схему базы engine к ревизии revision."""
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = False
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
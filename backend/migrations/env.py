@@ -0,0 +1,52 @@
+"""Окружение Alembic.
+
+Соединение можно передать через config.attributes["connection"]
+(так делает migrations.upgrade при старте приложения), иначе движок
+создается по адресу из database.py.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+import models
+from database import SQLALCHEMY_DATABASE_URL, create_db_engine
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = models.Base.metadata
+
+
+def _configure(**kwargs):
+    # batch-режим нужен SQLite для изменения колонок (ALTER через копию таблицы)
+    context.configure(target_metadata=target_metadata, render_as_batch=True, **kwargs)
+
+
+def run_migrations_offline():
+    _configure(url=SQLALCHEMY_DATABASE_URL, literal_binds=True,
+               dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
+    with engine.connect() as connection:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
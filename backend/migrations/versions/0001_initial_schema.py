@@ -0,0 +1,105 @@
+"""Исходная схема: таблицы данных, агрегатов и версий.
+
+Базы, созданные раньше через Base.metadata.create_all, уже содержат эти
+таблицы; для них миграция создает только недостающие.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _missing(name: str) -> bool:
+    return not sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _missing("employees"):
+        op.create_table(
+            "employees",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("fio", sa.String(), nullable=False),
+        )
+        op.create_index("ix_employees_id", "employees", ["id"])
+        op.create_index("ix_employees_fio", "employees", ["fio"])
+    if _missing("expense_types"):
+        op.create_table(
+            "expense_types",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+        )
+        op.create_index("ix_expense_types_id", "expense_types", ["id"])
+        op.create_index("ix_expense_types_name", "expense_types", ["name"], unique=True)
+    if _missing("business_trips"):
+        op.create_table(
+            "business_trips",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("employee_id", sa.Integer(), sa.ForeignKey("employees.id")),
+            sa.Column("destination", sa.String()),
+            sa.Column("start_trip", sa.DateTime(), nullable=False),
+            sa.Column("end_trip", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_business_trips_id", "business_trips", ["id"])
+    if _missing("expenses"):
+        op.create_table(
+            "expenses",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("business_trip_id", sa.Integer(), sa.ForeignKey("business_trips.id")),
+            sa.Column("expense_type_id", sa.Integer(), sa.ForeignKey("expense_types.id")),
+            sa.Column("amount", sa.Float(), nullable=False),
+        )
+        op.create_index("ix_expenses_id", "expenses", ["id"])
+    if _missing("employee_totals"):
+        op.create_table(
+            "employee_totals",
+            sa.Column("employee_id", sa.Integer(), primary_key=True),
+            sa.Column("total_expenses", sa.Float(), nullable=False),
+            sa.Column("expense_count", sa.Integer(), nullable=False),
+            sa.Column("trip_count", sa.Integer(), nullable=False),
+        )
+    if _missing("expense_type_totals"):
+        op.create_table(
+            "expense_type_totals",
+            sa.Column("expense_type_id", sa.Integer(), primary_key=True),
+            sa.Column("total_expenses", sa.Float(), nullable=False),
+            sa.Column("expense_count", sa.Integer(), nullable=False),
+        )
+    if _missing("trip_totals"):
+        op.create_table(
+            "trip_totals",
+            sa.Column("business_trip_id", sa.Integer(), primary_key=True),
+            sa.Column("total_expenses", sa.Float(), nullable=False),
+            sa.Column("expense_count", sa.Integer(), nullable=False),
+        )
+    if _missing("destination_trip_counts"):
+        op.create_table(
+            "destination_trip_counts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("destination", sa.String(), unique=True),
+            sa.Column("trip_count", sa.Integer(), nullable=False),
+        )
+    if _missing("data_versions"):
+        op.create_table(
+            "data_versions",
+            sa.Column("table_name", sa.String(), primary_key=True),
+            sa.Column("version", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("data_versions", "destination_trip_counts", "trip_totals", "expense_type_totals",
+                  "employee_totals", "expenses", "business_trips", "expense_types", "employees"):
+        op.drop_table(table)
@@ -0,0 +1,66 @@
+"""Индексы по внешним ключам, датам и суммам.
+
+Составные индексы (business_trip_id, amount) и (expense_type_id, amount)
+покрывают агрегации по командировкам и типам расходов: SUM(amount) и
+COUNT(*) считаются по индексу без чтения строк таблицы. Они же заменяют
+одиночные индексы по этим внешним ключам.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:01
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_business_trips_employee_id_start_trip", "business_trips", ["employee_id", "start_trip"]),
+    ("ix_business_trips_destination", "business_trips", ["destination"]),
+    ("ix_business_trips_start_trip", "business_trips", ["start_trip"]),
+    ("ix_business_trips_end_trip", "business_trips", ["end_trip"]),
+    ("ix_expenses_business_trip_id_amount", "expenses", ["business_trip_id", "amount"]),
+    ("ix_expenses_expense_type_id_amount", "expenses", ["expense_type_id", "amount"]),
+    ("ix_expenses_amount", "expenses", ["amount"]),
+]
+
+# Одиночные индексы, которые стали префиксами составных
+REDUNDANT = [
+    ("ix_business_trips_employee_id", "business_trips", ["employee_id"]),
+    ("ix_expenses_business_trip_id", "expenses", ["business_trip_id"]),
+    ("ix_expenses_expense_type_id", "expenses", ["expense_type_id"]),
+]
+
+
+def _existing(table: str) -> set:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _has_columns(table: str, columns) -> bool:
+    return set(columns) <= {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        # В базе, созданной по текущим моделям, amount уже заменен на amount_cents
+        if name not in _existing(table) and _has_columns(table, columns):
+            op.create_index(name, table, columns)
+    for name, table, columns in REDUNDANT:
+        if name in _existing(table):
+            op.drop_index(name, table_name=table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, columns in REDUNDANT:
+        op.create_index(name, table, columns)
+    for name, table, columns in INDEXES:
+        op.drop_index(name, table_name=table)
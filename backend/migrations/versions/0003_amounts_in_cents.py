@@ -0,0 +1,129 @@
+"""Суммы в целых копейках.
+
+expenses.amount (FLOAT) заменяется на expenses.amount_cents (BIGINT),
+а total_expenses в агрегированных таблицах — на total_cents. Суммы
+расходов переводятся в копейки той же функцией models.to_cents, что и
+суммы из API, порциями в Python. Агрегаты не переводятся: суммы
+округленных строк могут не совпасть с округленной суммой, поэтому
+таблицы очищаются и пересчитываются по amount_cents (rollups.rebuild).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:02
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from models import to_cents
+from services import rollups
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUP_TABLES = ("employee_totals", "expense_type_totals", "trip_totals")
+
+# Сколько расходов переводится в копейки за один запрос
+BATCH_SIZE = 10_000
+
+OLD_INDEXES = [
+    ("ix_expenses_business_trip_id_amount", ["business_trip_id", "amount"]),
+    ("ix_expenses_expense_type_id_amount", ["expense_type_id", "amount"]),
+    ("ix_expenses_amount", ["amount"]),
+]
+
+NEW_INDEXES = [
+    ("ix_expenses_business_trip_id_amount_cents", ["business_trip_id", "amount_cents"]),
+    ("ix_expenses_expense_type_id_amount_cents", ["expense_type_id", "amount_cents"]),
+    ("ix_expenses_amount_cents", ["amount_cents"]),
+]
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _replace_column(table: str, old: str, new: str, new_type, fill) -> bool:
+    """Добавляет колонку new, заполняет ее вызовом fill() и удаляет old.
+
+    Ничего не делает и возвращает False, если колонки old уже нет
+    (например, в базе, созданной по текущим моделям).
+    """
+    if not _has_column(table, old):
+        return False
+    op.add_column(table, sa.Column(new, new_type, nullable=True))
+    fill()
+    with op.batch_alter_table(table) as batch:
+        batch.alter_column(new, existing_type=new_type, nullable=False)
+        batch.drop_column(old)
+    return True
+
+
+def _amounts_to_cents():
+    """Переводит expenses.amount в amount_cents порциями по BATCH_SIZE строк."""
+    bind = op.get_bind()
+    expenses = sa.table("expenses", sa.column("id"), sa.column("amount"), sa.column("amount_cents"))
+    update = (sa.update(expenses).where(expenses.c.id == sa.bindparam("expense_id"))
+              .values(amount_cents=sa.bindparam("cents")))
+    last_id = None
+    while True:
+        query = sa.select(expenses.c.id, expenses.c.amount).order_by(expenses.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(expenses.c.id > last_id)
+        rows = bind.execute(query).all()
+        if not rows:
+            return
+        bind.execute(update, [{"expense_id": expense_id, "cents": to_cents(amount)}
+                              for expense_id, amount in rows])
+        last_id = rows[-1][0]
+
+
+def _sql_fill(table: str, new: str, expression: str):
+    return lambda: op.execute(f"UPDATE {table} SET {new} = {expression}")
+
+
+def _existing() -> set:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("expenses")}
+
+
+def _drop_indexes(indexes):
+    existing = _existing()
+    for name, columns in indexes:
+        if name in existing:
+            op.drop_index(name, table_name="expenses")
+
+
+def _create_indexes(indexes):
+    existing = _existing()
+    for name, columns in indexes:
+        if name not in existing:
+            op.create_index(name, "expenses", columns)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _drop_indexes(OLD_INDEXES)
+    _replace_column("expenses", "amount", "amount_cents", sa.BigInteger(), _amounts_to_cents)
+    _create_indexes(NEW_INDEXES)
+    emptied = False
+    for table in ROLLUP_TABLES:
+        emptied |= _replace_column(table, "total_expenses", "total_cents", sa.BigInteger(),
+                                   lambda table=table: op.execute(f"DELETE FROM {table}"))
+    if emptied:
+        rollups.rebuild(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ROLLUP_TABLES:
+        _replace_column(table, "total_cents", "total_expenses", sa.Float(),
+                        _sql_fill(table, "total_expenses", "total_cents / 100.0"))
+    _drop_indexes(NEW_INDEXES)
+    _replace_column("expenses", "amount_cents", "amount", sa.Float(),
+                    _sql_fill("expenses", "amount", "amount_cents / 100.0"))
+    _create_indexes(OLD_INDEXES)
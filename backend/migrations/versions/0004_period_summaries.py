@@ -0,0 +1,73 @@
+"""Итоги закрытых месяцев.
+
+closed_periods хранит общие итоги каждого закрытого месяца, а
+period_employee_totals, period_expense_type_totals и
+period_destination_totals — итоги по сотрудникам, типам расходов и
+направлениям внутри месяца.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:03
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _missing(name: str) -> bool:
+    return not sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _missing("closed_periods"):
+        op.create_table(
+            "closed_periods",
+            sa.Column("period", sa.Date(), primary_key=True),
+            sa.Column("closed_at", sa.DateTime(), nullable=False),
+            sa.Column("total_cents", sa.BigInteger(), nullable=False),
+            sa.Column("expense_count", sa.Integer(), nullable=False),
+            sa.Column("trip_count", sa.Integer(), nullable=False),
+            sa.Column("expensed_trip_count", sa.Integer(), nullable=False),
+        )
+    if _missing("period_employee_totals"):
+        op.create_table(
+            "period_employee_totals",
+            sa.Column("period", sa.Date(), sa.ForeignKey("closed_periods.period"), primary_key=True),
+            sa.Column("employee_id", sa.Integer(), primary_key=True),
+            sa.Column("total_cents", sa.BigInteger(), nullable=False),
+            sa.Column("expense_count", sa.Integer(), nullable=False),
+            sa.Column("trip_count", sa.Integer(), nullable=False),
+        )
+    if _missing("period_expense_type_totals"):
+        op.create_table(
+            "period_expense_type_totals",
+            sa.Column("period", sa.Date(), sa.ForeignKey("closed_periods.period"), primary_key=True),
+            sa.Column("expense_type_id", sa.Integer(), primary_key=True),
+            sa.Column("total_cents", sa.BigInteger(), nullable=False),
+            sa.Column("expense_count", sa.Integer(), nullable=False),
+        )
+    if _missing("period_destination_totals"):
+        op.create_table(
+            "period_destination_totals",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("period", sa.Date(), sa.ForeignKey("closed_periods.period"), nullable=False),
+            sa.Column("destination", sa.String()),
+            sa.Column("trip_count", sa.Integer(), nullable=False),
+            sa.UniqueConstraint("period", "destination", name="uq_period_destination_totals_period_destination"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("period_destination_totals", "period_expense_type_totals",
+                  "period_employee_totals", "closed_periods"):
+        op.drop_table(table)
@@ -1,8 +1,22 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from decimal import ROUND_HALF_UP, Decimal
+
+from sqlalchemy import BigInteger, Column, Date, Integer, String, DateTime, Float, ForeignKey, Index, UniqueConstraint, cast, func
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from database import Base
 
 
+def to_cents(amount) -> int:
+    """Сумма в рублях (float, Decimal или строка) в целых копейках с округлением до ближайшей."""
+    return int(Decimal(str(amount)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) * 100)
+
+
+def cents_sum(column):
+    """SUM по колонке в копейках, переведенный в рубли: целые суммируются
+    точно, а деление выполняется один раз над итогом."""
+    return cast(func.sum(column), Float) / 100.0
+
+
 class Employee(Base):
     __tablename__ = "employees"
 
@@ -18,14 +32,20 @@ class BusinessTrip(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"))
-    destination = Column(String)
-    start_trip = Column(DateTime, nullable=False)
-    end_trip = Column(DateTime, nullable=False)
+    destination = Column(String, index=True)
+    start_trip = Column(DateTime, nullable=False, index=True)
+    end_trip = Column(DateTime, nullable=False, index=True)
 
     employee = relationship("Employee", back_populates="business_trips")
     expenses = relationship(
         "Expense", back_populates="business_trip", cascade="all, delete-orphan")
 
+    # Составные индексы заменяют одиночные по внешним ключам: первая колонка
+    # обслуживает соединения, вторая — фильтр по датам или сумму без чтения таблицы.
+    __table_args__ = (
+        Index("ix_business_trips_employee_id_start_trip", "employee_id", "start_trip"),
+    )
+
 
 class ExpenseType(Base):
     __tablename__ = "expense_types"
@@ -43,7 +63,118 @@ class Expense(Base):
     id = Column(Integer, primary_key=True, index=True)
     business_trip_id = Column(Integer, ForeignKey("business_trips.id"))
     expense_type_id = Column(Integer, ForeignKey("expense_types.id"))
-    amount = Column(Float, nullable=False)
+    # Сумма хранится в копейках: целые складываются точно и быстрее float
+    amount_cents = Column(BigInteger, nullable=False, index=True)
 
     business_trip = relationship("BusinessTrip", back_populates="expenses")
     expense_type = relationship("ExpenseType", back_populates="expenses")
+
+    __table_args__ = (
+        Index("ix_expenses_business_trip_id_amount_cents", "business_trip_id", "amount_cents"),
+        Index("ix_expenses_expense_type_id_amount_cents", "expense_type_id", "amount_cents"),
+    )
+
+    @hybrid_property
+    def amount(self):
+        """Сумма в рублях."""
+        return self.amount_cents / 100 if self.amount_cents is not None else None
+
+    @amount.inplace.setter
+    def _amount_setter(self, value):
+        self.amount_cents = to_cents(value)
+
+    @amount.inplace.expression
+    @classmethod
+    def _amount_expression(cls):
+        return cast(cls.amount_cents, Float) / 100.0
+
+
+# Агрегированные таблицы для аналитики. Поддерживаются в актуальном
+# состоянии обработчиками событий сессии из services/rollups.py.
+class EmployeeTotal(Base):
+    __tablename__ = "employee_totals"
+
+    employee_id = Column(Integer, primary_key=True)
+    total_cents = Column(BigInteger, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+    trip_count = Column(Integer, nullable=False, default=0)
+
+
+class ExpenseTypeTotal(Base):
+    __tablename__ = "expense_type_totals"
+
+    expense_type_id = Column(Integer, primary_key=True)
+    total_cents = Column(BigInteger, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+
+
+class TripTotal(Base):
+    __tablename__ = "trip_totals"
+
+    business_trip_id = Column(Integer, primary_key=True)
+    total_cents = Column(BigInteger, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+
+
+class DestinationTripCount(Base):
+    __tablename__ = "destination_trip_counts"
+
+    id = Column(Integer, primary_key=True)
+    destination = Column(String, unique=True)
+    trip_count = Column(Integer, nullable=False, default=0)
+
+
+# Итоги закрытых месяцев (по дате начала командировки). Строки создаются при
+# закрытии периода и не меняются до его явного открытия; см. services/period_summaries.py.
+class ClosedPeriod(Base):
+    __tablename__ = "closed_periods"
+
+    # Первое число месяца
+    period = Column(Date, primary_key=True)
+    closed_at = Column(DateTime, nullable=False)
+    total_cents = Column(BigInteger, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+    trip_count = Column(Integer, nullable=False, default=0)
+    # Командировки, у которых есть расходы (знаменатель средней суммы)
+    expensed_trip_count = Column(Integer, nullable=False, default=0)
+
+
+class PeriodEmployeeTotal(Base):
+    __tablename__ = "period_employee_totals"
+
+    period = Column(Date, ForeignKey("closed_periods.period"), primary_key=True)
+    employee_id = Column(Integer, primary_key=True)
+    total_cents = Column(BigInteger, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+    trip_count = Column(Integer, nullable=False, default=0)
+
+
+class PeriodExpenseTypeTotal(Base):
+    __tablename__ = "period_expense_type_totals"
+
+    period = Column(Date, ForeignKey("closed_periods.period"), primary_key=True)
+    expense_type_id = Column(Integer, primary_key=True)
+    total_cents = Column(BigInteger, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+
+
+class PeriodDestinationTotal(Base):
+    __tablename__ = "period_destination_totals"
+
+    id = Column(Integer, primary_key=True)
+    period = Column(Date, ForeignKey("closed_periods.period"), nullable=False)
+    destination = Column(String)
+    trip_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("period", "destination", name="uq_period_destination_totals_period_destination"),
+    )
+
+
+# Версии данных таблиц: счетчик увеличивается в каждой транзакции, изменившей
+# таблицу. Поддерживается обработчиками событий из services/versions.py.
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,43 @@
+"""Административные маршруты для диагностики работающего сервера.
+
+Доступны только с заголовком X-Admin-Token, равным переменной окружения
+ADMIN_TOKEN; если она не задана, маршруты отключены (403).
+"""
+import os
+import secrets
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+import schemas
+from services.slow_queries import slow_query_log
+from routers.timing import TimedRoute
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Пропускает запрос только с верным токеном администратора."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled, set ADMIN_TOKEN to enable it")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+    route_class=TimedRoute,
+)
+
+
+@router.get("/slow_queries", response_model=List[schemas.SlowQuery])
+def read_slow_queries(
+    limit: int = Query(100, ge=1, le=1000),
+    route: Optional[str] = Query(None, description="Маршрут, например GET /analytics/all_analytics"),
+    min_ms: Optional[float] = Query(None, ge=0, description="Минимальная длительность запроса, мс"),
+    statement: Optional[str] = Query(None, description="Подстрока текста SQL-запроса"),
+):
+    """Последние записи журнала медленных SQL-запросов с планами, сначала новые."""
+    return slow_query_log.entries(limit=limit, route=route, min_ms=min_ms, statement=statement)
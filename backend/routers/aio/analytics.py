@@ -0,0 +1,87 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends
+from database import get_async_read_db
+from typing import Literal
+from services import analytics_facade, service_analytics, versions
+from services.cache import analytics_cache
+from routers.date_range import DateRange
+from routers.timing import TimedRoute
+from routers.etag import AsyncETag
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    route_class=TimedRoute,
+)
+
+etag = AsyncETag(*versions.VERSIONED_TABLES)
+
+# Функции аналитики синхронные и выполняются через AsyncSession.run_sync;
+# при попадании в кэш обращения к базе нет вовсе.
+
+
+@router.get("/total_expenses", dependencies=[Depends(etag)])
+async def read_total_expenses(db: AsyncSession = Depends(get_async_read_db), dates: DateRange = Depends()):
+    """Получить общую сумму всех расходов."""
+    source, kwargs = dates.source()
+    return await analytics_cache.call_async(source.get_total_expenses, db, **kwargs)
+
+
+@router.get("/expenses_by_employee", dependencies=[Depends(etag)])
+async def read_expenses_by_employee(db: AsyncSession = Depends(get_async_read_db), dates: DateRange = Depends()):
+    """Получить общую сумму расходов для каждого сотрудника."""
+    source, kwargs = dates.source()
+    results = await analytics_cache.call_async(source.get_expenses_by_employee, db, **kwargs)
+    return [{"employee": fio, "total_expenses": expenses} for fio, expenses in results]
+
+
+@router.get("/expenses_by_expense_type", dependencies=[Depends(etag)])
+async def read_expenses_by_expense_type(db: AsyncSession = Depends(get_async_read_db), dates: DateRange = Depends()):
+    """Получить общую сумму расходов по типам расходов."""
+    source, kwargs = dates.source()
+    results = await analytics_cache.call_async(source.get_expenses_by_expense_type, db, **kwargs)
+    return [{"expense_type": name, "total_expenses": expenses} for name, expenses in results]
+
+
+@router.get("/employees_with_most_trips", dependencies=[Depends(etag)])
+async def read_employees_with_most_trips(db: AsyncSession = Depends(get_async_read_db), limit: int = 5,
+                                         dates: DateRange = Depends()):
+    """Получить список сотрудников с наибольшим количеством командировок."""
+    source, kwargs = dates.source()
+    results = await analytics_cache.call_async(source.get_employees_with_most_trips, db, limit, **kwargs)
+    return [{"employee": fio, "trip_count": count} for fio, count in results]
+
+
+@router.get("/most_popular_destinations", dependencies=[Depends(etag)])
+async def read_most_popular_destinations(db: AsyncSession = Depends(get_async_read_db), limit: int = 5,
+                                         dates: DateRange = Depends()):
+    """Получить список самых популярных направлений командировок."""
+    source, kwargs = dates.source()
+    results = await analytics_cache.call_async(source.get_most_popular_destinations, db, limit, **kwargs)
+    return [{"destination": destination, "trip_count": count} for destination, count in results]
+
+
+@router.get("/average_expense_per_trip", dependencies=[Depends(etag)])
+async def read_average_expense_per_trip(db: AsyncSession = Depends(get_async_read_db), dates: DateRange = Depends()):
+    """Получить среднюю сумму расходов на одну командировку."""
+    source, kwargs = dates.source()
+    average_expense_per_trip = await analytics_cache.call_async(source.get_average_expense_per_trip, db, **kwargs)
+    return f"{average_expense_per_trip:.2f}"
+
+
+@router.get("/expenses_by_period", dependencies=[Depends(etag)])
+async def read_expenses_by_period(db: AsyncSession = Depends(get_async_read_db),
+                                  period: Literal["day", "week", "month", "quarter"] = "month",
+                                  dates: DateRange = Depends()):
+    """Получить расходы по периодам начала командировок (день, неделя, месяц, квартал)."""
+    results = await analytics_cache.call_async(
+        service_analytics.get_expenses_by_period, db, period, **dates.kwargs())
+    return [{"period": start, "total_expenses": total, "expense_count": expense_count, "trip_count": trip_count}
+            for start, total, expense_count, trip_count in results]
+
+
+@router.get("/all_analytics", dependencies=[Depends(etag)])
+async def read_all_analytics(db: AsyncSession = Depends(get_async_read_db), dates: DateRange = Depends()):
+    """Получить всю аналитику."""
+    return await db.run_sync(
+        lambda session: analytics_facade.AnalyticsFacade(session).get_all_analytics_data(**dates.kwargs()))
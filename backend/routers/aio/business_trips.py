@@ -0,0 +1,101 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+import schemas
+from fastapi import APIRouter, Depends, HTTPException, Response
+from database import get_async_db, get_async_read_db
+from routers.pagination import Pagination
+from routers.loading import BUSINESS_TRIP_OPTIONS, BUSINESS_TRIP_EXPANSIONS
+from routers.business_trips import Expand
+from routers.timing import TimedRoute
+from routers.etag import AsyncETag
+
+router = APIRouter(
+    prefix="/business_trips",
+    tags=["business_trips"],
+    route_class=TimedRoute,
+)
+
+etag = AsyncETag("business_trips", "expenses", "expense_types")
+
+
+async def get_business_trip_by_id(db: AsyncSession, business_trips_id: int, options=BUSINESS_TRIP_OPTIONS):
+    """Получает поездку по ID или выбрасывает исключение, если поездка не найдена."""
+    db_business_trip = await db.scalar(select(models.BusinessTrip).options(*options).where(
+        models.BusinessTrip.id == business_trips_id))
+    if not db_business_trip:
+        raise HTTPException(status_code=404, detail="Business Trip not found")
+    return db_business_trip
+
+
+@router.get("/", response_model=None, responses={200: {"model": list[schemas.BusinessTrip]}}, dependencies=[Depends(etag)])
+async def read_business_trips(
+    response: Response,
+    page: Pagination = Depends(),
+    expand: Expand = "expenses",
+    employee_id: Optional[int] = None,
+    destination: Optional[str] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    end_from: Optional[datetime] = None,
+    end_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Получает страницу списка поездок с фильтрами по сотруднику, направлению и датам."""
+    options, schema = BUSINESS_TRIP_EXPANSIONS[expand]
+    statement = select(models.BusinessTrip).options(*options)
+    if employee_id is not None:
+        statement = statement.where(models.BusinessTrip.employee_id == employee_id)
+    if destination is not None:
+        statement = statement.where(models.BusinessTrip.destination == destination)
+    if start_from is not None:
+        statement = statement.where(models.BusinessTrip.start_trip >= start_from)
+    if start_to is not None:
+        statement = statement.where(models.BusinessTrip.start_trip <= start_to)
+    if end_from is not None:
+        statement = statement.where(models.BusinessTrip.end_trip >= end_from)
+    if end_to is not None:
+        statement = statement.where(models.BusinessTrip.end_trip <= end_to)
+    business_trips = await page.apply_async(db, statement, models.BusinessTrip.id, response)
+    return [schema.model_validate(business_trip) for business_trip in business_trips]
+
+
+@router.get("/{business_trips_id:int}", response_model=None, responses={200: {"model": schemas.BusinessTrip}}, dependencies=[Depends(etag)])
+async def read_business_trip(business_trips_id: int, expand: Expand = "expenses",
+                             db: AsyncSession = Depends(get_async_read_db)):
+    """Получает поездку по ID."""
+    options, schema = BUSINESS_TRIP_EXPANSIONS[expand]
+    return schema.model_validate(await get_business_trip_by_id(db, business_trips_id, options))
+
+
+@router.post("/", response_model=schemas.BusinessTrip)
+async def create_business_trip(business_trip: schemas.BusinessTripCreate, db: AsyncSession = Depends(get_async_db)):
+    """Создает новую поездку."""
+    db_business_trip = models.BusinessTrip(**business_trip.model_dump())
+    db.add(db_business_trip)
+    await db.commit()
+    # Связи загружаются заново запросом: ленивая загрузка в async недоступна
+    return await get_business_trip_by_id(db, db_business_trip.id)
+
+
+@router.put("/{business_trips_id:int}", response_model=schemas.BusinessTrip)
+async def update_business_trip(business_trips_id: int, business_trip: schemas.BusinessTripUpdate,
+                               db: AsyncSession = Depends(get_async_db)):
+    """Обновляет данные поездки."""
+    db_business_trip = await get_business_trip_by_id(db, business_trips_id)
+    update_data = business_trip.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(db_business_trip, key, value)
+    await db.commit()
+    return db_business_trip
+
+
+@router.delete("/{business_trips_id:int}")
+async def delete_business_trip(business_trips_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Удаляет поездку."""
+    db_business_trip = await get_business_trip_by_id(db, business_trips_id)
+    await db.delete(db_business_trip)
+    await db.commit()
+    return {"message": "Business Trip deleted"}
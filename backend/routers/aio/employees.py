@@ -0,0 +1,78 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+import schemas
+from fastapi import HTTPException, APIRouter, Depends, Response
+from database import get_async_db, get_async_read_db
+from routers.pagination import Pagination
+from routers.loading import EMPLOYEE_OPTIONS, EMPLOYEE_EXPANSIONS
+from routers.employees import Expand
+from routers.timing import TimedRoute
+from routers.etag import AsyncETag
+from services import versions
+
+router = APIRouter(
+    prefix="/employees",
+    tags=["employees"],
+    route_class=TimedRoute,
+)
+
+etag = AsyncETag(*versions.TRACKED_TABLES)
+
+
+async def get_employee_by_id(db: AsyncSession, employee_id: int, options=EMPLOYEE_OPTIONS):
+    """Получает сотрудника по ID или выбрасывает исключение, если сотрудник не найден."""
+    employee = await db.scalar(select(models.Employee).options(*options).where(
+        models.Employee.id == employee_id))
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return employee
+
+
+@router.get("/", response_model=None, responses={200: {"model": list[schemas.Employee]}}, dependencies=[Depends(etag)])
+async def read_employees(response: Response, page: Pagination = Depends(),
+                         expand: Expand = "business_trips.expenses", db: AsyncSession = Depends(get_async_read_db)):
+    """Получает страницу списка сотрудников с указанной глубиной вложенности."""
+    options, schema = EMPLOYEE_EXPANSIONS[expand]
+    employees = await page.apply_async(db, select(models.Employee).options(*options),
+                                       models.Employee.id, response)
+    return [schema.model_validate(employee) for employee in employees]
+
+
+@router.get("/{employee_id:int}", response_model=None, responses={200: {"model": schemas.Employee}}, dependencies=[Depends(etag)])
+async def read_employee(employee_id: int, expand: Expand = "business_trips.expenses",
+                        db: AsyncSession = Depends(get_async_read_db)):
+    """Получает сотрудника по ID."""
+    options, schema = EMPLOYEE_EXPANSIONS[expand]
+    return schema.model_validate(await get_employee_by_id(db, employee_id, options))
+
+
+@router.post("/", response_model=schemas.Employee)
+async def create_employee(employee: schemas.EmployeeCreate, db: AsyncSession = Depends(get_async_db)):
+    """Создает нового сотрудника."""
+    db_employee = models.Employee(**employee.model_dump())
+    db.add(db_employee)
+    await db.commit()
+    # Связи загружаются заново запросом: ленивая загрузка в async недоступна
+    return await get_employee_by_id(db, db_employee.id)
+
+
+@router.put("/{employee_id:int}", response_model=schemas.Employee)
+async def update_employee(employee_id: int, employee: schemas.EmployeeUpdate,
+                          db: AsyncSession = Depends(get_async_db)):
+    """Обновляет данные сотрудника."""
+    db_employee = await get_employee_by_id(db, employee_id)
+    update_data = employee.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(db_employee, key, value)
+    await db.commit()
+    return db_employee
+
+
+@router.delete("/{employee_id:int}")
+async def delete_employee(employee_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Удаляет сотрудника."""
+    db_employee = await get_employee_by_id(db, employee_id)
+    await db.delete(db_employee)
+    await db.commit()
+    return {"message": "Employee deleted"}
@@ -0,0 +1,80 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+import schemas
+from fastapi import APIRouter, Depends, HTTPException, Response
+from database import get_async_db, get_async_read_db
+from routers.pagination import Pagination
+from routers.timing import TimedRoute
+from routers.etag import AsyncETag
+
+router = APIRouter(
+    prefix="/expense_types",
+    tags=["expense_types"],
+    route_class=TimedRoute,
+)
+
+etag = AsyncETag("expense_types")
+
+
+async def get_expense_type_by_id(db: AsyncSession, expense_type_id: int):
+    """Получает тип расходов по ID или выбрасывает исключение, если он не найден."""
+    db_expense_type = await db.get(models.ExpenseType, expense_type_id)
+    if db_expense_type is None:
+        raise HTTPException(status_code=404, detail="Expense Type not found")
+    return db_expense_type
+
+
+@router.get("/", response_model=list[schemas.ExpenseType], dependencies=[Depends(etag)])
+async def read_expense_types(response: Response, page: Pagination = Depends(),
+                             db: AsyncSession = Depends(get_async_read_db)):
+    """Получает страницу списка типов расходов."""
+    return await page.apply_async(db, select(models.ExpenseType), models.ExpenseType.id, response)
+
+
+@router.get("/{expense_type_id:int}", response_model=schemas.ExpenseType, dependencies=[Depends(etag)])
+async def read_expense_type(expense_type_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Получает тип расходов по ID."""
+    return await get_expense_type_by_id(db, expense_type_id)
+
+
+@router.post("/", response_model=schemas.ExpenseType)
+async def create_expense_type(expense_type: schemas.ExpenseTypeCreate, db: AsyncSession = Depends(get_async_db)):
+    """Создает новый тип расходов."""
+    existing_expense_type = await db.scalar(select(models.ExpenseType).where(
+        models.ExpenseType.name == expense_type.name))
+    if existing_expense_type:
+        raise HTTPException(
+            status_code=400, detail="Expense Type with this name already exists")
+    db_expense_type = models.ExpenseType(**expense_type.model_dump())
+    db.add(db_expense_type)
+    await db.commit()
+    return db_expense_type
+
+
+@router.put("/{expense_type_id:int}", response_model=schemas.ExpenseType)
+async def update_expense_type(expense_type_id: int, expense_type_update: schemas.ExpenseTypeUpdate,
+                              db: AsyncSession = Depends(get_async_db)):
+    """Обновляет данные типа расходов."""
+    db_expense_type = await get_expense_type_by_id(db, expense_type_id)
+    # Проверяем, не пытается ли пользователь задать имя, которое уже существует у другой записи
+    existing_expense_type = await db.scalar(select(models.ExpenseType).where(
+        models.ExpenseType.name == expense_type_update.name,
+        models.ExpenseType.id != expense_type_id  # Исключаем текущую запись
+    ))
+    if existing_expense_type:
+        raise HTTPException(
+            status_code=400, detail="Expense Type with this name already exists")
+    for key, value in expense_type_update.model_dump(exclude_unset=True).items():
+        setattr(db_expense_type, key, value)
+    await db.commit()
+    return db_expense_type
+
+
+@router.delete("/{expense_type_id:int}", response_model=schemas.ExpenseType)
+async def delete_expense_type(expense_type_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Удаляет тип расходов."""
+    db_expense_type = await get_expense_type_by_id(db, expense_type_id)
+    await db.delete(db_expense_type)
+    await db.commit()
+    return db_expense_type
@@ -0,0 +1,94 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+import schemas
+from fastapi import APIRouter, Depends, HTTPException, Response
+from database import get_async_db, get_async_read_db
+from routers.pagination import Pagination
+from routers.loading import EXPENSE_OPTIONS
+from routers.timing import TimedRoute
+from routers.etag import AsyncETag
+
+router = APIRouter(
+    prefix="/expenses",
+    tags=["expenses"],
+    route_class=TimedRoute,
+)
+
+etag = AsyncETag("expenses", "expense_types", "business_trips")
+
+
+async def get_expense_by_id(db: AsyncSession, expense_id: int):
+    """Получает расход по ID или выбрасывает исключение, если расход не найден."""
+    expense = await db.scalar(select(models.Expense).options(*EXPENSE_OPTIONS).where(
+        models.Expense.id == expense_id))
+    if not expense:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return expense
+
+
+@router.get("/", response_model=list[schemas.Expense], dependencies=[Depends(etag)])
+async def read_expenses(
+    response: Response,
+    page: Pagination = Depends(),
+    business_trip_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    expense_type_id: Optional[int] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Получает страницу списка расходов с фильтрами по поездке, сотруднику, типу и сумме."""
+    statement = select(models.Expense).options(*EXPENSE_OPTIONS)
+    if business_trip_id is not None:
+        statement = statement.where(models.Expense.business_trip_id == business_trip_id)
+    if employee_id is not None:
+        statement = statement.join(models.BusinessTrip).where(
+            models.BusinessTrip.employee_id == employee_id)
+    if expense_type_id is not None:
+        statement = statement.where(models.Expense.expense_type_id == expense_type_id)
+    if min_amount is not None:
+        statement = statement.where(models.Expense.amount_cents >= models.to_cents(min_amount))
+    if max_amount is not None:
+        statement = statement.where(models.Expense.amount_cents <= models.to_cents(max_amount))
+    return await page.apply_async(db, statement, models.Expense.id, response)
+
+
+@router.get("/{expense_id:int}", response_model=schemas.Expense, dependencies=[Depends(etag)])
+async def read_expense(expense_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Получает расход по ID."""
+    return await get_expense_by_id(db, expense_id)
+
+
+@router.post("/", response_model=schemas.Expense)
+async def create_expense(expense: schemas.ExpenseCreate, db: AsyncSession = Depends(get_async_db)):
+    """Создает новый расход."""
+    db_expense = models.Expense(**expense.model_dump())
+    db.add(db_expense)
+    await db.commit()
+    # Тип расхода загружается заново запросом: ленивая загрузка в async недоступна
+    return await get_expense_by_id(db, db_expense.id)
+
+
+@router.put("/{expense_id:int}", response_model=schemas.Expense)
+async def update_expense(expense_id: int, expense: schemas.ExpenseUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Обновляет данные расхода."""
+    db_expense = await get_expense_by_id(db, expense_id)
+    update_data = expense.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(db_expense, key, value)
+    await db.commit()
+    if "expense_type_id" in update_data:
+        db.expire(db_expense)
+        db_expense = await get_expense_by_id(db, expense_id)
+    return db_expense
+
+
+@router.delete("/{expense_id:int}")
+async def delete_expense(expense_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Удаляет расход."""
+    db_expense = await get_expense_by_id(db, expense_id)
+    await db.delete(db_expense)
+    await db.commit()
+    return {"message": "Expense deleted"}
@@ -1,88 +1,205 @@
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, HTTPException
-from database import get_db
-from services import service_analytics, analytics_facade
-from services.report_factory import TextReportFactory, JSONReportFactory
-
-from typing import List, Dict, Any
+from database import get_db, get_read_db
+from services import analytics_facade, period_summaries, service_analytics, versions
+from services.report_jobs import DONE, FAILED, report_jobs
+from services.cache import analytics_cache
+from services.report_factory import REPORT_FORMATS
+
+from typing import List, Dict, Any, Literal
+from routers.date_range import DateRange
+from routers.timing import TimedRoute
+from routers.etag import ETag, etag_headers
+import os
+import models
+import schemas
 
 router = APIRouter(
     prefix="/analytics",
     tags=["analytics"],
+    route_class=TimedRoute,
 )
 
+# Аналитика за диапазон дат читает итоги закрытых месяцев, поэтому
+# версия closed_periods тоже входит в ETag
+etag = ETag(*versions.VERSIONED_TABLES)
+periods_etag = ETag(models.ClosedPeriod.__tablename__)
+
 
-@router.get("/total_expenses")
-def read_total_expenses(db: Session = Depends(get_db)):
+@router.get("/total_expenses", dependencies=[Depends(etag)])
+def read_total_expenses(db: Session = Depends(get_read_db), dates: DateRange = Depends()):
     """Получить общую сумму всех расходов."""
-    return service_analytics.get_total_expenses(db)
+    source, kwargs = dates.source()
+    return analytics_cache.call(source.get_total_expenses, db, **kwargs)
 
 
-@router.get("/expenses_by_employee")
-def read_expenses_by_employee(db: Session = Depends(get_db)):
+@router.get("/expenses_by_employee", dependencies=[Depends(etag)])
+def read_expenses_by_employee(db: Session = Depends(get_read_db), dates: DateRange = Depends()):
     """Получить общую сумму расходов для каждого сотрудника."""
-    results = service_analytics.get_expenses_by_employee(db)
+    source, kwargs = dates.source()
+    results = analytics_cache.call(source.get_expenses_by_employee, db, **kwargs)
     return [{"employee": fio, "total_expenses": expenses} for fio, expenses in results]
 
 
-@router.get("/expenses_by_expense_type")
-def read_expenses_by_expense_type(db: Session = Depends(get_db)):
+@router.get("/expenses_by_expense_type", dependencies=[Depends(etag)])
+def read_expenses_by_expense_type(db: Session = Depends(get_read_db), dates: DateRange = Depends()):
     """Получить общую сумму расходов по типам расходов."""
-    results = service_analytics.get_expenses_by_expense_type(db)
+    source, kwargs = dates.source()
+    results = analytics_cache.call(source.get_expenses_by_expense_type, db, **kwargs)
     return [{"expense_type": name, "total_expenses": expenses} for name, expenses in results]
 
 
-@router.get("/employees_with_most_trips")
-def read_employees_with_most_trips(db: Session = Depends(get_db), limit: int = 5):
+@router.get("/employees_with_most_trips", dependencies=[Depends(etag)])
+def read_employees_with_most_trips(db: Session = Depends(get_read_db), limit: int = 5,
+                                   dates: DateRange = Depends()):
     """Получить список сотрудников с наибольшим количеством командировок."""
-    results = service_analytics.get_employees_with_most_trips(db, limit)
+    source, kwargs = dates.source()
+    results = analytics_cache.call(source.get_employees_with_most_trips, db, limit, **kwargs)
     return [{"employee": fio, "trip_count": count} for fio, count in results]
 
 
-@router.get("/most_popular_destinations")
-def read_most_popular_destinations(db: Session = Depends(get_db), limit: int = 5):
+@router.get("/most_popular_destinations", dependencies=[Depends(etag)])
+def read_most_popular_destinations(db: Session = Depends(get_read_db), limit: int = 5,
+                                   dates: DateRange = Depends()):
     """Получить список самых популярных направлений командировок."""
-    results = service_analytics.get_most_popular_destinations(db, limit)
+    source, kwargs = dates.source()
+    results = analytics_cache.call(source.get_most_popular_destinations, db, limit, **kwargs)
     return [{"destination": destination, "trip_count": count} for destination, count in results]
 
 
-@router.get("/average_expense_per_trip")
-def read_average_expense_per_trip(db: Session = Depends(get_db)):
+@router.get("/average_expense_per_trip", dependencies=[Depends(etag)])
+def read_average_expense_per_trip(db: Session = Depends(get_read_db), dates: DateRange = Depends()):
     """Получить среднюю сумму расходов на одну командировку."""
-    average_expense_per_trip = service_analytics.get_average_expense_per_trip(
-        db)
+    source, kwargs = dates.source()
+    average_expense_per_trip = analytics_cache.call(source.get_average_expense_per_trip, db, **kwargs)
     return f"{average_expense_per_trip:.2f}"
 
 
-@router.get("/all_analytics")
-def read_all_analytics(db: Session = Depends(get_db)):
+@router.get("/expenses_by_period", dependencies=[Depends(etag)])
+def read_expenses_by_period(db: Session = Depends(get_read_db),
+                            period: Literal["day", "week", "month", "quarter"] = "month",
+                            dates: DateRange = Depends()):
+    """Получить расходы по периодам начала командировок (день, неделя, месяц, квартал)."""
+    results = analytics_cache.call(service_analytics.get_expenses_by_period, db, period, **dates.kwargs())
+    return [{"period": start, "total_expenses": total, "expense_count": expense_count, "trip_count": trip_count}
+            for start, total, expense_count, trip_count in results]
+
+
+@router.get("/all_analytics", dependencies=[Depends(etag)])
+def read_all_analytics(db: Session = Depends(get_read_db), dates: DateRange = Depends()):
     """Получить всю аналитику."""
     facade = analytics_facade.AnalyticsFacade(db)
-    return facade.get_all_analytics_data()
+    return facade.get_all_analytics_data(**dates.kwargs())
+
+
+@router.get("/cache_stats")
+def read_cache_stats():
+    """Получить статистику кэша аналитики (попадания, промахи, размер)."""
+    return analytics_cache.stats()
 
 
 @router.get("/report/{report_type}/{data_type}")
-def generate_report(report_type: str, data_type: str, db: Session = Depends(get_db)):
+def generate_report(report_type: str, data_type: str, db: Session = Depends(get_read_db),
+                    report_etag: str = Depends(etag)):
     """Генерирует отчет указанного типа."""
-    if report_type == "text":
-        report_factory = TextReportFactory()
-        filename = "report.txt"
-        media_type = "text/plain"
-    elif report_type == "json":
-        report_factory = JSONReportFactory()
-        filename = "report.json"
-        media_type = "application/json"
-    else:
+    if report_type not in REPORT_FORMATS:
         raise HTTPException(status_code=400, detail="Invalid report type")
+    factory_class, filename, media_type = REPORT_FORMATS[report_type]
+    report_factory = factory_class()
 
     facade = analytics_facade.AnalyticsFacade(db, report_factory)
     try:
-        report_content = facade.generate_report(data_type)
+        report_content = facade.stream_report(data_type)
         return StreamingResponse(
-            [report_content],
+            report_content,
             media_type=media_type,
-            headers={"Content-Disposition": f"attachment;filename={filename}"},
+            headers={"Content-Disposition": f"attachment;filename={filename}", **etag_headers(report_etag)},
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/reports", response_model=schemas.ReportJob, status_code=202)
+def create_report_job(job: schemas.ReportJobCreate, db: Session = Depends(get_read_db)):
+    """Ставит построение отчета в фоновую очередь и возвращает задание.
+
+    Если отчет для текущей версии данных уже построен, задание сразу готово.
+    """
+    try:
+        return report_jobs.submit(db, job.report_type, job.data_type).to_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/reports/{job_id}", response_model=None,
+            responses={200: {"description": "Готовый файл отчета"},
+                       202: {"model": schemas.ReportJob}})
+def read_report_job(job_id: str):
+    """Возвращает файл готового отчета или статус задания (202, пока отчет строится)."""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job.status == FAILED:
+        return JSONResponse(status_code=500, content=job.to_dict())
+    if job.status != DONE:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    if not os.path.exists(job.path):
+        raise HTTPException(status_code=410, detail="Report file has expired, submit the job again")
+    return FileResponse(job.path, media_type=job.media_type, filename=job.filename)
+
+
+def _closed_period(row) -> dict:
+    return {"period": row["period"], "closed_at": row.get("closed_at"),
+            "total_expenses": row["total_cents"] / 100,
+            "expense_count": row["expense_count"], "trip_count": row["trip_count"]}
+
+
+def _parse_period(period: str):
+    try:
+        return period_summaries.parse_period(period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/periods", response_model=List[schemas.ClosedPeriod], dependencies=[Depends(periods_etag)])
+def read_closed_periods(db: Session = Depends(get_read_db)):
+    """Список закрытых месяцев с их итогами."""
+    ClosedPeriod = models.ClosedPeriod
+    rows = db.execute(
+        select(ClosedPeriod.period, ClosedPeriod.closed_at, ClosedPeriod.total_cents,
+               ClosedPeriod.expense_count, ClosedPeriod.trip_count)
+        .order_by(ClosedPeriod.period)).mappings()
+    return [_closed_period(row) for row in rows]
+
+
+@router.post("/periods/{period}/close", response_model=schemas.ClosedPeriod)
+def close_period(period: str, db: Session = Depends(get_db)):
+    """Закрывает месяц (YYYY-MM): его итоги сохраняются, а данные больше не меняются."""
+    try:
+        summary = period_summaries.close_period(db.connection(), _parse_period(period))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    db.commit()
+    return _closed_period(summary)
+
+
+@router.post("/periods/{period}/reopen")
+def reopen_period(period: str, db: Session = Depends(get_db)):
+    """Открывает закрытый месяц (YYYY-MM) для изменений."""
+    if not period_summaries.reopen_period(db.connection(), _parse_period(period)):
+        raise HTTPException(status_code=404, detail="Period is not closed")
+    db.commit()
+    return {"period": period, "closed": False}
+
+
+@router.post("/periods/{period}/rebuild", response_model=schemas.ClosedPeriod)
+def rebuild_period(period: str, db: Session = Depends(get_db)):
+    """Пересчитывает итоги закрытого месяца (YYYY-MM) по исходным данным."""
+    try:
+        summary = period_summaries.rebuild_period(db.connection(), _parse_period(period))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    db.commit()
+    return _closed_period(summary)
@@ -1,31 +1,91 @@
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
 from sqlalchemy.orm import Session
 import models
 import schemas
-from fastapi import APIRouter, Depends, HTTPException
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response
+from database import get_db, get_read_db
+from services import bulk
+from routers.pagination import Pagination
+from routers.loading import BUSINESS_TRIP_EXPANSIONS
+from routers.timing import TimedRoute
+from routers.etag import ETag
 
 
 router = APIRouter(
     prefix="/business_trips",
     tags=["business_trips"],
+    route_class=TimedRoute,
 )
 
+etag = ETag("business_trips", "expenses", "expense_types")
 
-@router.get("/", response_model=list[schemas.BusinessTrip])
-def read_business_trips(db: Session = Depends(get_db)):
-    """Получает список всех поездок."""
-    business_trips = db.query(models.BusinessTrip).all()
-    return business_trips
+# Какие связи включать в ответ: none — только поля поездки, expenses — с расходами.
+Expand = Literal["none", "expenses"]
 
 
-@router.get("/{business_trips_id}", response_model=schemas.BusinessTrip)
-def read_business_trips(business_trips_id: int, db: Session = Depends(get_db)):
+@router.get("/", response_model=None, responses={200: {"model": list[schemas.BusinessTrip]}}, dependencies=[Depends(etag)])
+def read_business_trips(
+    response: Response,
+    page: Pagination = Depends(),
+    expand: Expand = "expenses",
+    employee_id: Optional[int] = None,
+    destination: Optional[str] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    end_from: Optional[datetime] = None,
+    end_to: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
+):
+    """Получает страницу списка поездок с фильтрами по сотруднику, направлению и датам."""
+    options, schema = BUSINESS_TRIP_EXPANSIONS[expand]
+    query = db.query(models.BusinessTrip).options(*options)
+    if employee_id is not None:
+        query = query.filter(models.BusinessTrip.employee_id == employee_id)
+    if destination is not None:
+        query = query.filter(models.BusinessTrip.destination == destination)
+    if start_from is not None:
+        query = query.filter(models.BusinessTrip.start_trip >= start_from)
+    if start_to is not None:
+        query = query.filter(models.BusinessTrip.start_trip <= start_to)
+    if end_from is not None:
+        query = query.filter(models.BusinessTrip.end_trip >= end_from)
+    if end_to is not None:
+        query = query.filter(models.BusinessTrip.end_trip <= end_to)
+    business_trips = page.apply(query, models.BusinessTrip.id, response)
+    return [schema.model_validate(business_trip) for business_trip in business_trips]
+
+
+@router.post("/bulk", response_model=list[schemas.BulkItemResult])
+def create_business_trips_bulk(items: List[Dict[str, Any]], db: Session = Depends(get_db)):
+    """Создает пакет поездок одной транзакцией.
+
+    Каждый элемент проверяется схемой BusinessTripCreate отдельно; ошибочные
+    элементы не вставляются и возвращаются с описанием ошибок.
+    """
+    rows, results = bulk.validate_items(items, schemas.BusinessTripCreate)
+    ids = bulk.insert_business_trips(db, rows)
+    db.commit()
+    return bulk.assign_ids(results, ids)
+
+
+@router.delete("/bulk", response_model=schemas.BulkDeleteResult)
+def delete_business_trips_bulk(request: schemas.BulkDelete, db: Session = Depends(get_db)):
+    """Удаляет поездки (вместе с их расходами) по списку ID одной транзакцией."""
+    deleted = bulk.delete_business_trips(db, request.ids)
+    db.commit()
+    return {"deleted": deleted, "not_found": sorted(set(request.ids) - set(deleted))}
+
+
+@router.get("/{business_trips_id}", response_model=None, responses={200: {"model": schemas.BusinessTrip}}, dependencies=[Depends(etag)])
+def read_business_trips(business_trips_id: int, expand: Expand = "expenses", db: Session = Depends(get_read_db)):
     """Получает поездку по ID."""
-    db_business_trip = db.query(models.BusinessTrip).filter(
+    options, schema = BUSINESS_TRIP_EXPANSIONS[expand]
+    db_business_trip = db.query(models.BusinessTrip).options(*options).filter(
         models.BusinessTrip.id == business_trips_id).first()
     if not db_business_trip:
         raise HTTPException(status_code=404, detail="Business Trip not found")
-    return db_business_trip
+    return schema.model_validate(db_business_trip)
 
 
 @router.post("/", response_model=schemas.BusinessTrip)
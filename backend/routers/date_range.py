@@ -0,0 +1,35 @@
+from datetime import date
+from typing import Optional
+from fastapi import HTTPException, Query
+from services import period_summaries, rollups
+
+
+class DateRange:
+    """Параметры периода аналитики: from и to по дате начала командировки (обе включительно).
+
+    Без параметров показатели читаются из агрегированных таблиц (rollups),
+    с ними — из итогов закрытых месяцев и исходных строк за остальные дни.
+    """
+
+    def __init__(
+        self,
+        date_from: Optional[date] = Query(None, alias="from", description="Начало периода (включительно)"),
+        date_to: Optional[date] = Query(None, alias="to", description="Конец периода (включительно)"),
+    ):
+        if date_from is not None and date_to is not None and date_from > date_to:
+            raise HTTPException(status_code=400, detail="'from' must not be later than 'to'")
+        self.date_from = date_from
+        self.date_to = date_to
+
+    @property
+    def is_set(self) -> bool:
+        return self.date_from is not None or self.date_to is not None
+
+    def kwargs(self) -> dict:
+        return {"date_from": self.date_from, "date_to": self.date_to}
+
+    def source(self):
+        """Модуль-источник показателей и аргументы периода для его функций."""
+        if self.is_set:
+            return period_summaries, self.kwargs()
+        return rollups, {}
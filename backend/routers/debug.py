@@ -0,0 +1,78 @@
+"""Профилирование работающего процесса сервера (только для администратора).
+
+GET /debug/profile?seconds=N ждет N секунд, пока процесс обслуживает
+другие запросы, и отдает свернутые стеки для построения flame graph:
+
+    curl -H "X-Admin-Token: $ADMIN_TOKEN" "http://localhost:8000/debug/profile?seconds=30" > api.collapsed
+    flamegraph.pl api.collapsed > api.svg
+
+GET /debug/memory?seconds=N отдает прирост памяти по местам выделения
+(tracemalloc) за то же окно.
+"""
+import time
+from typing import Literal
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from routers.admin import require_admin
+from routers.timing import TimedRoute
+from services import profiler
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"],
+    dependencies=[Depends(require_admin)],
+    route_class=TimedRoute,
+)
+
+
+def _acquire():
+    if not profiler.profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Another profiling session is running")
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10, gt=0, le=300),
+    interval_ms: float = Query(5, ge=1, le=1000, description="Интервал между выборками стеков"),
+    idle: bool = Query(False, description="Учитывать потоки, ожидающие работу"),
+):
+    """Выборочный профиль стеков всех потоков процесса в свернутом формате."""
+    _acquire()
+    try:
+        sampler = profiler.StackSampler(interval_ms / 1000, include_idle=idle)
+        sampler.start()
+        try:
+            # Обработчик асинхронный и не занимает поток: сервер продолжает принимать запросы
+            await anyio.sleep(seconds)
+        finally:
+            await run_in_threadpool(sampler.stop)
+    finally:
+        profiler.profile_lock.release()
+    return PlainTextResponse(sampler.collapsed(), headers={
+        "Content-Disposition": f'attachment; filename="profile-{time.strftime("%Y%m%d-%H%M%S")}.collapsed"',
+        "X-Profile-Samples": str(sampler.samples),
+    })
+
+
+@router.get("/memory")
+async def memory(
+    seconds: float = Query(10, gt=0, le=300),
+    group_by: Literal["lineno", "traceback", "filename"] = "lineno",
+    limit: int = Query(30, ge=1, le=500),
+):
+    """Места выделения памяти с наибольшим приростом за seconds секунд."""
+    _acquire()
+    try:
+        tracer = profiler.MemoryTracer()
+        await run_in_threadpool(tracer.start)
+        try:
+            await anyio.sleep(seconds)
+        finally:
+            diff = await run_in_threadpool(tracer.stop, group_by, limit)
+    finally:
+        profiler.profile_lock.release()
+    return diff
@@ -1,35 +1,52 @@
+from typing import Literal
 from sqlalchemy.orm import Session
 import models
 import schemas
-from fastapi import HTTPException, APIRouter, Depends
-from database import get_db
+from fastapi import HTTPException, APIRouter, Depends, Response
+from database import get_db, get_read_db
+from routers.pagination import Pagination
+from routers.loading import EMPLOYEE_OPTIONS, EMPLOYEE_EXPANSIONS
+from routers.timing import TimedRoute
+from routers.etag import ETag
+from services import versions
 
 router = APIRouter(
     prefix="/employees",
     tags=["employees"],
+    route_class=TimedRoute,
 )
 
+etag = ETag(*versions.TRACKED_TABLES)
 
-def get_employee_by_id(db: Session, employee_id: int):
+# Какие связи включать в ответ: none — только поля сотрудника,
+# business_trips — с поездками, business_trips.expenses — с поездками и расходами.
+Expand = Literal["none", "business_trips", "business_trips.expenses"]
+
+
+def get_employee_by_id(db: Session, employee_id: int, options=EMPLOYEE_OPTIONS):
     """Получает сотрудника по ID или выбрасывает исключение, если сотрудник не найден."""
-    employee = db.query(models.Employee).filter(
+    employee = db.query(models.Employee).options(*options).filter(
         models.Employee.id == employee_id).first()
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     return employee
 
 
-@router.get("/", response_model=list[schemas.Employee])
-def read_employees(db: Session = Depends(get_db)):
-    """Получает список всех сотрудников."""
-    employees = db.query(models.Employee).all()
-    return employees
+@router.get("/", response_model=None, responses={200: {"model": list[schemas.Employee]}}, dependencies=[Depends(etag)])
+def read_employees(response: Response, page: Pagination = Depends(),
+                   expand: Expand = "business_trips.expenses", db: Session = Depends(get_read_db)):
+    """Получает страницу списка сотрудников с указанной глубиной вложенности."""
+    options, schema = EMPLOYEE_EXPANSIONS[expand]
+    employees = page.apply(db.query(models.Employee).options(*options),
+                           models.Employee.id, response)
+    return [schema.model_validate(employee) for employee in employees]
 
 
-@router.get("/{employee_id}", response_model=schemas.Employee)
-def read_employee(employee_id: int, db: Session = Depends(get_db)):
+@router.get("/{employee_id}", response_model=None, responses={200: {"model": schemas.Employee}}, dependencies=[Depends(etag)])
+def read_employee(employee_id: int, expand: Expand = "business_trips.expenses", db: Session = Depends(get_read_db)):
     """Получает сотрудника по ID."""
-    return get_employee_by_id(db, employee_id)
+    options, schema = EMPLOYEE_EXPANSIONS[expand]
+    return schema.model_validate(get_employee_by_id(db, employee_id, options))
 
 
 @router.post("/", response_model=schemas.Employee)
@@ -0,0 +1,73 @@
+"""ETag и условные GET-запросы по версиям таблиц (services/versions.py).
+
+ETag ответа — хеш версий таблиц, из которых он строится. Версия читается
+в той же сессии и до основного запроса обработчика, поэтому ETag никогда
+не новее данных ответа. Если заголовок If-None-Match клиента совпадает с
+текущим ETag, зависимость отвечает 304 Not Modified до выполнения
+обработчика: запрос к данным и сериализация не выполняются.
+
+    @router.get("/", dependencies=[Depends(ETag("expense_types"))])
+
+Cache-Control: no-cache разрешает браузеру хранить ответ, но требует
+перепроверять его при каждом запросе.
+"""
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from database import get_async_read_db, get_read_db
+from services import versions
+
+
+def make_etag(connection: Connection, tables: Iterable[str]) -> str:
+    version = versions.data_version(connection, tables)
+    return '"' + hashlib.blake2b(version.encode(), digest_size=8).hexdigest() + '"'
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Для If-None-Match слабое сравнение: W/"x" совпадает с "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def check_etag(request: Request, etag: str) -> str:
+    """Отвечает 304, если у клиента уже есть ответ с этим ETag."""
+    if _matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=etag_headers(etag))
+    return etag
+
+
+class ETag:
+    """Зависимость GET-обработчика: ETag по версиям таблиц tables и ответ 304.
+
+    Заголовки добавляются к ответу, который FastAPI строит из возвращенного
+    значения; обработчики, возвращающие Response, передают их сами
+    (etag_headers) — значение зависимости равно ETag.
+    """
+
+    def __init__(self, *tables: str):
+        self.tables = tables
+
+    def __call__(self, request: Request, response: Response, db: Session = Depends(get_read_db)) -> str:
+        etag = check_etag(request, make_etag(db.connection(), self.tables))
+        response.headers.update(etag_headers(etag))
+        return etag
+
+
+class AsyncETag(ETag):
+    """ETag для асинхронных обработчиков (routers/aio)."""
+
+    async def __call__(self, request: Request, response: Response, db=Depends(get_async_read_db)) -> str:
+        etag = check_etag(request, await db.run_sync(lambda session: make_etag(session.connection(), self.tables)))
+        response.headers.update(etag_headers(etag))
+        return etag
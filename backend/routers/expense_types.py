@@ -1,24 +1,29 @@
 from sqlalchemy.orm import Session
 import models
 import schemas
-from fastapi import APIRouter, Depends, HTTPException
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response
+from database import get_db, get_read_db
+from routers.pagination import Pagination
+from routers.timing import TimedRoute
+from routers.etag import ETag
 
 router = APIRouter(
     prefix="/expense_types",
     tags=["expense_types"],
+    route_class=TimedRoute,
 )
 
+etag = ETag("expense_types")
 
-@router.get("/", response_model=list[schemas.ExpenseType])
-def read_expense_types(db: Session = Depends(get_db)):
-    """Получает список всех типов расходов."""
-    expense_types = db.query(models.ExpenseType).all()
-    return expense_types
 
+@router.get("/", response_model=list[schemas.ExpenseType], dependencies=[Depends(etag)])
+def read_expense_types(response: Response, page: Pagination = Depends(), db: Session = Depends(get_read_db)):
+    """Получает страницу списка типов расходов."""
+    return page.apply(db.query(models.ExpenseType), models.ExpenseType.id, response)
 
-@router.get("/{expense_type_id}", response_model=schemas.ExpenseType)
-def read_expense_type(expense_type_id: int, db: Session = Depends(get_db)):
+
+@router.get("/{expense_type_id}", response_model=schemas.ExpenseType, dependencies=[Depends(etag)])
+def read_expense_type(expense_type_id: int, db: Session = Depends(get_read_db)):
     """Получает тип расходов по ID."""
     db_expense_type = db.query(models.ExpenseType).filter(
         models.ExpenseType.id == expense_type_id).first()
@@ -1,27 +1,77 @@
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 import models
 import schemas
-from fastapi import APIRouter, Depends, HTTPException
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response
+from database import get_db, get_read_db
+from services import bulk
+from routers.pagination import Pagination
+from routers.loading import EXPENSE_OPTIONS
+from routers.timing import TimedRoute
+from routers.etag import ETag
 
 
 router = APIRouter(
     prefix="/expenses",
     tags=["expenses"],
+    route_class=TimedRoute,
 )
 
+etag = ETag("expenses", "expense_types", "business_trips")
 
-@router.get("/", response_model=list[schemas.Expense])
-def read_expenses(db: Session = Depends(get_db)):
-    """Получает список всех расходов."""
-    expenses = db.query(models.Expense).all()
-    return expenses
 
+@router.get("/", response_model=list[schemas.Expense], dependencies=[Depends(etag)])
+def read_expenses(
+    response: Response,
+    page: Pagination = Depends(),
+    business_trip_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    expense_type_id: Optional[int] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    db: Session = Depends(get_read_db),
+):
+    """Получает страницу списка расходов с фильтрами по поездке, сотруднику, типу и сумме."""
+    query = db.query(models.Expense).options(*EXPENSE_OPTIONS)
+    if business_trip_id is not None:
+        query = query.filter(models.Expense.business_trip_id == business_trip_id)
+    if employee_id is not None:
+        query = query.join(models.BusinessTrip).filter(
+            models.BusinessTrip.employee_id == employee_id)
+    if expense_type_id is not None:
+        query = query.filter(models.Expense.expense_type_id == expense_type_id)
+    if min_amount is not None:
+        query = query.filter(models.Expense.amount_cents >= models.to_cents(min_amount))
+    if max_amount is not None:
+        query = query.filter(models.Expense.amount_cents <= models.to_cents(max_amount))
+    return page.apply(query, models.Expense.id, response)
 
-@router.get("/{expense_id}", response_model=schemas.Expense)
-def read_expense(expense_id: int, db: Session = Depends(get_db)):
+
+@router.post("/bulk", response_model=list[schemas.BulkItemResult])
+def create_expenses_bulk(items: List[Dict[str, Any]], db: Session = Depends(get_db)):
+    """Создает пакет расходов одной транзакцией.
+
+    Каждый элемент проверяется схемой ExpenseCreate отдельно; ошибочные
+    элементы не вставляются и возвращаются с описанием ошибок.
+    """
+    rows, results = bulk.validate_items(items, schemas.ExpenseCreate)
+    ids = bulk.insert_expenses(db, rows)
+    db.commit()
+    return bulk.assign_ids(results, ids)
+
+
+@router.delete("/bulk", response_model=schemas.BulkDeleteResult)
+def delete_expenses_bulk(request: schemas.BulkDelete, db: Session = Depends(get_db)):
+    """Удаляет расходы по списку ID одной транзакцией."""
+    deleted = bulk.delete_expenses(db, request.ids)
+    db.commit()
+    return {"deleted": deleted, "not_found": sorted(set(request.ids) - set(deleted))}
+
+
+@router.get("/{expense_id}", response_model=schemas.Expense, dependencies=[Depends(etag)])
+def read_expense(expense_id: int, db: Session = Depends(get_read_db)):
     """Получает расход по ID."""
-    expense = db.query(models.Expense).filter(
+    expense = db.query(models.Expense).options(*EXPENSE_OPTIONS).filter(
         models.Expense.id == expense_id).first()
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
@@ -0,0 +1,41 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+import models
+from database import get_read_db
+from services import export
+from routers.timing import TimedRoute
+from routers.etag import check_etag, etag_headers, make_etag
+
+router = APIRouter(
+    prefix="/export",
+    tags=["export"],
+    route_class=TimedRoute,
+)
+
+TABLES = {
+    "expenses": models.Expense.__table__,
+    "business_trips": models.BusinessTrip.__table__,
+    "employees": models.Employee.__table__,
+    "expense_types": models.ExpenseType.__table__,
+}
+
+
+@router.get("/{resource}")
+def export_table(resource: Literal["expenses", "business_trips", "employees", "expense_types"],
+                 request: Request,
+                 format: Literal["csv", "ndjson", "parquet", "arrow"] = "csv",
+                 db: Session = Depends(get_read_db)):
+    """Выгружает все строки таблицы потоком в формате CSV, NDJSON, Parquet или Arrow."""
+    etag = check_etag(request, make_etag(db.connection(), [resource]))
+    try:
+        content = export.stream_table(db, TABLES[resource], format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    extension = "arrows" if format == "arrow" else format
+    return StreamingResponse(
+        content,
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment;filename={resource}.{extension}", **etag_headers(etag)},
+    )
@@ -0,0 +1,76 @@
+import queue
+from typing import Literal
+
+import anyio
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from database import get_db
+from services.importer import DEFAULT_BATCH_SIZE, ExpenseImporter, iter_lines, iter_records
+from routers.timing import TimedRoute
+
+router = APIRouter(
+    prefix="/import",
+    tags=["import"],
+    route_class=TimedRoute,
+)
+
+# Сколько фрагментов тела запроса может ждать обработки
+QUEUE_SIZE = 16
+
+
+class ChunkQueue:
+    """Ограниченная очередь фрагментов тела запроса между event loop и потоком."""
+
+    def __init__(self, maxsize: int = QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._finished = False
+
+    def put(self, chunk):
+        self._queue.put(chunk)
+
+    def __iter__(self):
+        while not self._finished:
+            chunk = self._queue.get()
+            if chunk is None:
+                self._finished = True
+            else:
+                yield chunk
+
+    def drain(self):
+        """Дочитывает очередь, чтобы отправитель не завис на переполненной очереди."""
+        for _ in self:
+            pass
+
+
+@router.post("/expenses")
+async def import_expenses(request: Request, format: Literal["csv", "ndjson"] = "csv",
+                          batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1), db: Session = Depends(get_db)):
+    """Импортирует расходы из тела запроса (CSV с заголовком или NDJSON).
+
+    Тело читается по мере поступления: фрагменты передаются через
+    ограниченную очередь в поток, который разбирает строки и пишет пакеты в БД.
+    """
+    chunks = ChunkQueue()
+    result = {}
+
+    async def receive():
+        try:
+            async for chunk in request.stream():
+                if chunk:
+                    await run_in_threadpool(chunks.put, chunk)
+        finally:
+            await run_in_threadpool(chunks.put, None)
+
+    def process():
+        importer = ExpenseImporter(db, batch_size=batch_size)
+        try:
+            result.update(importer.run(iter_records(iter_lines(chunks), format)))
+        finally:
+            chunks.drain()
+
+    async with anyio.create_task_group() as tasks:
+        tasks.start_soon(receive)
+        tasks.start_soon(run_in_threadpool, process)
+    return result
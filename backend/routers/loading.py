@@ -0,0 +1,36 @@
+from sqlalchemy.orm import joinedload, selectinload
+import models
+import schemas
+
+# Стратегии загрузки связей под вложенные схемы ответов (schemas.*).
+# Коллекции грузятся через selectinload (один запрос на уровень вложенности),
+# связи многие-к-одному — через joinedload в том же запросе.
+# Число SQL-запросов не зависит от количества строк.
+
+EXPENSE_OPTIONS = (
+    joinedload(models.Expense.expense_type),
+)
+
+BUSINESS_TRIP_OPTIONS = (
+    selectinload(models.BusinessTrip.expenses).joinedload(
+        models.Expense.expense_type),
+)
+
+EMPLOYEE_OPTIONS = (
+    selectinload(models.Employee.business_trips)
+    .selectinload(models.BusinessTrip.expenses)
+    .joinedload(models.Expense.expense_type),
+)
+
+# Варианты параметра expand: стратегии загрузки и схема ответа.
+# Для неразвернутых связей запрос не обращается к связанным таблицам вовсе.
+EMPLOYEE_EXPANSIONS = {
+    "none": ((), schemas.EmployeeShallow),
+    "business_trips": ((selectinload(models.Employee.business_trips),), schemas.EmployeeWithTrips),
+    "business_trips.expenses": (EMPLOYEE_OPTIONS, schemas.Employee),
+}
+
+BUSINESS_TRIP_EXPANSIONS = {
+    "none": ((), schemas.BusinessTripShallow),
+    "expenses": (BUSINESS_TRIP_OPTIONS, schemas.BusinessTrip),
+}
@@ -0,0 +1,38 @@
+from typing import Optional
+from fastapi import Query, Response
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class Pagination:
+    """Параметры курсорной пагинации по id (keyset).
+
+    Клиент передает after_id из заголовка X-Next-Cursor предыдущей страницы.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+        after_id: Optional[int] = Query(None, description="Курсор: id последней записи предыдущей страницы"),
+    ):
+        self.limit = limit
+        self.after_id = after_id
+
+    def apply(self, query, id_column, response: Response):
+        """Возвращает одну страницу запроса и выставляет заголовок X-Next-Cursor."""
+        if self.after_id is not None:
+            query = query.filter(id_column > self.after_id)
+        items = query.order_by(id_column).limit(self.limit).all()
+        if len(items) == self.limit:
+            response.headers["X-Next-Cursor"] = str(items[-1].id)
+        return items
+
+    async def apply_async(self, db, statement, id_column, response: Response):
+        """То же, что apply, для select() в асинхронной сессии."""
+        if self.after_id is not None:
+            statement = statement.where(id_column > self.after_id)
+        items = (await db.scalars(statement.order_by(id_column).limit(self.limit))).all()
+        if len(items) == self.limit:
+            response.headers["X-Next-Cursor"] = str(items[-1].id)
+        return items
@@ -0,0 +1,99 @@
+"""Замер времени запросов API: middleware и класс маршрута.
+
+TimingMiddleware добавляет к каждому ответу заголовок Server-Timing
+
+    Server-Timing: db;dur=12.4;desc="6 statements", handler;dur=15.0, serialize;dur=1.2, total;dur=17.9
+
+и после отправки ответа пишет замеры в гистограммы services.metrics по
+шаблону пути маршрута. Время handler и serialize известно только для
+маршрутов с route_class=TimedRoute. Заголовок отправляется вместе с началом
+ответа, поэтому запросы, выполненные при потоковой передаче тела (выгрузка,
+отчеты), попадают только в гистограммы.
+"""
+import functools
+import inspect
+import time
+
+from fastapi.routing import APIRoute
+
+from services import metrics
+
+
+def _timed(endpoint):
+    """Обертка обработчика, которая отмечает в замерах запроса время его выполнения."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timings = metrics.current()
+                if timings is not None:
+                    timings.record_handler(started)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                timings = metrics.current()
+                if timings is not None:
+                    timings.record_handler(started)
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """Маршрут, обработчик которого отдельно замеряется для Server-Timing и метрик."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _timed(endpoint), **kwargs)
+
+
+def _milliseconds(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
+
+
+def server_timing(timings: metrics.RequestTimings, response_started: float) -> str:
+    parts = [f'db;dur={_milliseconds(timings.db_seconds)};desc="{timings.sql_count} statements"']
+    if timings.handler_seconds is not None:
+        parts.append(f"handler;dur={_milliseconds(timings.handler_seconds)}")
+    serialization = timings.serialization_seconds(response_started)
+    if serialization is not None:
+        parts.append(f"serialize;dur={_milliseconds(serialization)}")
+    parts.append(f"total;dur={_milliseconds(response_started - timings.started)}")
+    return ", ".join(parts)
+
+
+class TimingMiddleware:
+    """ASGI middleware замеров запроса (Server-Timing и гистограммы метрик)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = metrics.start_request(scope)
+        state = {"status": 500, "response_started": None}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["response_started"] = time.perf_counter()
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(timings, state["response_started"]).encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            finished = time.perf_counter()
+            metrics.finish_request(token)
+            response_started = state["response_started"] or finished
+            metrics.observe(timings, state["status"], finished - timings.started,
+                            timings.serialization_seconds(response_started))
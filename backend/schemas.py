@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 
 # Schemas for ExpenseType
@@ -72,6 +72,13 @@ class BusinessTrip(BusinessTripBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Поездка без вложенных расходов
+class BusinessTripShallow(BusinessTripBase):
+    id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 # Schemas for Employee
 class EmployeeBase(BaseModel):
     fio: str
@@ -90,3 +97,78 @@ class Employee(EmployeeBase):
     business_trips: List[BusinessTrip] = []
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# Сотрудник без вложенных поездок
+class EmployeeShallow(EmployeeBase):
+    id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Сотрудник с поездками, но без расходов по ним
+class EmployeeWithTrips(EmployeeShallow):
+    business_trips: List[BusinessTripShallow] = []
+
+
+# Schemas for bulk operations
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    errors: Optional[List[Dict[str, Any]]] = None
+
+
+class BulkDelete(BaseModel):
+    ids: List[int]
+
+
+class BulkDeleteResult(BaseModel):
+    deleted: List[int]
+    not_found: List[int]
+
+
+# Schema for one line of an expense import file
+class ExpenseImportRow(BaseModel):
+    fio: str
+    destination: Optional[str] = None
+    start_trip: datetime
+    end_trip: datetime
+    expense_type: str
+    amount: float
+
+
+# Schemas for background report jobs
+class ReportJobCreate(BaseModel):
+    report_type: str
+    data_type: str
+
+
+class ReportJob(BaseModel):
+    id: str
+    report_type: str
+    data_type: str
+    status: str
+    error: Optional[str] = None
+    data_version: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
+
+
+# Schema for a closed analytics period (month)
+class ClosedPeriod(BaseModel):
+    period: date
+    closed_at: Optional[datetime] = None
+    total_expenses: float
+    expense_count: int
+    trip_count: int
+
+
+# Schema for a slow query log entry
+class SlowQuery(BaseModel):
+    time: datetime
+    duration_ms: float
+    route: Optional[str] = None
+    statement: str
+    parameters: Any = None
+    executemany: bool = False
+    plan: Optional[str] = None
@@ -1,26 +1,46 @@
 from sqlalchemy.orm import Session
-from . import service_analytics
+from . import period_summaries, periods, rollups
+from .cache import analytics_cache
 from .report_factory import ReportFactory
 
+DATA_TYPES = (
+    "total_expenses",
+    "expenses_by_employee",
+    "expenses_by_expense_type",
+    "employees_with_most_trips",
+    "most_popular_destinations",
+    "average_expense_per_trip",
+    "all",
+)
+
 
 class AnalyticsFacade:
-    def __init__(self, db: Session, report_factory: ReportFactory = None):
+    def __init__(self, db: Session, report_factory: ReportFactory = None, source=rollups):
         self.db = db
         self.report_factory = report_factory
+        # Модуль с функцией get_analytics_snapshot: rollups читает агрегированные
+        # таблицы, service_analytics считает по исходным строкам.
+        self.source = source
+
+    def get_all_analytics_data(self, date_from=None, date_to=None):
+        """Получить всю аналитику из источника данных фасада.
 
-    def get_all_analytics_data(self):
-        """Получить всю аналитику, используя сервисные функции."""
-        total_expenses = service_analytics.get_total_expenses(self.db)
-        expenses_by_employee = service_analytics.get_expenses_by_employee(
-            self.db)
-        expenses_by_expense_type = service_analytics.get_expenses_by_expense_type(
-            self.db)
-        employees_with_most_trips = service_analytics.get_employees_with_most_trips(
-            self.db)
-        most_popular_destinations = service_analytics.get_most_popular_destinations(
-            self.db)
-        average_expense_per_trip = service_analytics.get_average_expense_per_trip(
-            self.db)
+        Агрегированные таблицы хранят итоги за все время, поэтому аналитика
+        за период (date_from, date_to) собирается из итогов закрытых месяцев
+        и исходных строк за остальные дни.
+        """
+        if periods.is_set(date_from, date_to):
+            snapshot = analytics_cache.call(
+                period_summaries.get_analytics_snapshot, self.db, date_from=date_from, date_to=date_to)
+        else:
+            snapshot = analytics_cache.call(
+                self.source.get_analytics_snapshot, self.db)
+        total_expenses = snapshot["total_expenses"]
+        expenses_by_employee = snapshot["expenses_by_employee"]
+        expenses_by_expense_type = snapshot["expenses_by_expense_type"]
+        employees_with_most_trips = snapshot["employees_with_most_trips"]
+        most_popular_destinations = snapshot["most_popular_destinations"]
+        average_expense_per_trip = snapshot["average_expense_per_trip"]
 
         average_expense_per_trip = f"{average_expense_per_trip:.2f}"
 
@@ -33,11 +53,8 @@ class AnalyticsFacade:
             "average_expense_per_trip": average_expense_per_trip,
         }
 
-    def generate_report(self, data_type: str):
-        """Генерирует отчет указанного типа на основе аналитических данных."""
-        if self.report_factory is None:
-            raise ValueError("Report factory is not set")
-
+    def get_report_data(self, data_type: str):
+        """Выбирает из аналитики данные для отчета указанного типа."""
         analytics_data = self.get_all_analytics_data()
         report_data = {}
 
@@ -62,6 +79,25 @@ class AnalyticsFacade:
             report_data = analytics_data
         else:
             raise ValueError(f"Invalid data type: {data_type}")
+        return report_data
 
+    def generate_report(self, data_type: str):
+        """Генерирует отчет указанного типа на основе аналитических данных."""
+        if self.report_factory is None:
+            raise ValueError("Report factory is not set")
+
+        report_data = self.get_report_data(data_type)
         report = self.report_factory.create_report()
         return report.generate(report_data)
+
+    def stream_report(self, data_type: str):
+        """Возвращает генератор частей отчета указанного типа.
+
+        Данные и тип проверяются сразу, до начала передачи отчета.
+        """
+        if self.report_factory is None:
+            raise ValueError("Report factory is not set")
+
+        report_data = self.get_report_data(data_type)
+        report = self.report_factory.create_report()
+        return report.stream(report_data)
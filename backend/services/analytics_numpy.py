@@ -0,0 +1,70 @@
+import numpy as np
+from sqlalchemy.orm import Session
+from models import Employee, BusinessTrip, Expense, ExpenseType
+from . import periods
+
+# Суммы считаются над int64-массивами копеек (точно) и переводятся в рубли в конце.
+
+
+def _in_period(query, date_from=None, date_to=None, join_trips=False):
+    if join_trips and periods.is_set(date_from, date_to):
+        query = query.join(BusinessTrip, BusinessTrip.id == Expense.business_trip_id)
+    return periods.filter_query(query, BusinessTrip.start_trip, date_from, date_to)
+
+
+def get_total_expenses(db: Session, date_from=None, date_to=None):
+    """Получить общую сумму всех расходов с использованием NumPy."""
+    expenses = _in_period(db.query(Expense.amount_cents), date_from, date_to, join_trips=True).all()
+    expenses_array = np.array([expense[0]
+                              for expense in expenses], dtype=np.int64)
+    return int(np.sum(expenses_array)) / 100
+
+
+def _sum_by_key(rows):
+    """Суммирует копейки по ключу: rows — список пар (ключ, копейки).
+
+    Возвращает пары (ключ, сумма в рублях).
+    """
+    if not rows:
+        return []
+    keys = np.array([row[0] for row in rows], dtype=object)
+    cents = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    # np.bincount суммирует веса во float64; reduceat по отсортированным ключам остается в int64
+    order = np.argsort(inverse, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(inverse[order]) != 0])
+    totals = np.add.reduceat(cents[order], starts)
+    return [(key, int(total) / 100) for key, total in zip(unique_keys.tolist(), totals.tolist())]
+
+
+def get_expenses_by_employee(db: Session, date_from=None, date_to=None):
+    """Получить общую сумму расходов для каждого сотрудника с использованием NumPy."""
+    query = _in_period(
+        db.query(Employee.fio, Expense.amount_cents)
+        .join(BusinessTrip, Employee.id == BusinessTrip.employee_id)
+        .join(Expense, BusinessTrip.id == Expense.business_trip_id),
+        date_from, date_to,
+    ).all()
+    return _sum_by_key(query)
+
+
+def get_expenses_by_expense_type(db: Session, date_from=None, date_to=None):
+    """Получить общую сумму расходов по типам расходов с использованием NumPy."""
+    query = _in_period(
+        db.query(ExpenseType.name, Expense.amount_cents)
+        .join(Expense, ExpenseType.id == Expense.expense_type_id),
+        date_from, date_to, join_trips=True,
+    ).all()
+    return _sum_by_key(query)
+
+
+def get_average_expense_per_trip(db: Session, date_from=None, date_to=None):
+    """Получить среднюю сумму расходов на одну командировку с использованием NumPy."""
+    query = _in_period(
+        db.query(BusinessTrip.id, Expense.amount_cents)
+        .join(Expense, BusinessTrip.id == Expense.business_trip_id),
+        date_from, date_to,
+    ).all()
+    trip_expenses = [total for _, total in _sum_by_key(query)]
+    return float(np.mean(trip_expenses)) if trip_expenses else 0.0
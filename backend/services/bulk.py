@@ -0,0 +1,154 @@
+"""Массовые операции с расходами и командировками.
+
+Строки вставляются и удаляются одним executemany в рамках одной транзакции,
+минуя unit of work. Поэтому агрегаты аналитики, версии данных и кэш обновляются,
+а запрет изменений в закрытых периодах проверяется здесь явно.
+"""
+from typing import Any, Dict, Iterable, List, Tuple
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+from . import cache, period_summaries, rollups, versions
+
+
+def validate_items(items: List[Dict[str, Any]], schema: type[BaseModel]) -> Tuple[List[Dict[str, Any]], List[schemas.BulkItemResult]]:
+    """Проверяет каждый элемент схемой по отдельности.
+
+    Возвращает строки для вставки (только корректные элементы) и результаты
+    по всем элементам; у ошибочных заполнено поле errors.
+    """
+    errors = {}
+    try:
+        # Быстрый путь: весь пакет проверяется одним вызовом pydantic-core
+        validated = TypeAdapter(List[schema]).validate_python(items)
+    except ValidationError as e:
+        for error in e.errors(include_url=False, include_context=False):
+            index, *loc = error["loc"]
+            errors.setdefault(index, []).append(dict(error, loc=tuple(loc)))
+        validated = [schema.model_validate(item)
+                   for index, item in enumerate(items) if index not in errors]
+
+    rows = [model.model_dump() for model in validated]
+    results = [schemas.BulkItemResult(index=index, errors=errors.get(index))
+               for index in range(len(items))]
+    return rows, results
+
+
+def assign_ids(results: List[schemas.BulkItemResult], ids: List[int]):
+    """Проставляет id вставленных строк в результаты корректных элементов."""
+    valid = (result for result in results if result.errors is None)
+    for result, row_id in zip(valid, ids):
+        result.id = row_id
+    return results
+
+
+def insert_rows(db: Session, model, rows: List[Dict[str, Any]]) -> List[int]:
+    """Вставляет строки одним executemany и возвращает их id в порядке строк."""
+    if not rows:
+        return []
+    connection = db.connection()
+    table = model.__table__
+    versions.bump(connection, [table.name])
+    if connection.dialect.name == "sqlite":
+        # Транзакция SQLite держит блокировку записи, поэтому строки одного
+        # executemany получают подряд идущие rowid; RETURNING в разы медленнее.
+        connection.execute(insert(table), rows)
+        last_id = connection.exec_driver_sql("SELECT last_insert_rowid()").scalar()
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+    return list(connection.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True), rows).scalars())
+
+
+def insert_expenses(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """Вставляет расходы и возвращает их id в порядке строк. Не выполняет commit."""
+    if not rows:
+        return []
+    # Схемы принимают сумму в рублях, в таблице она хранится в копейках
+    rows = [dict(row) for row in rows]
+    for row in rows:
+        if "amount" in row:
+            row["amount_cents"] = models.to_cents(row["amount"])
+            del row["amount"]
+    period_summaries.check_open(db.connection(), trip_ids={row["business_trip_id"] for row in rows})
+    ids = insert_rows(db, models.Expense, rows)
+    rollups.refresh(
+        db.connection(),
+        trip_ids={row["business_trip_id"] for row in rows},
+        expense_type_ids={row["expense_type_id"] for row in rows},
+    )
+    cache.mark_dirty(db)
+    return ids
+
+
+def insert_business_trips(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """Вставляет командировки и возвращает их id в порядке строк. Не выполняет commit."""
+    if not rows:
+        return []
+    period_summaries.check_open(db.connection(), dates=[row["start_trip"] for row in rows])
+    ids = insert_rows(db, models.BusinessTrip, rows)
+    rollups.refresh(
+        db.connection(),
+        employee_ids={row["employee_id"] for row in rows},
+        destinations={row.get("destination") for row in rows},
+    )
+    cache.mark_dirty(db)
+    return ids
+
+
+def delete_expenses(db: Session, ids: Iterable[int]) -> List[int]:
+    """Удаляет расходы по id и возвращает id действительно удаленных строк."""
+    trip_ids, type_ids, deleted = set(), set(), []
+    for chunk in rollups.chunks(set(ids)):
+        for expense_id, trip_id, type_id in db.execute(
+                select(models.Expense.id, models.Expense.business_trip_id, models.Expense.expense_type_id)
+                .where(models.Expense.id.in_(chunk))):
+            deleted.append(expense_id)
+            trip_ids.add(trip_id)
+            type_ids.add(type_id)
+        db.execute(delete(models.Expense).where(models.Expense.id.in_(chunk)),
+                   execution_options={"synchronize_session": False})
+    if deleted:
+        # Командировки удаленных расходов еще существуют; при ошибке транзакция откатывается
+        period_summaries.check_open(db.connection(), trip_ids=trip_ids)
+        rollups.refresh(db.connection(), trip_ids=trip_ids, expense_type_ids=type_ids)
+        versions.bump(db.connection(), ["expenses"])
+        cache.mark_dirty(db)
+    return sorted(deleted)
+
+
+def delete_business_trips(db: Session, ids: Iterable[int]) -> List[int]:
+    """Удаляет командировки вместе с их расходами и возвращает id удаленных командировок."""
+    employee_ids, destinations, type_ids, deleted = set(), set(), set(), []
+    for chunk in rollups.chunks(set(ids)):
+        found, start_dates = [], []
+        for trip_id, employee_id, destination, start_trip in db.execute(
+                select(models.BusinessTrip.id, models.BusinessTrip.employee_id,
+                       models.BusinessTrip.destination, models.BusinessTrip.start_trip)
+                .where(models.BusinessTrip.id.in_(chunk))):
+            found.append(trip_id)
+            employee_ids.add(employee_id)
+            destinations.add(destination)
+            start_dates.append(start_trip)
+        if not found:
+            continue
+        period_summaries.check_open(db.connection(), dates=start_dates)
+        # Только расходы найденных командировок: агрегаты пересчитываются по ним
+        type_ids.update(db.scalars(
+            select(models.Expense.expense_type_id).distinct()
+            .where(models.Expense.business_trip_id.in_(found))))
+        # Каскад delete-orphan из моделей здесь не срабатывает, удаляем расходы сами
+        db.execute(delete(models.Expense).where(models.Expense.business_trip_id.in_(found)),
+                   execution_options={"synchronize_session": False})
+        db.execute(delete(models.BusinessTrip).where(models.BusinessTrip.id.in_(found)),
+                   execution_options={"synchronize_session": False})
+        deleted.extend(found)
+    if deleted:
+        rollups.refresh(db.connection(), trip_ids=deleted, employee_ids=employee_ids,
+                        expense_type_ids=type_ids, destinations=destinations)
+        versions.bump(db.connection(), ["business_trips", "expenses"])
+        cache.mark_dirty(db)
+    return sorted(deleted)
@@ -0,0 +1,141 @@
+"""Кэш результатов аналитики.
+
+Результаты функций аналитики хранятся с ограничением по времени жизни (TTL)
+и по количеству записей (вытесняется давно не использованная запись).
+Кэш полностью сбрасывается после commit любой сессии, в которой менялись
+Expense, BusinessTrip, Employee или ExpenseType.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import BusinessTrip, Employee, Expense, ExpenseType
+
+TRACKED_MODELS = (Expense, BusinessTrip, Employee, ExpenseType)
+
+
+class TTLCache:
+    """Потокобезопасный LRU-кэш с временем жизни записей."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Увеличивается при каждом сбросе: результат, посчитанный до сброса,
+        # не должен попасть в кэш после него.
+        self._generation = 0
+
+    def get(self, key):
+        """Возвращает (True, значение) при попадании, иначе (False, None)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def call(self, func, db: Session, *args, **kwargs):
+        """Вызывает func(db, *args, **kwargs) или возвращает сохраненный результат.
+
+        Ключ — функция, ее параметры и база данных, к которой привязана сессия.
+        """
+        key = self._key(func, db, args, kwargs)
+        generation = self._generation
+        found, value = self.get(key)
+        if found:
+            return value
+        value = func(db, *args, **kwargs)
+        self.set(key, value, generation)
+        return value
+
+    async def call_async(self, func, db, *args, **kwargs):
+        """То же, что call, для AsyncSession: при промахе func выполняется
+        с синхронной сессией через db.run_sync."""
+        key = self._key(func, db, args, kwargs)
+        generation = self._generation
+        found, value = self.get(key)
+        if found:
+            return value
+        value = await db.run_sync(func, *args, **kwargs)
+        self.set(key, value, generation)
+        return value
+
+    @staticmethod
+    def _key(func, db, args, kwargs):
+        return (func.__module__, func.__qualname__, str(db.get_bind().url),
+                args, tuple(sorted(kwargs.items())))
+
+
+analytics_cache = TTLCache(
+    maxsize=int(os.getenv("ANALYTICS_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("ANALYTICS_CACHE_TTL", "60")),
+)
+
+
+def mark_dirty(session: Session):
+    """Отмечает, что в сессии менялись данные аналитики.
+
+    Нужен для операций в обход unit of work (массовые вставки и т.п.).
+    """
+    session.info["analytics_cache_dirty"] = True
+
+
+@event.listens_for(Session, "before_flush")
+def _track_changes(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, TRACKED_MODELS):
+            mark_dirty(session)
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate(session):
+    if session.info.pop("analytics_cache_dirty", False):
+        analytics_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("analytics_cache_dirty", None)
@@ -0,0 +1,179 @@
+"""Потоковый импорт истории расходов из CSV или NDJSON.
+
+Каждая строка файла — один расход:
+
+    fio,destination,start_trip,end_trip,expense_type,amount
+
+Сотрудники и типы расходов сопоставляются по ФИО и названию через словари
+в памяти, командировки — по (сотрудник, направление, начало, окончание).
+Недостающие записи создаются. Строки обрабатываются пакетами, каждый пакет
+фиксируется отдельной транзакцией, поэтому файл целиком в памяти не хранится.
+Строки с командировками в закрытых периодах отклоняются.
+"""
+import codecs
+import csv
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+from . import bulk, period_summaries, rollups
+
+FORMATS = ("csv", "ndjson")
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_REJECTS = 100
+
+
+def iter_lines(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """Декодирует поток байтов и отдает его построчно (с символом перевода строки)."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    tail = ""
+    for chunk in chunks:
+        text = tail + decoder.decode(chunk)
+        lines = text.splitlines(keepends=True)
+        tail = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        yield from lines
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Any]:
+    """Разбирает строки файла в записи-словари (для NDJSON — любые JSON-значения)."""
+    if fmt == "csv":
+        yield from csv.DictReader(lines)
+    elif fmt == "ndjson":
+        for line in lines:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield ValueError(f"Invalid JSON: {e.msg}")
+    else:
+        raise ValueError(f"Invalid import format: {fmt}")
+
+
+class ExpenseImporter:
+    """Импортирует записи пакетами, создавая недостающих сотрудников,
+    типы расходов и командировки."""
+
+    def __init__(self, db: Session, batch_size: int = DEFAULT_BATCH_SIZE,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.db = db
+        self.batch_size = batch_size
+        self.progress = progress
+        self.employees = dict(db.execute(select(models.Employee.fio, models.Employee.id)).all())
+        self.expense_types = dict(db.execute(
+            select(models.ExpenseType.name, models.ExpenseType.id)).all())
+        self.trips: Dict[tuple, int] = {}
+        # Сотрудники, чьи существующие командировки уже загружены в self.trips
+        self.loaded_employees = set()
+        self.closed_periods = set(period_summaries.closed_periods(db.connection()))
+        self.batch: List[schemas.ExpenseImportRow] = []
+        self.stats = {
+            "processed": 0,
+            "imported": 0,
+            "rejected": 0,
+            "employees_created": 0,
+            "expense_types_created": 0,
+            "business_trips_created": 0,
+        }
+        self.rejects: List[Dict[str, Any]] = []
+
+    def run(self, records: Iterable[Any]) -> Dict[str, Any]:
+        """Импортирует все записи и возвращает итоговую сводку."""
+        for record in records:
+            self.add(record)
+        return self.finish()
+
+    def add(self, record: Any):
+        self.stats["processed"] += 1
+        record_number = self.stats["processed"]
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if isinstance(record, dict):
+                # Пустые ячейки CSV считаются отсутствующими значениями
+                record = {key: value for key, value in record.items() if value != ""}
+            row = schemas.ExpenseImportRow.model_validate(record)
+            month = period_summaries.month_start(row.start_trip)
+            if month in self.closed_periods:
+                raise period_summaries.ClosedPeriodError(month)
+            self.batch.append(row)
+        except (ValidationError, ValueError) as e:
+            self._reject(record_number, e)
+            return
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def finish(self) -> Dict[str, Any]:
+        self.flush()
+        return dict(self.stats, rejects=self.rejects)
+
+    def _reject(self, record_number: int, error: Exception):
+        self.stats["rejected"] += 1
+        if len(self.rejects) < MAX_REPORTED_REJECTS:
+            if isinstance(error, ValidationError):
+                message = "; ".join(
+                    f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors())
+            else:
+                message = str(error)
+            self.rejects.append({"record": record_number, "error": message})
+
+    def flush(self):
+        """Записывает накопленный пакет одной транзакцией."""
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+
+        new_fios = list(dict.fromkeys(row.fio for row in batch if row.fio not in self.employees))
+        ids = bulk.insert_rows(self.db, models.Employee, [{"fio": fio} for fio in new_fios])
+        self.employees.update(zip(new_fios, ids))
+        self.loaded_employees.update(ids)
+        self.stats["employees_created"] += len(new_fios)
+
+        new_types = list(dict.fromkeys(
+            row.expense_type for row in batch if row.expense_type not in self.expense_types))
+        ids = bulk.insert_rows(self.db, models.ExpenseType, [{"name": name} for name in new_types])
+        self.expense_types.update(zip(new_types, ids))
+        self.stats["expense_types_created"] += len(new_types)
+
+        def trip_key(row):
+            return (self.employees[row.fio], row.destination, row.start_trip, row.end_trip)
+
+        missing = list(dict.fromkeys(trip_key(row) for row in batch if trip_key(row) not in self.trips))
+        self._load_existing_trips({key[0] for key in missing})
+        new_trips = [key for key in missing if key not in self.trips]
+        ids = bulk.insert_business_trips(self.db, [
+            {"employee_id": employee_id, "destination": destination,
+             "start_trip": start_trip, "end_trip": end_trip}
+            for employee_id, destination, start_trip, end_trip in new_trips])
+        self.trips.update(zip(new_trips, ids))
+        self.stats["business_trips_created"] += len(new_trips)
+
+        bulk.insert_expenses(self.db, [
+            {"business_trip_id": self.trips[trip_key(row)],
+             "expense_type_id": self.expense_types[row.expense_type],
+             "amount": row.amount}
+            for row in batch])
+        self.db.commit()
+        self.stats["imported"] += len(batch)
+        if self.progress:
+            self.progress(dict(self.stats))
+
+    def _load_existing_trips(self, employee_ids):
+        """Загружает командировки, существовавшие в БД до импорта, один раз на сотрудника."""
+        employee_ids = set(employee_ids) - self.loaded_employees
+        for chunk in rollups.chunks(employee_ids):
+            for trip in self.db.execute(
+                    select(models.BusinessTrip.id, models.BusinessTrip.employee_id,
+                           models.BusinessTrip.destination, models.BusinessTrip.start_trip,
+                           models.BusinessTrip.end_trip)
+                    .where(models.BusinessTrip.employee_id.in_(chunk))):
+                key = (trip.employee_id, trip.destination, trip.start_trip, trip.end_trip)
+                self.trips.setdefault(key, trip.id)
+        self.loaded_employees.update(employee_ids)
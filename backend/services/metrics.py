@@ -0,0 +1,172 @@
+"""Метрики запросов API: число SQL-запросов, время в базе, обработчике и сериализации.
+
+Замеры текущего запроса хранятся в contextvar: middleware (routers.timing)
+создает их в начале запроса, обработчики событий движка (database.instrument_engine)
+добавляют время каждого SQL-запроса. Синхронные обработчики выполняются в пуле
+потоков с копией контекста, поэтому видят тот же объект замеров. Запросы из
+фоновых потоков (отчеты) ни к какому запросу API не относятся и не учитываются.
+
+По завершении запроса замеры попадают в гистограммы по методу и шаблону пути,
+которые отдаются в текстовом формате Prometheus (GET /metrics).
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+# Границы корзин гистограмм времени, секунды
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+# Метка маршрута для запросов, не попавших ни в один маршрут
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestTimings:
+    """Замеры одного запроса API."""
+
+    def __init__(self, scope: Optional[dict] = None):
+        # Маршрутизатор дополняет тот же словарь scope найденным маршрутом
+        self.scope = scope or {}
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.db_seconds = 0.0
+        self.handler_seconds: Optional[float] = None
+        # Момент возврата из обработчика: дальше идет сериализация ответа
+        self.handler_finished: Optional[float] = None
+
+    @property
+    def method(self) -> str:
+        return self.scope.get("method", "")
+
+    @property
+    def route(self) -> str:
+        """Шаблон пути маршрута запроса, например /employees/{employee_id}."""
+        return getattr(self.scope.get("route"), "path", UNMATCHED_ROUTE)
+
+    def record_handler(self, started: float):
+        self.handler_finished = time.perf_counter()
+        self.handler_seconds = self.handler_finished - started
+
+    def serialization_seconds(self, response_started: float) -> Optional[float]:
+        if self.handler_finished is None:
+            return None
+        return response_started - self.handler_finished
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request(scope: Optional[dict] = None) -> Tuple[RequestTimings, object]:
+    """Создает замеры запроса; токен передается в finish_request."""
+    timings = RequestTimings(scope)
+    return timings, _current.set(timings)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record_query(seconds: float):
+    """Учитывает выполненный SQL-запрос в замерах текущего запроса API."""
+    timings = _current.get()
+    if timings is not None:
+        timings.sql_count += 1
+        timings.db_seconds += seconds
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Гистограмма Prometheus с набором меток."""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Значения меток -> (счетчики корзин без +Inf, сумма, количество)
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for label_values, (counts, total, count) in series:
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{{{prefix}le="{_format_number(bound)}"}} {cumulative}'
+            yield f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}'
+            yield f"{self.name}_sum{{{labels}}} {_format_number(total)}"
+            yield f"{self.name}_count{{{labels}}} {count}"
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Время обработки запроса API до отправки ответа.",
+    ("method", "route", "status"), SECONDS_BUCKETS)
+HANDLER_DURATION = Histogram(
+    "http_request_handler_seconds", "Время выполнения функции обработчика.",
+    ("method", "route"), SECONDS_BUCKETS)
+SERIALIZATION_DURATION = Histogram(
+    "http_request_serialization_seconds", "Время от возврата из обработчика до начала ответа.",
+    ("method", "route"), SECONDS_BUCKETS)
+DB_DURATION = Histogram(
+    "http_request_db_seconds", "Суммарное время SQL-запросов за запрос API.",
+    ("method", "route"), SECONDS_BUCKETS)
+SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "Число SQL-запросов за запрос API.",
+    ("method", "route"), COUNT_BUCKETS)
+
+HISTOGRAMS = (REQUEST_DURATION, HANDLER_DURATION, SERIALIZATION_DURATION, DB_DURATION, SQL_STATEMENTS)
+
+
+def observe(timings: RequestTimings, status: int, duration: float, serialization: Optional[float]):
+    """Добавляет замеры завершенного запроса в гистограммы."""
+    method, route = timings.method, timings.route
+    REQUEST_DURATION.observe(duration, method, route, str(status))
+    DB_DURATION.observe(timings.db_seconds, method, route)
+    SQL_STATEMENTS.observe(timings.sql_count, method, route)
+    if timings.handler_seconds is not None:
+        HANDLER_DURATION.observe(timings.handler_seconds, method, route)
+    if serialization is not None:
+        SERIALIZATION_DURATION.observe(serialization, method, route)
+
+
+def render() -> str:
+    """Все гистограммы в текстовом формате Prometheus."""
+    return "\n".join(line for histogram in HISTOGRAMS for line in histogram.render()) + "\n"
+
+
+def reset():
+    for histogram in HISTOGRAMS:
+        histogram.clear()
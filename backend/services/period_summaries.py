@@ -0,0 +1,491 @@
+"""Итоги закрытых периодов (месяцев по дате начала командировки).
+
+Закрытие месяца один раз считает его итоги по сотрудникам, типам расходов
+и направлениям и сохраняет их (closed_periods и period_*_totals). После
+этого аналитика за любой диапазон дат складывает сохраненные итоги
+закрытых месяцев, целиком попавших в диапазон, с запросом по исходным
+строкам только за остальные дни — обычно за текущий открытый месяц.
+
+Итоги закрытого месяца не меняются: добавление, изменение и удаление
+расходов и командировок этого месяца (в том числе каскадом при удалении
+сотрудника или типа расхода) отклоняется с ClosedPeriodError. Чтобы
+внести правку, месяц открывают (reopen), а после правки закрывают снова;
+rebuild пересчитывает итоги закрытого месяца заново.
+
+    python -m services.period_summaries close-completed
+    python -m services.period_summaries close|reopen|rebuild YYYY-MM
+    python -m services.period_summaries check
+"""
+import sys
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, event, func, insert, inspect, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from models import (
+    BusinessTrip,
+    ClosedPeriod,
+    Employee,
+    Expense,
+    ExpenseType,
+    PeriodDestinationTotal,
+    PeriodEmployeeTotal,
+    PeriodExpenseTypeTotal,
+)
+from . import periods, rollups, service_analytics, versions
+
+
+class ClosedPeriodError(ValueError):
+    """Попытка изменить данные закрытого периода."""
+
+    def __init__(self, period: date):
+        super().__init__(f"Period {period:%Y-%m} is closed, reopen it before changing its data")
+        self.period = period
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def parse_period(value: str) -> date:
+    """Разбирает период в формате YYYY-MM."""
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise ValueError(f"Invalid period: {value}, expected YYYY-MM") from None
+
+
+def _lock_periods(connection: Connection, mode: str):
+    """Блокирует closed_periods на PostgreSQL до конца транзакции.
+
+    Закрытие берет SHARE ROW EXCLUSIVE, изменения строк — ROW EXCLUSIVE
+    перед проверкой check_open: закрытие ждет завершения уже проверенных
+    изменений, а новые изменения ждут закрытия и видят закрытый месяц.
+    В SQLite запись и так сериализована блокировкой базы.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"LOCK TABLE {ClosedPeriod.__tablename__} IN {mode} MODE")
+
+
+def _in_month(month: date):
+    return [BusinessTrip.start_trip >= datetime.combine(month, datetime.min.time()),
+            BusinessTrip.start_trip < datetime.combine(next_month(month), datetime.min.time())]
+
+
+def closed_periods(connection: Connection) -> List[date]:
+    return list(connection.scalars(select(ClosedPeriod.period).order_by(ClosedPeriod.period)))
+
+
+# --- Закрытие и открытие периодов ---
+
+def compute(connection: Connection, month: date) -> Dict[str, dict]:
+    """Итоги месяца month по исходным строкам в виде словарей по ключам групп."""
+    in_month = _in_month(month)
+    employees = {
+        employee_id: [0, 0, trip_count]
+        for employee_id, trip_count in connection.execute(
+            select(BusinessTrip.employee_id, func.count(BusinessTrip.id))
+            .where(*in_month, BusinessTrip.employee_id.isnot(None))
+            .group_by(BusinessTrip.employee_id))
+    }
+    for employee_id, total, count in connection.execute(
+            select(BusinessTrip.employee_id, func.sum(Expense.amount_cents), func.count(Expense.id))
+            .join(Expense, Expense.business_trip_id == BusinessTrip.id)
+            .where(*in_month, BusinessTrip.employee_id.isnot(None))
+            .group_by(BusinessTrip.employee_id)):
+        employees[employee_id][:2] = [int(total), count]
+    expense_types = {
+        expense_type_id: (int(total), count)
+        for expense_type_id, total, count in connection.execute(
+            select(Expense.expense_type_id, func.sum(Expense.amount_cents), func.count(Expense.id))
+            .join(BusinessTrip, BusinessTrip.id == Expense.business_trip_id)
+            .where(*in_month, Expense.expense_type_id.isnot(None))
+            .group_by(Expense.expense_type_id))
+    }
+    destinations = dict(connection.execute(
+        select(BusinessTrip.destination, func.count(BusinessTrip.id))
+        .where(*in_month).group_by(BusinessTrip.destination)).all())
+    total, expense_count, expensed_trip_count = connection.execute(
+        select(func.coalesce(func.sum(Expense.amount_cents), 0), func.count(Expense.id),
+               func.count(func.distinct(Expense.business_trip_id)))
+        .join(BusinessTrip, BusinessTrip.id == Expense.business_trip_id)
+        .where(*in_month)).one()
+    return {
+        "summary": {"total_cents": int(total), "expense_count": expense_count,
+                    "trip_count": sum(destinations.values()),
+                    "expensed_trip_count": expensed_trip_count},
+        "employees": {key: tuple(value) for key, value in employees.items()},
+        "expense_types": expense_types,
+        "destinations": destinations,
+    }
+
+
+def close_period(connection: Connection, month: date, today: Optional[date] = None) -> dict:
+    """Закрывает месяц month и сохраняет его итоги.
+
+    Текущий и будущие месяцы закрыть нельзя, как и уже закрытый: в этих
+    случаях возбуждается ValueError.
+    """
+    month = month_start(month)
+    if month >= month_start(today or date.today()):
+        raise ValueError(f"Period {month:%Y-%m} is not over yet")
+    _lock_periods(connection, "SHARE ROW EXCLUSIVE")
+    if connection.scalar(select(ClosedPeriod.period).where(ClosedPeriod.period == month)):
+        raise ValueError(f"Period {month:%Y-%m} is already closed")
+    totals = compute(connection, month)
+    connection.execute(insert(ClosedPeriod), [dict(
+        totals["summary"], period=month, closed_at=datetime.now())])
+    if totals["employees"]:
+        connection.execute(insert(PeriodEmployeeTotal), [
+            {"period": month, "employee_id": key, "total_cents": total,
+             "expense_count": count, "trip_count": trip_count}
+            for key, (total, count, trip_count) in totals["employees"].items()])
+    if totals["expense_types"]:
+        connection.execute(insert(PeriodExpenseTypeTotal), [
+            {"period": month, "expense_type_id": key, "total_cents": total, "expense_count": count}
+            for key, (total, count) in totals["expense_types"].items()])
+    if totals["destinations"]:
+        connection.execute(insert(PeriodDestinationTotal), [
+            {"period": month, "destination": key, "trip_count": count}
+            for key, count in totals["destinations"].items()])
+    versions.bump(connection, [ClosedPeriod.__tablename__])
+    return dict(totals["summary"], period=month)
+
+
+def reopen_period(connection: Connection, month: date) -> bool:
+    """Открывает месяц month: удаляет его сохраненные итоги. Возвращает False,
+    если месяц не был закрыт."""
+    month = month_start(month)
+    for model in (PeriodEmployeeTotal, PeriodExpenseTypeTotal, PeriodDestinationTotal):
+        connection.execute(delete(model).where(model.period == month))
+    if not connection.execute(delete(ClosedPeriod).where(ClosedPeriod.period == month)).rowcount:
+        return False
+    versions.bump(connection, [ClosedPeriod.__tablename__])
+    return True
+
+
+def rebuild_period(connection: Connection, month: date, today: Optional[date] = None) -> dict:
+    """Пересчитывает итоги закрытого месяца (или закрывает открытый)."""
+    reopen_period(connection, month)
+    return close_period(connection, month, today)
+
+
+def close_completed_periods(connection: Connection, today: Optional[date] = None) -> List[date]:
+    """Закрывает все завершившиеся месяцы, в которых есть командировки."""
+    current = month_start(today or date.today())
+    closed = set(closed_periods(connection))
+    months = sorted({month_start(start) for start in connection.scalars(
+        select(BusinessTrip.start_trip).distinct()
+        .where(BusinessTrip.start_trip < datetime.combine(current, datetime.min.time())))} - closed)
+    for month in months:
+        close_period(connection, month, today)
+    return months
+
+
+def check(connection: Connection) -> List[str]:
+    """Сравнивает сохраненные итоги закрытых месяцев с исходными строками."""
+    problems = []
+    for month in closed_periods(connection):
+        expected = compute(connection, month)
+        summary = connection.execute(
+            select(ClosedPeriod.total_cents, ClosedPeriod.expense_count, ClosedPeriod.trip_count,
+                   ClosedPeriod.expensed_trip_count).where(ClosedPeriod.period == month)).one()
+        actual = {
+            "summary": dict(summary._mapping),
+            "employees": {row[0]: tuple(row[1:]) for row in connection.execute(
+                select(PeriodEmployeeTotal.employee_id, PeriodEmployeeTotal.total_cents,
+                       PeriodEmployeeTotal.expense_count, PeriodEmployeeTotal.trip_count)
+                .where(PeriodEmployeeTotal.period == month))},
+            "expense_types": {row[0]: tuple(row[1:]) for row in connection.execute(
+                select(PeriodExpenseTypeTotal.expense_type_id, PeriodExpenseTypeTotal.total_cents,
+                       PeriodExpenseTypeTotal.expense_count)
+                .where(PeriodExpenseTypeTotal.period == month))},
+            "destinations": dict(connection.execute(
+                select(PeriodDestinationTotal.destination, PeriodDestinationTotal.trip_count)
+                .where(PeriodDestinationTotal.period == month)).all()),
+        }
+        for name in expected:
+            if expected[name] != actual[name]:
+                problems.append(f"{month:%Y-%m} {name}: expected {expected[name]}, stored {actual[name]}")
+    return problems
+
+
+# --- Запрет изменений в закрытых периодах ---
+
+def check_open(connection: Connection, dates: Iterable = (), trip_ids: Iterable = (),
+               employee_ids: Iterable = (), expense_type_ids: Iterable = ()):
+    """Возбуждает ClosedPeriodError, если изменение затрагивает закрытый месяц.
+
+    dates — даты начала затронутых командировок; trip_ids, employee_ids и
+    expense_type_ids — командировки, сотрудники и типы расходов, чьи
+    командировки (или командировки их расходов) затронуты.
+    """
+    _lock_periods(connection, "ROW EXCLUSIVE")
+    closed = set(closed_periods(connection))
+    if not closed:
+        return
+    months = {month_start(value) for value in dates if value is not None}
+    trip_ids = {value for value in trip_ids if value is not None}
+    employee_ids = {value for value in employee_ids if value is not None}
+    expense_type_ids = {value for value in expense_type_ids if value is not None}
+    for chunk in rollups.chunks(trip_ids):
+        months.update(map(month_start, connection.scalars(
+            select(BusinessTrip.start_trip).where(BusinessTrip.id.in_(chunk)))))
+    for chunk in rollups.chunks(employee_ids):
+        months.update(map(month_start, connection.scalars(
+            select(BusinessTrip.start_trip).where(BusinessTrip.employee_id.in_(chunk)))))
+    for chunk in rollups.chunks(expense_type_ids):
+        months.update(map(month_start, connection.scalars(
+            select(BusinessTrip.start_trip)
+            .join(Expense, Expense.business_trip_id == BusinessTrip.id)
+            .where(Expense.expense_type_id.in_(chunk)))))
+    touched = sorted(months & closed)
+    if touched:
+        raise ClosedPeriodError(touched[0])
+
+
+def _history(obj, attribute):
+    history = inspect(obj).attrs[attribute].history
+    return list(history.added) + list(history.deleted) + list(history.unchanged)
+
+
+@event.listens_for(Session, "before_flush")
+def _forbid_closed_changes(session, flush_context, instances):
+    dates, trip_ids, employee_ids, expense_type_ids = [], [], [], []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        # is_modified не считает изменением удаление без правки атрибутов
+        changed = obj in session.deleted or session.is_modified(obj)
+        if isinstance(obj, Expense) and changed:
+            trip_ids.extend(_history(obj, "business_trip_id"))
+            if obj.business_trip is not None:
+                dates.append(obj.business_trip.start_trip)
+        elif isinstance(obj, BusinessTrip) and changed:
+            dates.extend(_history(obj, "start_trip"))
+        elif isinstance(obj, Employee) and obj in session.deleted:
+            employee_ids.append(obj.id)
+        elif isinstance(obj, ExpenseType) and obj in session.deleted:
+            expense_type_ids.append(obj.id)
+    if dates or trip_ids or employee_ids or expense_type_ids:
+        check_open(session.connection(), dates, trip_ids, employee_ids, expense_type_ids)
+
+
+# --- Чтение аналитики: закрытые месяцы из итогов, остальное по строкам ---
+
+def _used_periods(db: Session, date_from=None, date_to=None) -> List[date]:
+    """Закрытые месяцы, целиком попадающие в диапазон [date_from, date_to]."""
+    return [month for month in closed_periods(db.connection())
+            if (date_from is None or month >= date_from)
+            and (date_to is None or next_month(month) <= _day_after(date_to))]
+
+
+def _day_after(value) -> date:
+    return date.fromordinal(value.toordinal() + 1)
+
+
+def _live_conditions(used: List[date], date_from=None, date_to=None) -> List:
+    """Условия на командировки диапазона вне закрытых месяцев used."""
+    conditions = periods.period_conditions(BusinessTrip.start_trip, date_from, date_to)
+    intervals = []
+    for month in used:
+        if intervals and intervals[-1][1] == month:
+            intervals[-1][1] = next_month(month)
+        else:
+            intervals.append([month, next_month(month)])
+    for start, end in intervals:
+        conditions.append(or_(BusinessTrip.start_trip < datetime.combine(start, datetime.min.time()),
+                              BusinessTrip.start_trip >= datetime.combine(end, datetime.min.time())))
+    return conditions
+
+
+def _add(target: dict, rows):
+    for key, *values in rows:
+        current = target.get(key, [0] * len(values))
+        target[key] = [a + int(b or 0) for a, b in zip(current, values)]
+
+
+def _top(counter: dict, limit: int):
+    return sorted(counter.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+# Каждый показатель складывается из итогов закрытых месяцев used и запроса
+# по исходным строкам остальных дней диапазона (условия live). Расходы без
+# командировки, как и в rollups, не учитываются.
+
+def _employee_totals(db: Session, used: List[date], live: List) -> dict:
+    """Сумма в копейках и число расходов по ФИО сотрудника."""
+    totals = {}
+    _add(totals, db.execute(
+        select(Employee.fio, func.sum(PeriodEmployeeTotal.total_cents), func.sum(PeriodEmployeeTotal.expense_count))
+        .join(Employee, Employee.id == PeriodEmployeeTotal.employee_id)
+        .where(PeriodEmployeeTotal.period.in_(used)).group_by(Employee.fio)))
+    _add(totals, db.execute(
+        select(Employee.fio, func.sum(Expense.amount_cents), func.count(Expense.id))
+        .join(BusinessTrip, Employee.id == BusinessTrip.employee_id)
+        .join(Expense, BusinessTrip.id == Expense.business_trip_id)
+        .where(*live).group_by(Employee.fio)))
+    return totals
+
+
+def _employee_trips(db: Session, used: List[date], live: List) -> dict:
+    """Число командировок по ФИО сотрудника."""
+    trips = {}
+    _add(trips, db.execute(
+        select(Employee.fio, func.sum(PeriodEmployeeTotal.trip_count))
+        .join(Employee, Employee.id == PeriodEmployeeTotal.employee_id)
+        .where(PeriodEmployeeTotal.period.in_(used)).group_by(Employee.fio)))
+    _add(trips, db.execute(
+        select(Employee.fio, func.count(BusinessTrip.id))
+        .join(BusinessTrip, Employee.id == BusinessTrip.employee_id)
+        .where(*live).group_by(Employee.fio)))
+    return trips
+
+
+def _expense_type_totals(db: Session, used: List[date], live: List) -> dict:
+    """Сумма в копейках и число расходов по названию типа расхода."""
+    totals = {}
+    _add(totals, db.execute(
+        select(ExpenseType.name, func.sum(PeriodExpenseTypeTotal.total_cents),
+               func.sum(PeriodExpenseTypeTotal.expense_count))
+        .join(ExpenseType, ExpenseType.id == PeriodExpenseTypeTotal.expense_type_id)
+        .where(PeriodExpenseTypeTotal.period.in_(used)).group_by(ExpenseType.name)))
+    _add(totals, db.execute(
+        select(ExpenseType.name, func.sum(Expense.amount_cents), func.count(Expense.id))
+        .join(Expense, ExpenseType.id == Expense.expense_type_id)
+        .join(BusinessTrip, BusinessTrip.id == Expense.business_trip_id)
+        .where(*live).group_by(ExpenseType.name)))
+    return totals
+
+
+def _destination_counts(db: Session, used: List[date], live: List) -> dict:
+    """Число командировок по направлению."""
+    counts = {}
+    _add(counts, db.execute(
+        select(PeriodDestinationTotal.destination, func.sum(PeriodDestinationTotal.trip_count))
+        .where(PeriodDestinationTotal.period.in_(used)).group_by(PeriodDestinationTotal.destination)))
+    _add(counts, db.execute(
+        select(BusinessTrip.destination, func.count(BusinessTrip.id))
+        .where(*live).group_by(BusinessTrip.destination)))
+    return counts
+
+
+def _overall_totals(db: Session, used: List[date], live: List):
+    """Общая сумма в копейках и число командировок с расходами."""
+    frozen_total, frozen_trips = db.execute(
+        select(func.sum(ClosedPeriod.total_cents), func.sum(ClosedPeriod.expensed_trip_count))
+        .where(ClosedPeriod.period.in_(used))).one()
+    live_total, live_trips = db.execute(
+        select(func.sum(Expense.amount_cents), func.count(func.distinct(Expense.business_trip_id)))
+        .join(BusinessTrip, BusinessTrip.id == Expense.business_trip_id)
+        .where(*live)).one()
+    return int(frozen_total or 0) + int(live_total or 0), int(frozen_trips or 0) + int(live_trips or 0)
+
+
+def _sorted_totals(totals: dict):
+    return sorted((key, values[0] / 100) for key, values in totals.items() if values[1])
+
+
+def _average(total: int, expensed_trips: int) -> float:
+    return total / expensed_trips / 100 if expensed_trips else 0.0
+
+
+def _combined_snapshot(db: Session, used: List[date], limit: int = 5, date_from=None, date_to=None):
+    live = _live_conditions(used, date_from, date_to)
+    total, expensed_trips = _overall_totals(db, used, live)
+    return {
+        "total_expenses": total / 100,
+        "expenses_by_employee": _sorted_totals(_employee_totals(db, used, live)),
+        "expenses_by_expense_type": _sorted_totals(_expense_type_totals(db, used, live)),
+        "employees_with_most_trips": _top(
+            {fio: values[0] for fio, values in _employee_trips(db, used, live).items() if values[0]}, limit),
+        "most_popular_destinations": _top(
+            {key: values[0] for key, values in _destination_counts(db, used, live).items()}, limit),
+        "average_expense_per_trip": _average(total, expensed_trips),
+    }
+
+
+def get_analytics_snapshot(db: Session, limit: int = 5, date_from=None, date_to=None):
+    """Получить все показатели аналитики за диапазон дат.
+
+    Если в диапазон не попадает ни один закрытый месяц, показатели
+    считаются service_analytics по исходным строкам.
+    """
+    used = _used_periods(db, date_from, date_to)
+    if not used:
+        return service_analytics.get_analytics_snapshot(db, limit, date_from=date_from, date_to=date_to)
+    return _combined_snapshot(db, used, limit, date_from, date_to)
+
+
+def get_total_expenses(db: Session, date_from=None, date_to=None):
+    """Получить общую сумму всех расходов."""
+    used = _used_periods(db, date_from, date_to)
+    if not used:
+        return service_analytics.get_total_expenses(db, date_from, date_to)
+    return _overall_totals(db, used, _live_conditions(used, date_from, date_to))[0] / 100
+
+
+def get_expenses_by_employee(db: Session, date_from=None, date_to=None):
+    """Получить общую сумму расходов для каждого сотрудника."""
+    used = _used_periods(db, date_from, date_to)
+    if not used:
+        return service_analytics.get_expenses_by_employee(db, date_from, date_to)
+    return _sorted_totals(_employee_totals(db, used, _live_conditions(used, date_from, date_to)))
+
+
+def get_expenses_by_expense_type(db: Session, date_from=None, date_to=None):
+    """Получить общую сумму расходов по типам расходов."""
+    used = _used_periods(db, date_from, date_to)
+    if not used:
+        return service_analytics.get_expenses_by_expense_type(db, date_from, date_to)
+    return _sorted_totals(_expense_type_totals(db, used, _live_conditions(used, date_from, date_to)))
+
+
+def get_employees_with_most_trips(db: Session, limit: int = 5, date_from=None, date_to=None):
+    """Получить список сотрудников с наибольшим количеством командировок."""
+    used = _used_periods(db, date_from, date_to)
+    if not used:
+        return service_analytics.get_employees_with_most_trips(db, limit, date_from, date_to)
+    trips = _employee_trips(db, used, _live_conditions(used, date_from, date_to))
+    return _top({fio: values[0] for fio, values in trips.items() if values[0]}, limit)
+
+
+def get_most_popular_destinations(db: Session, limit: int = 5, date_from=None, date_to=None):
+    """Получить список самых популярных направлений командировок."""
+    used = _used_periods(db, date_from, date_to)
+    if not used:
+        return service_analytics.get_most_popular_destinations(db, limit, date_from, date_to)
+    counts = _destination_counts(db, used, _live_conditions(used, date_from, date_to))
+    return _top({key: values[0] for key, values in counts.items()}, limit)
+
+
+def get_average_expense_per_trip(db: Session, date_from=None, date_to=None):
+    """Получить среднюю сумму расходов на одну командировку."""
+    used = _used_periods(db, date_from, date_to)
+    if not used:
+        return service_analytics.get_average_expense_per_trip(db, date_from, date_to)
+    return _average(*_overall_totals(db, used, _live_conditions(used, date_from, date_to)))
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    with engine.begin() as conn:
+        if command == "close-completed":
+            print("closed:", ", ".join(f"{month:%Y-%m}" for month in close_completed_periods(conn)) or "nothing")
+        elif command in ("close", "reopen", "rebuild") and len(sys.argv) > 2:
+            month = parse_period(sys.argv[2])
+            action = {"close": close_period, "reopen": reopen_period, "rebuild": rebuild_period}[command]
+            print(action(conn, month))
+        elif command == "check":
+            problems = check(conn)
+            print("\n".join(problems) or "ok")
+            sys.exit(1 if problems else 0)
+        else:
+            sys.exit(f"usage: python -m services.period_summaries "
+                     f"close-completed | close|reopen|rebuild YYYY-MM | check")
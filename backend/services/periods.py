@@ -0,0 +1,71 @@
+"""Периоды аналитики по дате начала командировки (BusinessTrip.start_trip).
+
+Фильтр from/to включает обе даты и превращается в полуинтервал
+start_trip >= from AND start_trip < to + 1 день, поэтому выборка за период
+читает только нужный диапазон индекса ix_business_trips_start_trip.
+
+Начало периода (день, неделя с понедельника, месяц, квартал) вычисляется в
+SQL функциями диалекта и возвращается как дата в формате ISO (YYYY-MM-DD).
+"""
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+from sqlalchemy import Date, Integer, cast, func, literal_column
+
+PERIODS = ("day", "week", "month", "quarter")
+
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.min)
+
+
+def period_conditions(column, date_from: Optional[date] = None, date_to: Optional[date] = None) -> List:
+    """Условия WHERE для колонки column за период [date_from, date_to] (обе даты включительно)."""
+    conditions = []
+    if date_from is not None:
+        conditions.append(column >= _as_datetime(date_from))
+    if date_to is not None:
+        if not isinstance(date_to, datetime):
+            date_to = _as_datetime(date_to) + timedelta(days=1)
+        conditions.append(column < date_to)
+    return conditions
+
+
+def is_set(date_from=None, date_to=None) -> bool:
+    return date_from is not None or date_to is not None
+
+
+def filter_query(query, column, date_from=None, date_to=None):
+    """Добавляет к запросу условия периода; без границ запрос возвращается как есть."""
+    conditions = period_conditions(column, date_from, date_to)
+    return query.filter(*conditions) if conditions else query
+
+
+def _const(value: str):
+    # Константы подставляются в текст запроса, а не параметрами: иначе
+    # PostgreSQL не узнает одно и то же выражение в SELECT и GROUP BY.
+    return literal_column(f"'{value}'")
+
+
+def bucket(column, period: str, dialect: str):
+    """SQL-выражение начала периода period для даты column в диалекте dialect.
+
+    Для неизвестного периода или диалекта возбуждает ValueError.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Invalid period: {period}")
+    if dialect == "postgresql":
+        return cast(func.date_trunc(_const(period), column), Date)
+    if dialect != "sqlite":
+        raise ValueError(f"Period bucketing is not supported for dialect {dialect}")
+    if period == "day":
+        return func.date(column)
+    if period == "week":
+        # 'weekday 0' переходит к ближайшему воскресенью (или остается на нем)
+        return func.date(column, _const("weekday 0"), _const("-6 days"))
+    if period == "month":
+        return func.date(column, _const("start of month"))
+    shift = (cast(func.strftime(_const("%m"), column), Integer) - 1) % 3
+    return func.date(column, _const("start of month"), func.printf(_const("-%d months"), shift))
@@ -0,0 +1,123 @@
+"""Профилирование работающего процесса по запросу.
+
+StackSampler в отдельном потоке с заданным интервалом снимает стеки всех
+потоков процесса (sys._current_frames) и считает одинаковые стеки. Результат
+отдается в свернутом формате (collapsed stacks), который понимают
+flamegraph.pl, speedscope и inferno:
+
+    main:run;services.service_analytics:get_expenses_by_employee 42
+
+Потоки, ожидающие работу (пул потоков, цикл событий в select), по умолчанию
+не учитываются. Профилируется только текущий процесс: при нескольких
+процессах сервера профиль снимается с того, который принял запрос.
+
+MemoryTracer сравнивает снимки tracemalloc в начале и в конце окна.
+"""
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Функции, в которых поток ждет работу; стеки с такой вершиной пропускаются
+IDLE_FRAMES = {
+    ("threading", "wait"),
+    ("threading", "_wait_for_tstate_lock"),
+    ("selectors", "select"),
+    ("queue", "get"),
+    ("concurrent.futures.thread", "_worker"),
+    ("asyncio.base_events", "_run_once"),
+}
+
+# Одновременно выполняется одно профилирование: выборки стеков и tracemalloc
+# замедляют весь процесс
+profile_lock = threading.Lock()
+
+
+def _frame_name(frame) -> str:
+    module = frame.f_globals.get("__name__") or os.path.basename(frame.f_code.co_filename)
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def _is_idle(frame) -> bool:
+    return (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_FRAMES
+
+
+class StackSampler:
+    """Выборочный профилировщик стеков всех потоков процесса."""
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self):
+        """Снимает стеки всех потоков, кроме потока профилировщика."""
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or (not self.include_idle and _is_idle(frame)):
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Стеки в свернутом формате, самые частые первыми."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def memory_diff(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot,
+                group_by: str = "lineno", limit: int = 30) -> List[Dict[str, Any]]:
+    """Места выделения памяти с наибольшим приростом между снимками."""
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), group_by)
+    return [{
+        "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+        "size_diff_kib": round(stat.size_diff / 1024, 1),
+        "size_kib": round(stat.size / 1024, 1),
+        "count_diff": stat.count_diff,
+        "count": stat.count,
+    } for stat in stats[:limit]]
+
+
+class MemoryTracer:
+    """Снимки tracemalloc в начале и в конце окна; трассировка включается на
+    время окна, если не была включена раньше."""
+
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self._started = False
+        self._before: Optional[tracemalloc.Snapshot] = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+        self._before = tracemalloc.take_snapshot()
+
+    def stop(self, group_by: str = "lineno", limit: int = 30) -> List[Dict[str, Any]]:
+        after = tracemalloc.take_snapshot()
+        if self._started:
+            tracemalloc.stop()
+        return memory_diff(self._before, after, group_by, limit)
+
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from services.reports import Report, TextReport, JSONReport
+from services.reports import Report, TextReport, JSONReport, CSVReport, XLSXReport, ParquetReport
 
 
 class ReportFactory(ABC):
@@ -23,3 +23,35 @@ class JSONReportFactory(ReportFactory):
 
     def create_report(self) -> Report:
         return JSONReport()
+
+
+class CSVReportFactory(ReportFactory):
+    """Фабрика CSV отчетов."""
+
+    def create_report(self) -> Report:
+        return CSVReport()
+
+
+class XLSXReportFactory(ReportFactory):
+    """Фабрика XLSX отчетов."""
+
+    def create_report(self) -> Report:
+        return XLSXReport()
+
+
+class ParquetReportFactory(ReportFactory):
+    """Фабрика Parquet отчетов."""
+
+    def create_report(self) -> Report:
+        return ParquetReport()
+
+
+# Форматы отчетов: фабрика, имя файла и MIME-тип
+REPORT_FORMATS = {
+    "text": (TextReportFactory, "report.txt", "text/plain"),
+    "json": (JSONReportFactory, "report.json", "application/json"),
+    "csv": (CSVReportFactory, "report.csv", "text/csv"),
+    "xlsx": (XLSXReportFactory, "report.xlsx",
+             "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": (ParquetReportFactory, "report.parquet", "application/vnd.apache.parquet"),
+}
@@ -0,0 +1,182 @@
+"""Фоновая генерация отчетов.
+
+POST /analytics/reports ставит задание в очередь пула потоков и сразу
+возвращает его id, GET /analytics/reports/{id} отдает статус или готовый
+файл. Готовые отчеты хранятся на диске (REPORT_CACHE_DIR) под ключом
+(тип отчета, тип данных, версия данных), поэтому повторный запрос при
+неизменных данных не строит отчет заново, а одинаковые задания,
+поставленные одновременно, выполняются один раз.
+
+Реестр заданий хранится в памяти процесса.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from . import versions
+from .analytics_facade import DATA_TYPES, AnalyticsFacade
+from .report_factory import REPORT_FORMATS
+
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "./reports")
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+# Сколько последних заданий помнит реестр
+MAX_JOBS = 1000
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ReportJob:
+    """Задание на построение отчета."""
+
+    def __init__(self, report_type: str, data_type: str):
+        self.id = uuid.uuid4().hex
+        self.report_type = report_type
+        self.data_type = data_type
+        self.status = PENDING
+        self.error: Optional[str] = None
+        self.path: Optional[str] = None
+        self.data_version: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.finished = threading.Event()
+
+    @property
+    def filename(self) -> str:
+        return REPORT_FORMATS[self.report_type][1]
+
+    @property
+    def media_type(self) -> str:
+        return REPORT_FORMATS[self.report_type][2]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "report_type": self.report_type,
+            "data_type": self.data_type,
+            "status": self.status,
+            "error": self.error,
+            "data_version": self.data_version,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ReportJobs:
+    """Очередь заданий с пулом потоков и дисковым кэшем результатов."""
+
+    def __init__(self, directory: str = REPORT_CACHE_DIR, workers: int = REPORT_WORKERS):
+        self.directory = directory
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        # Выполняющиеся задания по ключу кэша: одинаковые задания не дублируются
+        self._running: Dict[tuple, ReportJob] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, report_type: str, data_type: str, data_version: str) -> str:
+        extension = os.path.splitext(REPORT_FORMATS[report_type][1])[1]
+        return os.path.join(self.directory, f"{report_type}-{data_type}-{data_version}{extension}")
+
+    def submit(self, db: Session, report_type: str, data_type: str) -> ReportJob:
+        """Ставит задание в очередь; если отчет для текущей версии данных уже
+        построен, задание сразу завершено."""
+        if report_type not in REPORT_FORMATS:
+            raise ValueError(f"Invalid report type: {report_type}")
+        if data_type not in DATA_TYPES:
+            raise ValueError(f"Invalid data type: {data_type}")
+
+        data_version = versions.data_version(db.connection())
+        key = (report_type, data_type, data_version)
+        path = self._path(*key)
+        job = ReportJob(report_type, data_type)
+        job.data_version = data_version
+        with self._lock:
+            if os.path.exists(path):
+                self._finish(job, path)
+            elif key in self._running:
+                return self._running[key]
+            else:
+                self._running[key] = job
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="report")
+                self._executor.submit(self._run, job, key, db.get_bind())
+            self._remember(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _remember(self, job: ReportJob):
+        self._jobs[job.id] = job
+        while len(self._jobs) > MAX_JOBS:
+            self._jobs.popitem(last=False)
+
+    def _finish(self, job: ReportJob, path: Optional[str] = None, error: Optional[str] = None):
+        job.path = path
+        job.error = error
+        job.status = FAILED if error else DONE
+        job.finished_at = time.time()
+        job.finished.set()
+
+    def _run(self, job: ReportJob, key: tuple, bind):
+        job.status = RUNNING
+        path, error = None, None
+        try:
+            with Session(bind=bind) as db:
+                # Версия и данные читаются в одной транзакции; если данные
+                # успели измениться, отчет сохраняется под новой версией.
+                job.data_version = versions.data_version(db.connection())
+                path = self._path(job.report_type, job.data_type, job.data_version)
+                if not os.path.exists(path):
+                    self._write(db, job, path)
+        except Exception as e:
+            path, error = None, f"{type(e).__name__}: {e}"
+        with self._lock:
+            self._running.pop(key, None)
+            self._finish(job, path, error)
+
+    def _write(self, db: Session, job: ReportJob, path: str):
+        factory_class = REPORT_FORMATS[job.report_type][0]
+        facade = AnalyticsFacade(db, factory_class())
+        chunks = facade.stream_report(job.data_type)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{job.id}.tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk.encode() if isinstance(chunk, str) else chunk)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._remove_stale(job.report_type, job.data_type, path)
+
+    def _remove_stale(self, report_type: str, data_type: str, path: str):
+        """Удаляет отчеты того же типа, построенные по устаревшим версиям данных."""
+        prefix = f"{report_type}-{data_type}-"
+        for name in os.listdir(self.directory):
+            stale = os.path.join(self.directory, name)
+            if name.startswith(prefix) and not name.endswith(".tmp") and stale != path:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+report_jobs = ReportJobs()
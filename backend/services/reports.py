@@ -1,29 +1,199 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List, Union
+import csv
+import io
 import json
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - зависит от окружения
+    pa = None
+    pq = None
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # pragma: no cover - зависит от окружения
+    Workbook = None
+
+# Минимальный размер фрагмента потокового отчета
+CHUNK_SIZE = 64 * 1024
+
+
+def buffered(pieces: Iterable[str], size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Склеивает мелкие части в фрагменты не меньше size символов."""
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
 
 class Report(ABC):
     """Абстрактный класс отчета."""
 
     @abstractmethod
-    def generate(self, data: Dict[str, Any]) -> str:
-        """Генерирует отчет на основе данных."""
+    def stream(self, data: Dict[str, Any]) -> Iterator[Union[str, bytes]]:
+        """Генерирует отчет по частям, не собирая его целиком в памяти."""
         pass
 
+    def generate(self, data: Dict[str, Any]) -> Union[str, bytes]:
+        """Генерирует отчет на основе данных."""
+        chunks = list(self.stream(data))
+        if chunks and isinstance(chunks[0], bytes):
+            return b"".join(chunks)
+        return "".join(chunks)
+
 
 class TextReport(Report):
     """Текстовый отчет."""
 
-    def generate(self, data: Dict[str, Any]) -> str:
-        report_str = ""
+    def _pieces(self, data: Dict[str, Any]) -> Iterator[str]:
         for key, value in data.items():
-            report_str += f"{key}: {value}\n"
-        return report_str
+            if isinstance(value, list):
+                # То же, что f"{value}", но элемент за элементом
+                yield f"{key}: ["
+                for index, item in enumerate(value):
+                    yield f"{', ' if index else ''}{item!r}"
+                yield "]\n"
+            else:
+                yield f"{key}: {value}\n"
+
+    def stream(self, data: Dict[str, Any]) -> Iterator[str]:
+        return buffered(self._pieces(data))
 
 
 class JSONReport(Report):
     """JSON отчет."""
 
-    def generate(self, data: Dict[str, Any]) -> str:
-        return json.dumps(data, indent=4, ensure_ascii=False)
+    def stream(self, data: Dict[str, Any]) -> Iterator[str]:
+        encoder = json.JSONEncoder(indent=4, ensure_ascii=False)
+        return buffered(encoder.iterencode(data))
+
+
+def _sections(data: Dict[str, Any]):
+    """Делит данные отчета на таблицы (списки строк-словарей) и скалярные показатели."""
+    tables = {key: value for key, value in data.items() if isinstance(value, list)}
+    scalars = {key: value for key, value in data.items() if not isinstance(value, list)}
+    return tables, scalars
+
+
+def _columns(rows: List[Dict[str, Any]]) -> List[str]:
+    return list(rows[0].keys()) if rows else []
+
+
+class CSVReport(Report):
+    """CSV отчет.
+
+    Одна таблица выгружается как обычный CSV с заголовком. Если разделов
+    несколько, каждый предваряется строкой с его названием, а скалярные
+    показатели идут первыми парами «название,значение».
+    """
+
+    def _pieces(self, data: Dict[str, Any]) -> Iterator[str]:
+        tables, scalars = _sections(data)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for key, value in scalars.items():
+            writer.writerow([key, value])
+        titled = len(tables) > 1 or bool(scalars)
+        for key, rows in tables.items():
+            if buffer.tell():
+                writer.writerow([])
+            if titled:
+                writer.writerow([key])
+            columns = _columns(rows)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow([row[column] for column in columns])
+                if buffer.tell() >= CHUNK_SIZE:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        yield buffer.getvalue()
+
+    def stream(self, data: Dict[str, Any]) -> Iterator[str]:
+        return self._pieces(data)
+
+
+class XLSXReport(Report):
+    """XLSX отчет: лист на каждую таблицу и лист summary со скалярными показателями.
+
+    Книга пишется в режиме write_only, строки не хранятся в памяти как ячейки.
+    Нужен необязательный пакет openpyxl.
+    """
+
+    def stream(self, data: Dict[str, Any]) -> Iterator[bytes]:
+        if Workbook is None:
+            raise ValueError("XLSX reports require the openpyxl package")
+        return self._write(data)
+
+    def _write(self, data: Dict[str, Any]) -> Iterator[bytes]:
+        tables, scalars = _sections(data)
+        workbook = Workbook(write_only=True)
+        if scalars:
+            sheet = workbook.create_sheet("summary")
+            for key, value in scalars.items():
+                sheet.append([key, value])
+        for key, rows in tables.items():
+            # Имя листа Excel ограничено 31 символом
+            sheet = workbook.create_sheet(key[:31])
+            columns = _columns(rows)
+            sheet.append(columns)
+            for row in rows:
+                sheet.append([row[column] for column in columns])
+        output = io.BytesIO()
+        workbook.save(output)
+        yield output.getvalue()
+
+
+class ParquetReport(Report):
+    """Parquet отчет.
+
+    Одна таблица записывается со своими колонками. Если разделов несколько,
+    данные приводятся к длинному формату metric / name / value.
+    Нужен необязательный пакет pyarrow.
+    """
+
+    @staticmethod
+    def _long_schema():
+        return pa.schema([("metric", pa.string()), ("name", pa.string()), ("value", pa.float64())])
+
+    def _table(self, data: Dict[str, Any]):
+        tables, scalars = _sections(data)
+        if len(tables) == 1 and not scalars:
+            rows = next(iter(tables.values()))
+            if rows:
+                return pa.Table.from_pylist(rows)
+        # Пустая таблица записывается в длинном формате: у нее нет колонок
+        schema = self._long_schema()
+        parts = [pa.table({
+            "metric": list(scalars),
+            "name": [None] * len(scalars),
+            "value": [float(value) for value in scalars.values()],
+        }, schema=schema)]
+        for key, rows in tables.items():
+            if not rows:
+                continue
+            # Первые две колонки раздела — название и значение
+            section = pa.Table.from_pylist(rows)
+            parts.append(pa.table({
+                "metric": pa.repeat(pa.scalar(key, pa.string()), section.num_rows),
+                "name": section.column(0).cast(pa.string()),
+                "value": section.column(1).cast(pa.float64()),
+            }, schema=schema))
+        return pa.concat_tables(parts)
+
+    def stream(self, data: Dict[str, Any]) -> Iterator[bytes]:
+        if pa is None:
+            raise ValueError("Parquet reports require the pyarrow package")
+        return self._write(data)
+
+    def _write(self, data: Dict[str, Any]) -> Iterator[bytes]:
+        output = io.BytesIO()
+        pq.write_table(self._table(data), output)
+        yield output.getvalue()
@@ -0,0 +1,350 @@
+"""Агрегированные таблицы (rollups) для аналитики.
+
+Таблицы employee_totals, expense_type_totals, trip_totals и
+destination_trip_counts пересчитываются для затронутых групп при каждом
+flush сессии, поэтому чтение аналитики стоит O(число групп), а не
+O(число расходов). Суммы хранятся в целых копейках (total_cents).
+
+Пересчет и проверка согласованности с исходными таблицами:
+
+    python -m services.rollups rebuild
+    python -m services.rollups check
+"""
+import math
+import sys
+
+from sqlalchemy import Float, cast, delete, event, func, insert, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from models import (
+    BusinessTrip,
+    DestinationTripCount,
+    Employee,
+    EmployeeTotal,
+    Expense,
+    ExpenseType,
+    ExpenseTypeTotal,
+    TripTotal,
+    cents_sum,
+)
+
+# Ограничение на размер списка в IN (...), чтобы не упереться в лимит
+# параметров SQLite при массовых изменениях.
+CHUNK_SIZE = 500
+
+
+def chunks(values):
+    """Делит значения на списки не длиннее CHUNK_SIZE."""
+    values = list(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def _trip_totals_select():
+    return select(
+        Expense.business_trip_id,
+        func.sum(Expense.amount_cents),
+        func.count(Expense.id),
+    ).where(Expense.business_trip_id.isnot(None)).group_by(Expense.business_trip_id)
+
+
+def _expense_type_totals_select():
+    return select(
+        Expense.expense_type_id,
+        func.sum(Expense.amount_cents),
+        func.count(Expense.id),
+    ).where(Expense.expense_type_id.isnot(None)).group_by(Expense.expense_type_id)
+
+
+def _employee_totals_select():
+    return (
+        select(
+            BusinessTrip.employee_id,
+            func.coalesce(func.sum(TripTotal.total_cents), 0),
+            func.coalesce(func.sum(TripTotal.expense_count), 0),
+            func.count(BusinessTrip.id),
+        )
+        .outerjoin(TripTotal, TripTotal.business_trip_id == BusinessTrip.id)
+        .where(BusinessTrip.employee_id.isnot(None))
+        .group_by(BusinessTrip.employee_id)
+    )
+
+
+def _destination_counts_select():
+    return select(BusinessTrip.destination, func.count(BusinessTrip.id)).group_by(
+        BusinessTrip.destination)
+
+
+_TRIP_COLUMNS = ["business_trip_id", "total_cents", "expense_count"]
+_EXPENSE_TYPE_COLUMNS = ["expense_type_id", "total_cents", "expense_count"]
+_EMPLOYEE_COLUMNS = ["employee_id", "total_cents", "expense_count", "trip_count"]
+_DESTINATION_COLUMNS = ["destination", "trip_count"]
+
+
+def refresh(connection, trip_ids=(), employee_ids=(), expense_type_ids=(), destinations=()):
+    """Пересчитывает агрегаты только для переданных групп.
+
+    Сотрудники, которым принадлежат командировки из trip_ids, пересчитываются
+    автоматически. Используется обработчиком flush и массовыми операциями,
+    которые обходят unit of work.
+    """
+    trip_ids = {trip_id for trip_id in trip_ids if trip_id is not None}
+    employee_ids = {employee_id for employee_id in employee_ids if employee_id is not None}
+    expense_type_ids = {type_id for type_id in expense_type_ids if type_id is not None}
+    destinations = set(destinations)
+
+    for chunk in chunks(trip_ids):
+        connection.execute(delete(TripTotal).where(
+            TripTotal.business_trip_id.in_(chunk)))
+        connection.execute(insert(TripTotal).from_select(
+            _TRIP_COLUMNS,
+            _trip_totals_select().where(Expense.business_trip_id.in_(chunk))))
+        employee_ids.update(connection.execute(
+            select(BusinessTrip.employee_id).where(BusinessTrip.id.in_(chunk))).scalars())
+    employee_ids.discard(None)
+
+    for chunk in chunks(employee_ids):
+        connection.execute(delete(EmployeeTotal).where(
+            EmployeeTotal.employee_id.in_(chunk)))
+        connection.execute(insert(EmployeeTotal).from_select(
+            _EMPLOYEE_COLUMNS,
+            _employee_totals_select().where(BusinessTrip.employee_id.in_(chunk))))
+
+    for chunk in chunks(expense_type_ids):
+        connection.execute(delete(ExpenseTypeTotal).where(
+            ExpenseTypeTotal.expense_type_id.in_(chunk)))
+        connection.execute(insert(ExpenseTypeTotal).from_select(
+            _EXPENSE_TYPE_COLUMNS,
+            _expense_type_totals_select().where(Expense.expense_type_id.in_(chunk))))
+
+    for chunk in chunks(destinations):
+        names = [name for name in chunk if name is not None]
+        target = DestinationTripCount.destination.in_(names)
+        source = BusinessTrip.destination.in_(names)
+        if len(names) != len(chunk):
+            target = or_(target, DestinationTripCount.destination.is_(None))
+            source = or_(source, BusinessTrip.destination.is_(None))
+        connection.execute(delete(DestinationTripCount).where(target))
+        connection.execute(insert(DestinationTripCount).from_select(
+            _DESTINATION_COLUMNS, _destination_counts_select().where(source)))
+
+
+def rebuild(connection):
+    """Полностью пересчитывает все агрегированные таблицы из исходных."""
+    for model in (TripTotal, EmployeeTotal, ExpenseTypeTotal, DestinationTripCount):
+        connection.execute(delete(model))
+    # trip_totals заполняется первой: из нее считаются суммы сотрудников
+    connection.execute(insert(TripTotal).from_select(
+        _TRIP_COLUMNS, _trip_totals_select()))
+    connection.execute(insert(EmployeeTotal).from_select(
+        _EMPLOYEE_COLUMNS, _employee_totals_select()))
+    connection.execute(insert(ExpenseTypeTotal).from_select(
+        _EXPENSE_TYPE_COLUMNS, _expense_type_totals_select()))
+    connection.execute(insert(DestinationTripCount).from_select(
+        _DESTINATION_COLUMNS, _destination_counts_select()))
+
+
+def rebuild_if_empty(connection):
+    """Заполняет агрегаты, если они пусты, а исходные данные уже есть."""
+    has_rollups = connection.execute(select(TripTotal.business_trip_id).limit(1)).first()
+    has_expenses = connection.execute(select(Expense.id).limit(1)).first()
+    has_trips = connection.execute(select(BusinessTrip.id).limit(1)).first()
+    has_destinations = connection.execute(
+        select(DestinationTripCount.id).limit(1)).first()
+    if (has_expenses and not has_rollups) or (has_trips and not has_destinations):
+        rebuild(connection)
+
+
+def _rows_to_dict(rows):
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+
+def _diff(name, expected, actual):
+    problems = []
+    for key in expected.keys() | actual.keys():
+        want, got = expected.get(key), actual.get(key)
+        if want is None or got is None or not all(
+                math.isclose(w, g, rel_tol=1e-9, abs_tol=1e-6) for w, g in zip(want, got)):
+            problems.append(f"{name}[{key!r}]: ожидалось {want}, в таблице {got}")
+    return problems
+
+
+def check(connection):
+    """Сравнивает агрегированные таблицы с пересчетом по исходным данным.
+
+    Возвращает список расхождений; пустой список означает согласованность.
+    """
+    expected_trips = _rows_to_dict(connection.execute(_trip_totals_select()))
+    expected_employees = {}
+    for employee_id, trip_count, total, count in connection.execute(
+            select(
+                BusinessTrip.employee_id,
+                func.count(func.distinct(BusinessTrip.id)),
+                func.coalesce(func.sum(Expense.amount_cents), 0),
+                func.count(Expense.id),
+            )
+            .outerjoin(Expense, Expense.business_trip_id == BusinessTrip.id)
+            .where(BusinessTrip.employee_id.isnot(None))
+            .group_by(BusinessTrip.employee_id)):
+        expected_employees[employee_id] = (total, count, trip_count)
+
+    problems = []
+    problems += _diff("trip_totals", expected_trips, _rows_to_dict(
+        connection.execute(select(*[getattr(TripTotal, c) for c in _TRIP_COLUMNS]))))
+    problems += _diff("employee_totals", expected_employees, _rows_to_dict(
+        connection.execute(select(*[getattr(EmployeeTotal, c) for c in _EMPLOYEE_COLUMNS]))))
+    problems += _diff("expense_type_totals", _rows_to_dict(
+        connection.execute(_expense_type_totals_select())), _rows_to_dict(
+        connection.execute(select(*[getattr(ExpenseTypeTotal, c) for c in _EXPENSE_TYPE_COLUMNS]))))
+    problems += _diff("destination_trip_counts", _rows_to_dict(
+        connection.execute(_destination_counts_select())), _rows_to_dict(
+        connection.execute(select(*[getattr(DestinationTripCount, c) for c in _DESTINATION_COLUMNS]))))
+    return problems
+
+
+# --- Поддержка агрегатов при изменениях через ORM ---
+
+def _old_values(obj, attribute):
+    history = inspect(obj).attrs[attribute].history
+    return list(history.deleted) + list(history.unchanged)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changes(session, flush_context, instances):
+    """Запоминает измененные объекты и прежние значения ключей групп."""
+    pending = session.info.setdefault("rollups_pending", {
+        "objects": [], "trip_ids": set(), "employee_ids": set(),
+        "expense_type_ids": set(), "destinations": set(),
+    })
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Expense):
+            pending["trip_ids"].update(_old_values(obj, "business_trip_id"))
+            pending["expense_type_ids"].update(_old_values(obj, "expense_type_id"))
+        elif isinstance(obj, BusinessTrip):
+            pending["employee_ids"].update(_old_values(obj, "employee_id"))
+            pending["destinations"].update(_old_values(obj, "destination"))
+        elif not isinstance(obj, (Employee, ExpenseType)):
+            continue
+        pending["objects"].append(obj)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_changes(session, flush_context):
+    """Пересчитывает группы, затронутые только что записанными изменениями."""
+    pending = session.info.pop("rollups_pending", None)
+    if not pending or not pending["objects"]:
+        return
+    trip_ids = pending["trip_ids"]
+    employee_ids = pending["employee_ids"]
+    expense_type_ids = pending["expense_type_ids"]
+    destinations = pending["destinations"]
+    # Новые значения ключей (и идентификаторы новых строк) известны только после flush
+    for obj in pending["objects"]:
+        if isinstance(obj, Expense):
+            trip_ids.add(obj.business_trip_id)
+            expense_type_ids.add(obj.expense_type_id)
+        elif isinstance(obj, BusinessTrip):
+            trip_ids.add(obj.id)
+            employee_ids.add(obj.employee_id)
+            destinations.add(obj.destination)
+        elif isinstance(obj, Employee):
+            employee_ids.add(obj.id)
+        elif isinstance(obj, ExpenseType):
+            expense_type_ids.add(obj.id)
+    refresh(session.connection(), trip_ids, employee_ids, expense_type_ids, destinations)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("rollups_pending", None)
+
+
+# --- Чтение аналитики из агрегатов ---
+
+def get_total_expenses(db: Session):
+    """Получить общую сумму всех расходов."""
+    return db.query(cents_sum(TripTotal.total_cents)).scalar() or 0.0
+
+
+def get_expenses_by_employee(db: Session):
+    """Получить общую сумму расходов для каждого сотрудника."""
+    return (
+        db.query(Employee.fio, cents_sum(EmployeeTotal.total_cents).label("total_expenses"))
+        .join(EmployeeTotal, EmployeeTotal.employee_id == Employee.id)
+        .filter(EmployeeTotal.expense_count > 0)
+        .group_by(Employee.fio)
+        .order_by(Employee.fio)
+        .all()
+    )
+
+
+def get_expenses_by_expense_type(db: Session):
+    """Получить общую сумму расходов по типам расходов."""
+    return (
+        db.query(ExpenseType.name, cents_sum(ExpenseTypeTotal.total_cents).label("total_expenses"))
+        .join(ExpenseTypeTotal, ExpenseTypeTotal.expense_type_id == ExpenseType.id)
+        .filter(ExpenseTypeTotal.expense_count > 0)
+        .group_by(ExpenseType.name)
+        .order_by(ExpenseType.name)
+        .all()
+    )
+
+
+def get_employees_with_most_trips(db: Session, limit: int = 5):
+    """Получить список сотрудников с наибольшим количеством командировок."""
+    trip_count = func.sum(EmployeeTotal.trip_count)
+    return (
+        db.query(Employee.fio, trip_count.label("trip_count"))
+        .join(EmployeeTotal, EmployeeTotal.employee_id == Employee.id)
+        .filter(EmployeeTotal.trip_count > 0)
+        .group_by(Employee.fio)
+        .order_by(trip_count.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def get_most_popular_destinations(db: Session, limit: int = 5):
+    """Получить список самых популярных направлений командировок."""
+    return (
+        db.query(DestinationTripCount.destination, DestinationTripCount.trip_count)
+        .order_by(DestinationTripCount.trip_count.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def get_average_expense_per_trip(db: Session):
+    """Получить среднюю сумму расходов на одну командировку."""
+    return db.query(cast(func.avg(TripTotal.total_cents), Float) / 100.0).scalar() or 0.0
+
+
+def get_analytics_snapshot(db: Session, limit: int = 5):
+    """Получить все показатели аналитики из агрегированных таблиц."""
+    return {
+        "total_expenses": get_total_expenses(db),
+        "expenses_by_employee": [tuple(row) for row in get_expenses_by_employee(db)],
+        "expenses_by_expense_type": [tuple(row) for row in get_expenses_by_expense_type(db)],
+        "employees_with_most_trips": [tuple(row) for row in get_employees_with_most_trips(db, limit)],
+        "most_popular_destinations": [tuple(row) for row in get_most_popular_destinations(db, limit)],
+        "average_expense_per_trip": get_average_expense_per_trip(db),
+    }
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "rebuild":
+        with engine.begin() as conn:
+            rebuild(conn)
+        print("Агрегированные таблицы пересчитаны")
+    elif command == "check":
+        with engine.connect() as conn:
+            problems = check(conn)
+        for problem in problems:
+            print(problem)
+        print("Расхождений нет" if not problems else f"Расхождений: {len(problems)}")
+        sys.exit(1 if problems else 0)
+    else:
+        sys.exit(f"Неизвестная команда: {command}. Используйте rebuild или check")
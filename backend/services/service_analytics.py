@@ -1,58 +1,81 @@
-import numpy as np
-from sqlalchemy import func
+import os
+from sqlalchemy import Float, cast, func
 from sqlalchemy.orm import Session
-from models import Employee, BusinessTrip, Expense, ExpenseType
+from models import Employee, BusinessTrip, Expense, ExpenseType, cents_sum
+from . import analytics_numpy, periods
 
+# Агрегации выполняются в БД (GROUP BY / SUM / AVG) над целыми копейками,
+# перевод в рубли — одно деление над итогом.
+# ANALYTICS_ENGINE=numpy включает прежний расчет через NumPy как запасной вариант.
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "sql")
 
-def get_total_expenses(db: Session):
-    """Получить общую сумму всех расходов с использованием NumPy."""
-    expenses = db.query(Expense.amount).all()
-    expenses_array = np.array([expense[0]
-                              for expense in expenses], dtype=float)
-    return np.sum(expenses_array)
 
+def _use_numpy() -> bool:
+    return ANALYTICS_ENGINE == "numpy"
 
-def get_expenses_by_employee(db: Session):
-    """Получить общую сумму расходов для каждого сотрудника с использованием NumPy."""
+
+def _in_period(query, date_from=None, date_to=None):
+    return periods.filter_query(query, BusinessTrip.start_trip, date_from, date_to)
+
+
+def _expenses_in_period(query, date_from=None, date_to=None):
+    """Ограничивает запрос по расходам периодом их командировок."""
+    if not periods.is_set(date_from, date_to):
+        return query
+    return _in_period(query.join(BusinessTrip, BusinessTrip.id == Expense.business_trip_id),
+                      date_from, date_to)
+
+
+def get_total_expenses(db: Session, date_from=None, date_to=None):
+    """Получить общую сумму всех расходов."""
+    if _use_numpy():
+        return analytics_numpy.get_total_expenses(db, date_from, date_to)
+    total = _expenses_in_period(
+        db.query(cents_sum(Expense.amount_cents)), date_from, date_to).scalar()
+    return total or 0.0
+
+
+def get_expenses_by_employee(db: Session, date_from=None, date_to=None):
+    """Получить общую сумму расходов для каждого сотрудника."""
+    if _use_numpy():
+        return analytics_numpy.get_expenses_by_employee(db, date_from, date_to)
     query = (
-        db.query(Employee.fio, Expense.amount)
+        db.query(Employee.fio, cents_sum(Expense.amount_cents).label("total_expenses"))
         .join(BusinessTrip, Employee.id == BusinessTrip.employee_id)
         .join(Expense, BusinessTrip.id == Expense.business_trip_id)
+    )
+    return (
+        _in_period(query, date_from, date_to)
+        .group_by(Employee.fio)
+        .order_by(Employee.fio)
         .all()
     )
-    data = np.array(query)
-    fios = data[:, 0]  # Список сотрудников
-    amounts = data[:, 1].astype(float)  # Список расходов
 
-    # Суммируем расходы по каждому сотруднику
-    unique_fios, total_expenses = np.unique(fios, return_inverse=True)
-    total_expenses = np.bincount(total_expenses, weights=amounts)
-    return list(zip(unique_fios, total_expenses))
 
-
-def get_expenses_by_expense_type(db: Session):
-    """Получить общую сумму расходов по типам расходов с использованием NumPy."""
+def get_expenses_by_expense_type(db: Session, date_from=None, date_to=None):
+    """Получить общую сумму расходов по типам расходов."""
+    if _use_numpy():
+        return analytics_numpy.get_expenses_by_expense_type(db, date_from, date_to)
     query = (
-        db.query(ExpenseType.name, Expense.amount)
+        db.query(ExpenseType.name, cents_sum(Expense.amount_cents).label("total_expenses"))
         .join(Expense, ExpenseType.id == Expense.expense_type_id)
+    )
+    return (
+        _expenses_in_period(query, date_from, date_to)
+        .group_by(ExpenseType.name)
+        .order_by(ExpenseType.name)
         .all()
     )
-    data = np.array(query)
-    expense_types = data[:, 0]  # Типы расходов
-    amounts = data[:, 1].astype(float)  # Суммы расходов
-
-    # Суммируем расходы по каждому типу
-    unique_types, total_expenses = np.unique(
-        expense_types, return_inverse=True)
-    total_expenses = np.bincount(total_expenses, weights=amounts)
-    return list(zip(unique_types, total_expenses))
 
 
-def get_employees_with_most_trips(db: Session, limit: int = 5):
+def get_employees_with_most_trips(db: Session, limit: int = 5, date_from=None, date_to=None):
     """Получить список сотрудников с наибольшим количеством командировок."""
-    return (
+    query = (
         db.query(Employee.fio, func.count(BusinessTrip.id).label("trip_count"))
         .join(BusinessTrip, Employee.id == BusinessTrip.employee_id)
+    )
+    return (
+        _in_period(query, date_from, date_to)
         .group_by(Employee.fio)
         .order_by(func.count(BusinessTrip.id).desc())
         .limit(limit)
@@ -60,10 +83,11 @@ def get_employees_with_most_trips(db: Session, limit: int = 5):
     )
 
 
-def get_most_popular_destinations(db: Session, limit: int = 5):
+def get_most_popular_destinations(db: Session, limit: int = 5, date_from=None, date_to=None):
     """Получить список самых популярных направлений командировок."""
+    query = db.query(BusinessTrip.destination, func.count().label("trip_count"))
     return (
-        db.query(BusinessTrip.destination, func.count().label("trip_count"))
+        _in_period(query, date_from, date_to)
         .group_by(BusinessTrip.destination)
         .order_by(func.count().desc())
         .limit(limit)
@@ -71,20 +95,113 @@ def get_most_popular_destinations(db: Session, limit: int = 5):
     )
 
 
-def get_average_expense_per_trip(db: Session):
-    """Получить среднюю сумму расходов на одну командировку с использованием NumPy."""
-    query = (
-        db.query(BusinessTrip.id, Expense.amount)
-        .join(Expense, BusinessTrip.id == Expense.business_trip_id)
-        .all()
+def get_average_expense_per_trip(db: Session, date_from=None, date_to=None):
+    """Получить среднюю сумму расходов на одну командировку.
+
+    Сумма всех расходов делится на число командировок, у которых есть расходы,
+    что совпадает со средним по суммам отдельных командировок.
+    """
+    if _use_numpy():
+        return analytics_numpy.get_average_expense_per_trip(db, date_from, date_to)
+    query = db.query(
+        cast(func.sum(Expense.amount_cents).filter(Expense.business_trip_id.isnot(None)), Float)
+        / func.nullif(func.count(func.distinct(Expense.business_trip_id)), 0) / 100.0
     )
-    data = np.array(query)
-    trip_ids = data[:, 0]  # Идентификаторы командировок
-    amounts = data[:, 1].astype(float)  # Суммы расходов
+    average = _expenses_in_period(query, date_from, date_to).scalar()
+    return average or 0.0
 
-    # Суммируем расходы по каждой командировке
-    unique_trip_ids, trip_expenses = np.unique(trip_ids, return_inverse=True)
-    trip_expenses = np.bincount(trip_expenses, weights=amounts)
 
-    # Вычисляем среднее значение
-    return np.mean(trip_expenses) if len(trip_expenses) > 0 else 0.0
+def _top(counter: dict, limit: int):
+    return sorted(counter.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def get_analytics_snapshot(db: Session, limit: int = 5, date_from=None, date_to=None):
+    """Получить все показатели аналитики за один запрос к БД.
+
+    Расходы один раз агрегируются в CTE по (командировка, тип расхода),
+    результат соединяется с командировками, сотрудниками и типами расходов,
+    а все шесть показателей вычисляются из полученных строк. Если задан
+    период, и CTE, и командировки ограничиваются датой начала командировки.
+    """
+    expense_totals = _expenses_in_period(
+        db.query(
+            Expense.business_trip_id,
+            Expense.expense_type_id,
+            func.sum(Expense.amount_cents).label("total"),
+        ),
+        date_from, date_to,
+    )
+    expense_totals = (
+        expense_totals
+        .group_by(Expense.business_trip_id, Expense.expense_type_id)
+        .cte("expense_totals")
+    )
+    rows = _in_period(
+        db.query(
+            BusinessTrip.id,
+            Employee.fio,
+            BusinessTrip.destination,
+            ExpenseType.name,
+            expense_totals.c.total,
+        )
+        .outerjoin(Employee, Employee.id == BusinessTrip.employee_id)
+        .outerjoin(expense_totals, expense_totals.c.business_trip_id == BusinessTrip.id)
+        .outerjoin(ExpenseType, ExpenseType.id == expense_totals.c.expense_type_id),
+        date_from, date_to,
+    ).all()
+
+    # Суммы накапливаются в целых копейках и переводятся в рубли в конце
+    total_expenses = 0
+    by_employee, by_expense_type, by_trip = {}, {}, {}
+    trips_by_employee, destination_by_trip = {}, {}
+    for trip_id, fio, destination, expense_type, total in rows:
+        destination_by_trip[trip_id] = destination
+        if fio is not None:
+            trips_by_employee.setdefault(fio, set()).add(trip_id)
+        if total is None:
+            continue
+        total_expenses += total
+        by_trip[trip_id] = by_trip.get(trip_id, 0) + total
+        if fio is not None:
+            by_employee[fio] = by_employee.get(fio, 0) + total
+        if expense_type is not None:
+            by_expense_type[expense_type] = by_expense_type.get(
+                expense_type, 0) + total
+
+    destinations = {}
+    for destination in destination_by_trip.values():
+        destinations[destination] = destinations.get(destination, 0) + 1
+    trip_counts = {fio: len(trips) for fio, trips in trips_by_employee.items()}
+
+    return {
+        "total_expenses": total_expenses / 100,
+        "expenses_by_employee": sorted((fio, total / 100) for fio, total in by_employee.items()),
+        "expenses_by_expense_type": sorted((name, total / 100) for name, total in by_expense_type.items()),
+        "employees_with_most_trips": _top(trip_counts, limit),
+        "most_popular_destinations": _top(destinations, limit),
+        "average_expense_per_trip": sum(by_trip.values()) / len(by_trip) / 100 if by_trip else 0.0,
+    }
+
+
+def get_expenses_by_period(db: Session, period: str = "month", date_from=None, date_to=None):
+    """Получить расходы по периодам (день, неделя, месяц, квартал) начала командировок.
+
+    Возвращает список (начало периода YYYY-MM-DD, сумма расходов, число
+    расходов, число командировок) в порядке периодов. Периоды без
+    командировок в список не попадают.
+    """
+    period_start = periods.bucket(
+        BusinessTrip.start_trip, period, db.get_bind().dialect.name).label("period")
+    query = (
+        db.query(
+            period_start,
+            func.coalesce(func.sum(Expense.amount_cents), 0),
+            func.count(Expense.id),
+            func.count(func.distinct(BusinessTrip.id)),
+        )
+        .select_from(BusinessTrip)
+        .outerjoin(Expense, Expense.business_trip_id == BusinessTrip.id)
+    )
+    rows = _in_period(query, date_from, date_to).group_by(period_start).order_by(period_start).all()
+    return [(str(start), total / 100, expense_count, trip_count)
+            for start, total, expense_count, trip_count in rows]
@@ -0,0 +1,161 @@
+"""Журнал медленных SQL-запросов.
+
+Запрос, который выполнялся дольше порога, записывается в журнал одной
+JSON-строкой: время, длительность, маршрут API, из которого он выполнен,
+текст, параметры и план. План снимается сразу после запроса на том же
+соединении: EXPLAIN QUERY PLAN для SQLite и EXPLAIN ANALYZE для PostgreSQL
+(только для SELECT: EXPLAIN ANALYZE выполняет запрос еще раз).
+
+Журнал ротируется по размеру; последние записи отдает GET /admin/slow_queries.
+Параметры берутся из переменных окружения:
+
+    SLOW_QUERY_MS               порог в миллисекундах (по умолчанию 500;
+                                пустое значение отключает журнал)
+    SLOW_QUERY_LOG              файл журнала (по умолчанию ./logs/slow_queries.log)
+    SLOW_QUERY_LOG_MAX_BYTES, SLOW_QUERY_LOG_BACKUPS
+                                размер файла и число старых файлов
+    SLOW_QUERY_EXPLAIN          0 — не снимать планы
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+from . import metrics
+
+SLOW_QUERY_MS = os.getenv("SLOW_QUERY_MS", "500")
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "./logs/slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 2 ** 20)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1").lower() in ("1", "true", "yes")
+
+# Сколько строк параметров executemany сохраняется в журнале
+MAX_PARAMETER_ROWS = 10
+
+
+def _plan_sqlite(cursor, statement, parameters) -> str:
+    cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    depth, lines = {0: -1}, []
+    for node_id, parent, _, detail in cursor.fetchall():
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return "\n".join(lines)
+
+
+def _plan_postgresql(cursor, statement, parameters) -> str:
+    # Ошибка внутри транзакции PostgreSQL прерывает ее: план снимается в точке сохранения
+    cursor.execute("SAVEPOINT slow_query_plan")
+    try:
+        cursor.execute(f"EXPLAIN ANALYZE {statement}", parameters)
+        return "\n".join(row[0] for row in cursor.fetchall())
+    except Exception:
+        cursor.execute("ROLLBACK TO SAVEPOINT slow_query_plan")
+        raise
+    finally:
+        cursor.execute("RELEASE SAVEPOINT slow_query_plan")
+
+
+PLANNERS = {"sqlite": _plan_sqlite, "postgresql": _plan_postgresql}
+
+
+def _is_select(statement: str) -> bool:
+    return statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "WITH")
+
+
+class SlowQueryLog:
+    """Порог, запись и чтение журнала медленных запросов."""
+
+    def __init__(self, path: str = SLOW_QUERY_LOG, threshold_ms: Optional[float] = None,
+                 max_bytes: int = SLOW_QUERY_LOG_MAX_BYTES, backups: int = SLOW_QUERY_LOG_BACKUPS,
+                 explain: bool = SLOW_QUERY_EXPLAIN):
+        self._handler: Optional[RotatingFileHandler] = None
+        self._lock = threading.Lock()
+        self.configure(path=path, threshold_ms=threshold_ms, max_bytes=max_bytes,
+                       backups=backups, explain=explain)
+
+    def configure(self, **settings):
+        """Меняет параметры журнала (path, threshold_ms, max_bytes, backups, explain);
+        threshold_ms=None отключает журнал."""
+        with self._lock:
+            for name, value in settings.items():
+                if name not in ("path", "threshold_ms", "max_bytes", "backups", "explain"):
+                    raise TypeError(f"Unknown slow query log setting: {name}")
+                setattr(self, name, value)
+            if self._handler is not None:
+                self._handler.close()
+                self._handler = None
+
+    def is_slow(self, seconds: float) -> bool:
+        return self.threshold_ms is not None and seconds * 1000 >= self.threshold_ms
+
+    def _write(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._handler is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes,
+                                                    backupCount=self.backups, encoding="utf-8")
+            self._handler.emit(logging.makeLogRecord({"msg": line, "levelno": logging.WARNING}))
+
+    def _plan(self, conn, statement, parameters, executemany, context) -> Optional[str]:
+        planner = PLANNERS.get(conn.dialect.name)
+        if (not self.explain or planner is None or executemany or not _is_select(statement)
+                or context.execution_options.get("stream_results")):
+            return None
+        # Сырой курсор DBAPI: план не проходит через события движка и не попадает в метрики
+        cursor = conn.connection.cursor()
+        try:
+            return planner(cursor, statement, parameters)
+        except Exception as e:
+            return f"EXPLAIN failed: {type(e).__name__}: {e}"
+        finally:
+            cursor.close()
+
+    def record(self, conn, statement: str, parameters, seconds: float, executemany: bool, context):
+        """Записывает медленный запрос в журнал вместе с маршрутом и планом."""
+        timings = metrics.current()
+        plan = self._plan(conn, statement, parameters, executemany, context)
+        if executemany:
+            parameters = {"rows": len(parameters), "first": list(parameters[:MAX_PARAMETER_ROWS])}
+        self._write({
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "duration_ms": round(seconds * 1000, 3),
+            "route": f"{timings.method} {timings.route}" if timings is not None else None,
+            "statement": statement,
+            "parameters": parameters,
+            "executemany": executemany,
+            "plan": plan,
+        })
+
+    def entries(self, limit: int = 100, route: Optional[str] = None, min_ms: Optional[float] = None,
+                statement: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Последние записи журнала (сначала новые) с фильтрами по маршруту,
+        длительности и подстроке текста запроса."""
+        paths = [self.path] + [f"{self.path}.{index}" for index in range(1, self.backups + 1)]
+        result = []
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as file:
+                lines = file.readlines()
+            for line in reversed(lines):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if route is not None and entry.get("route") != route:
+                    continue
+                if min_ms is not None and entry["duration_ms"] < min_ms:
+                    continue
+                if statement is not None and statement.lower() not in entry["statement"].lower():
+                    continue
+                result.append(entry)
+                if len(result) >= limit:
+                    return result
+        return result
+
+
+slow_query_log = SlowQueryLog(threshold_ms=float(SLOW_QUERY_MS) if SLOW_QUERY_MS else None)
@@ -0,0 +1,89 @@
+"""Версии данных таблиц.
+
+Для каждой таблицы в data_versions хранится счетчик, который увеличивается
+в той же транзакции, что и изменение таблицы. Поэтому по версии можно
+понять, изменились ли данные, не читая их: она используется как часть
+ключа кэша готовых отчетов и для ETag ответов GET (routers/etag.py).
+
+Изменения через unit of work учитываются автоматически после flush,
+операции в обход него (массовые вставки и удаления, закрытие периодов)
+вызывают bump сами.
+"""
+from typing import Dict, Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from models import BusinessTrip, ClosedPeriod, DataVersion, Employee, Expense, ExpenseType
+
+# Таблицы исходных данных: их общая версия — версия данных отчетов и аналитики
+TRACKED_TABLES = tuple(model.__tablename__ for model in (Employee, ExpenseType, BusinessTrip, Expense))
+# Закрытие месяца не меняет исходные данные, но меняет список закрытых периодов
+VERSIONED_TABLES = TRACKED_TABLES + (ClosedPeriod.__tablename__,)
+
+# Удаление строки каскадом удаляет строки этих таблиц (cascade="all, delete-orphan"),
+# а каскадные объекты до flush в session.deleted не попадают.
+CASCADES = {
+    "employees": ("business_trips", "expenses"),
+    "business_trips": ("expenses",),
+    "expense_types": ("expenses",),
+}
+
+
+def bump(connection: Connection, tables: Iterable[str]):
+    """Увеличивает версии указанных таблиц в текущей транзакции.
+
+    Одна команда INSERT ... ON CONFLICT DO UPDATE: строка еще не менявшейся
+    таблицы создается без гонки между параллельными транзакциями.
+    """
+    tables = sorted(set(tables) & set(VERSIONED_TABLES))
+    if not tables:
+        return
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(DataVersion).values([{"table_name": table, "version": 1} for table in tables])
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[DataVersion.table_name], set_={"version": DataVersion.version + 1}))
+
+
+def get_versions(connection: Connection, tables: Iterable[str] = TRACKED_TABLES) -> Dict[str, int]:
+    """Текущие версии таблиц; для еще не менявшихся таблиц — 0."""
+    tables = list(tables)
+    versions = dict.fromkeys(tables, 0)
+    versions.update(connection.execute(
+        select(DataVersion.table_name, DataVersion.version)
+        .where(DataVersion.table_name.in_(tables))).all())
+    return versions
+
+
+def data_version(connection: Connection, tables: Iterable[str] = TRACKED_TABLES) -> str:
+    """Версия набора таблиц одной строкой, например "employees.3-expenses.10"."""
+    versions = get_versions(connection, tables)
+    return "-".join(f"{table}.{versions[table]}" for table in sorted(versions))
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_tables(session, flush_context, instances):
+    changed = session.info.setdefault("versions_pending", set())
+    for obj in list(session.new) + list(session.dirty):
+        table = getattr(obj, "__tablename__", None)
+        if table in TRACKED_TABLES:
+            changed.add(table)
+    for obj in session.deleted:
+        table = getattr(obj, "__tablename__", None)
+        if table in TRACKED_TABLES:
+            changed.add(table)
+            changed.update(CASCADES.get(table, ()))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_versions(session, flush_context):
+    changed = session.info.pop("versions_pending", None)
+    if changed:
+        bump(session.connection(), changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tables(session):
+    session.info.pop("versions_pending", None)
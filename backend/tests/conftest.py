@@ -1,15 +1,16 @@
+from contextlib import contextmanager
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker
 from main import app  # Замените на фактическое расположение вашего app
-from database import Base, get_db
+from database import Base, create_db_engine, get_db, get_read_db
+from services.cache import analytics_cache
 
 
 SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./tests/test_db.db"
 
-engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL,
-                       connect_args={"check_same_thread": False})
+engine = create_db_engine(SQLALCHEMY_TEST_DATABASE_URL)
 
 TestingSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine)
@@ -24,6 +25,8 @@ def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+# Реплика в тестах — та же база, иначе записи не видны в GET-запросах
+app.dependency_overrides[get_read_db] = override_get_db
 
 client = TestClient(app)
 
@@ -31,7 +34,23 @@ client = TestClient(app)
 @pytest.fixture(scope="function")
 def setup_database():
     Base.metadata.create_all(bind=engine)
+    analytics_cache.clear()
     db = TestingSessionLocal()
     yield db
     db.close()
     Base.metadata.drop_all(bind=engine)
+
+
+@contextmanager
+def count_queries():
+    """Собирает SQL-запросы, выполненные тестовым движком внутри блока."""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
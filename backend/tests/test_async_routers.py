@@ -0,0 +1,109 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from conftest import setup_database, override_get_db, SQLALCHEMY_TEST_DATABASE_URL
+from database import get_async_db, get_async_read_db, get_db
+from routers import expenses as sync_expenses
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("greenlet")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+from routers.aio import analytics, business_trips, employees, expense_types, expenses  # noqa: E402
+
+# Каждый запрос TestClient выполняется в своем цикле событий, поэтому соединения не переиспользуются
+async_engine = create_async_engine(
+    SQLALCHEMY_TEST_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app = FastAPI()
+for module in (employees, expense_types, business_trips, expenses, analytics):
+    app.include_router(module.router)
+# Синхронный маршрут с тем же префиксом не должен перекрываться асинхронным /{id}
+app.include_router(sync_expenses.router)
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_async_read_db] = override_get_async_db
+app.dependency_overrides[get_db] = override_get_db
+client = TestClient(app)
+
+
+# Тест на полный цикл CRUD через асинхронные обработчики.
+def test_async_crud(setup_database):
+    employee = client.post("/employees/", json={"fio": "Иванов И.И."}).json()
+    assert employee == {"fio": "Иванов И.И.", "id": employee["id"], "business_trips": []}
+    food = client.post("/expense_types/", json={"name": "Питание"}).json()["id"]
+    hotel = client.post("/expense_types/", json={"name": "Проживание"}).json()["id"]
+    assert client.post("/expense_types/", json={"name": "Питание"}).status_code == 400
+
+    trip = client.post("/business_trips/", json={
+        "employee_id": employee["id"], "destination": "Москва",
+        "start_trip": "2024-01-01T00:00:00", "end_trip": "2024-01-05T00:00:00"}).json()
+    assert trip["expenses"] == []
+    expense = client.post("/expenses/", json={
+        "business_trip_id": trip["id"], "expense_type_id": food, "amount": 100.0}).json()
+    assert expense["expense_type"]["name"] == "Питание"
+
+    updated = client.put(f"/expenses/{expense['id']}", json={"expense_type_id": hotel, "amount": 150.0}).json()
+    assert updated["expense_type"]["name"] == "Проживание"
+    assert updated["amount"] == 150.0
+
+    response = client.get("/employees/", params={"limit": 1})
+    assert response.headers["X-Next-Cursor"] == str(employee["id"])
+    assert response.json()[0]["business_trips"][0]["expenses"][0]["amount"] == 150.0
+    assert client.get(f"/employees/{employee['id']}", params={"expand": "none"}).json() == {
+        "fio": "Иванов И.И.", "id": employee["id"]}
+    assert len(client.get("/expenses/", params={"employee_id": employee["id"]}).json()) == 1
+    assert client.get("/business_trips/", params={"destination": "Казань"}).json() == []
+
+    assert client.delete(f"/employees/{employee['id']}").status_code == 200
+    assert client.get(f"/employees/{employee['id']}").status_code == 404
+    assert client.get(f"/expenses/{expense['id']}").status_code == 404
+
+
+# Тест на аналитику через асинхронные обработчики и сброс кэша после записи.
+def test_async_analytics(setup_database):
+    employee_id = client.post("/employees/", json={"fio": "Иванов И.И."}).json()["id"]
+    food = client.post("/expense_types/", json={"name": "Питание"}).json()["id"]
+    trip_id = client.post("/business_trips/", json={
+        "employee_id": employee_id, "destination": "Москва",
+        "start_trip": "2024-01-01T00:00:00", "end_trip": "2024-01-05T00:00:00"}).json()["id"]
+    assert client.get("/analytics/total_expenses").json() == 0.0
+
+    client.post("/expenses/", json={"business_trip_id": trip_id, "expense_type_id": food, "amount": 300.0})
+    assert client.get("/analytics/total_expenses").json() == 300.0
+    assert client.get("/analytics/expenses_by_employee").json() == [
+        {"employee": "Иванов И.И.", "total_expenses": 300.0}]
+    assert client.get("/analytics/average_expense_per_trip").json() == "300.00"
+    assert client.get("/analytics/most_popular_destinations").json() == [
+        {"destination": "Москва", "trip_count": 1}]
+    assert client.get("/analytics/all_analytics").json()["total_expenses"] == 300.0
+    assert client.get("/analytics/total_expenses", params={"from": "2024-02-01"}).json() == 0.0
+    assert client.get("/analytics/expenses_by_period", params={"period": "quarter"}).json() == [
+        {"period": "2024-01-01", "total_expenses": 300.0, "expense_count": 1, "trip_count": 1}]
+
+
+# Тест на то, что маршрут /bulk синхронного роутера доступен рядом с асинхронным /{id}.
+def test_async_routes_do_not_shadow_bulk(setup_database):
+    response = client.request("DELETE", "/expenses/bulk", json={"ids": [1]})
+    assert response.status_code == 200
+    assert response.json() == {"deleted": [], "not_found": [1]}
+
+
+# Тест на ETag и ответ 304 асинхронных обработчиков.
+def test_async_conditional_get(setup_database):
+    response = client.get("/expense_types/")
+    etag = response.headers["ETag"]
+    assert client.get("/expense_types/", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/analytics/total_expenses", headers={"If-None-Match": etag}).status_code == 200
+
+    client.post("/expense_types/", json={"name": "Питание"})
+    response = client.get("/expense_types/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,23 @@
+from conftest import client
+from benchmarks import bench_api
+
+
+# Тест на то, что набор замеров покрывает все маршруты API и все они отвечают без ошибок.
+def test_bench_api_covers_all_routes():
+    results = bench_api.run([300], repeat=1)
+
+    assert results["missing"] == []
+    failed = [row["name"] for row in results["results"]
+              if row["kind"] == "endpoint" and max(row["status"]) >= 400]
+    assert failed == []
+    assert any(row["kind"] == "function" for row in results["results"])
+    # Переопределения зависимостей тестов восстановлены
+    assert client.get("/analytics/cache_stats").status_code == 200
+
+
+# Тест на обнаружение регрессии при сравнении двух запусков.
+def test_bench_api_compare():
+    old = {"results": [{"size": 10, "kind": "endpoint", "name": "GET /x", "median_ms": 10.0}]}
+    new = {"results": [{"size": 10, "kind": "endpoint", "name": "GET /x", "median_ms": 15.0}]}
+    assert len(bench_api.compare(old, new, 1.2)) == 1
+    assert bench_api.compare(old, new, 2.0) == []
@@ -128,3 +128,71 @@ def test_delete_business_trip(setup_database):
 def test_delete_business_trip_not_found(setup_database):
     response = client.delete("/business_trips/999")
     assert response.status_code == 404
+
+
+# Тест на фильтрацию поездок по сотруднику, направлению и датам.
+def test_read_business_trips_filters(setup_database):
+    setup_database.add_all([
+        models.BusinessTrip(employee_id=1, destination="City A", start_trip=datetime(
+            2023, 1, 1), end_trip=datetime(2023, 1, 5)),
+        models.BusinessTrip(employee_id=1, destination="City B", start_trip=datetime(
+            2023, 2, 1), end_trip=datetime(2023, 2, 5)),
+        models.BusinessTrip(employee_id=2, destination="City A", start_trip=datetime(
+            2023, 3, 1), end_trip=datetime(2023, 3, 5)),
+    ])
+    setup_database.commit()
+
+    def destinations(**params):
+        response = client.get("/business_trips/", params=params)
+        assert response.status_code == 200
+        return [(item["employee_id"], item["destination"]) for item in response.json()]
+
+    assert destinations(employee_id=1) == [(1, "City A"), (1, "City B")]
+    assert destinations(destination="City A") == [(1, "City A"), (2, "City A")]
+    assert destinations(start_from="2023-02-01T00:00:00") == [(1, "City B"), (2, "City A")]
+    assert destinations(end_to="2023-02-05T00:00:00") == [(1, "City A"), (1, "City B")]
+    assert destinations(employee_id=1, start_from="2023-01-15T00:00:00", end_to="2023-03-01T00:00:00") == [
+        (1, "City B")]
+
+
+# Тест на массовое создание и удаление поездок.
+def test_business_trips_bulk(setup_database):
+    from conftest import engine
+    from services import rollups
+
+    items = [
+        {"employee_id": 1, "destination": "City A",
+         "start_trip": "2023-01-01T00:00:00", "end_trip": "2023-01-05T00:00:00"},
+        {"employee_id": 1, "destination": "City B", "start_trip": "не дата",
+         "end_trip": "2023-01-05T00:00:00"},
+        {"employee_id": 2, "destination": "City A",
+         "start_trip": "2023-02-01T00:00:00", "end_trip": "2023-02-05T00:00:00"},
+    ]
+    results = client.post("/business_trips/bulk", json=items).json()
+    assert [result["id"] is not None for result in results] == [True, False, True]
+    assert client.get("/analytics/most_popular_destinations").json() == [
+        {"destination": "City A", "trip_count": 2}]
+
+    trip_id = results[0]["id"]
+    expense_type = client.post("/expense_types/", json={"name": "Type A"}).json()
+    client.post("/expenses/", json={
+        "business_trip_id": trip_id, "expense_type_id": expense_type["id"], "amount": 5.0})
+    response = client.request("DELETE", "/business_trips/bulk", json={"ids": [trip_id]})
+    assert response.json() == {"deleted": [trip_id], "not_found": []}
+    assert client.get("/expenses/").json() == []
+    with engine.connect() as connection:
+        assert rollups.check(connection) == []
+
+    # Расходы, оставшиеся без командировки, не удаляются вместе с ненайденными id
+    trip_id = results[2]["id"]
+    client.post("/expenses/", json={
+        "business_trip_id": trip_id, "expense_type_id": expense_type["id"], "amount": 7.0})
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DELETE FROM business_trips WHERE id = ?", (trip_id,))
+        rollups.refresh(connection, employee_ids={2}, destinations={"City A"})
+        assert rollups.check(connection) == []
+    response = client.request("DELETE", "/business_trips/bulk", json={"ids": [trip_id]})
+    assert response.json() == {"deleted": [], "not_found": [trip_id]}
+    assert len(client.get("/expenses/").json()) == 1
+    with engine.connect() as connection:
+        assert rollups.check(connection) == []
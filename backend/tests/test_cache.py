@@ -0,0 +1,54 @@
+from services.cache import TTLCache, analytics_cache
+from conftest import setup_database, client
+
+
+# Тест на вытеснение давно не использованной записи.
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats()["evictions"] == 1
+
+
+# Тест на истечение времени жизни записи.
+def test_ttl_cache_expiration(mocker):
+    now = mocker.patch("services.cache.time.monotonic", return_value=100.0)
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+    now.return_value = 104.0
+    assert cache.get("a") == (True, 1)
+    now.return_value = 106.0
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["size"] == 0
+
+
+# Тест на то, что результат, посчитанный до сброса, не сохраняется.
+def test_ttl_cache_skips_stale_results():
+    cache = TTLCache()
+    generation = cache._generation
+    cache.clear()
+    cache.set("a", 1, generation)
+    assert cache.get("a") == (False, None)
+
+
+# Тест на попадания в кэш и его сброс при изменении данных через API.
+def test_analytics_cache_invalidated_on_write(setup_database):
+    assert client.get("/analytics/total_expenses").json() == 0.0
+    assert client.get("/analytics/total_expenses").json() == 0.0
+    stats = client.get("/analytics/cache_stats").json()
+    assert stats["hits"] >= 1 and stats["size"] >= 1
+
+    expense_type = client.post("/expense_types/", json={"name": "Питание"}).json()
+    employee = client.post("/employees/", json={"fio": "Иванов И.И."}).json()
+    trip = client.post("/business_trips/", json={
+        "employee_id": employee["id"], "destination": "Москва",
+        "start_trip": "2023-01-01T00:00:00", "end_trip": "2023-01-05T00:00:00"}).json()
+    client.post("/expenses/", json={
+        "business_trip_id": trip["id"], "expense_type_id": expense_type["id"], "amount": 75.0})
+
+    assert client.get("/analytics/total_expenses").json() == 75.0
+    assert analytics_cache.stats()["invalidations"] > stats["invalidations"]
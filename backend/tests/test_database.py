@@ -0,0 +1,38 @@
+from sqlalchemy import text
+from database import async_url, create_db_engine, engine_options
+
+
+# Тест на PRAGMA профиля SQLite для каждого нового соединения.
+def test_sqlite_profile_pragmas(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -64 * 1024
+    engine.dispose()
+
+    memory = create_db_engine("sqlite://")
+    with memory.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "memory"
+
+
+# Тест на параметры пула и тайм-ауты из переменных окружения.
+def test_engine_options_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "1500")
+    options = engine_options("postgresql://user:secret@db/trips")
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == 20
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"]["options"] == "-c statement_timeout=1500"
+
+    options = engine_options("postgresql+asyncpg://user:secret@db/trips")
+    assert options["connect_args"]["server_settings"] == {"statement_timeout": "1500"}
+    assert "pool_size" not in engine_options("sqlite://")
+
+
+# Тест на выбор асинхронного драйвера по адресу базы.
+def test_async_url():
+    assert async_url("sqlite:///./trip.db") == "sqlite+aiosqlite:///./trip.db"
+    assert async_url("postgresql://user:secret@db/trips") == "postgresql+asyncpg://user:secret@db/trips"
@@ -105,3 +105,50 @@ def test_delete_employee(setup_database):
 def test_delete_employee_not_found(setup_database):
     response = client.delete("/employees/999")
     assert response.status_code == 404
+
+
+# Тест на курсорную пагинацию списка сотрудников.
+def test_read_employees_pagination(setup_database):
+    setup_database.add_all([models.Employee(fio=f"Employee {i}") for i in range(5)])
+    setup_database.commit()
+
+    response = client.get("/employees/", params={"limit": 2})
+    assert [item["fio"] for item in response.json()] == ["Employee 0", "Employee 1"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get("/employees/", params={"limit": 2, "after_id": cursor})
+    assert [item["fio"] for item in response.json()] == ["Employee 2", "Employee 3"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get("/employees/", params={"limit": 2, "after_id": cursor})
+    assert [item["fio"] for item in response.json()] == ["Employee 4"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+# Тест на ограничение размера страницы.
+def test_read_employees_limit_too_large(setup_database):
+    response = client.get("/employees/", params={"limit": 100000})
+    assert response.status_code == 422
+
+
+# Тест на ответы разной глубины вложенности (параметр expand).
+def test_read_employees_expand(setup_database):
+    from datetime import datetime
+    employee = models.Employee(fio="Employee A")
+    trip = models.BusinessTrip(employee=employee, destination="City A", start_trip=datetime(
+        2023, 1, 1), end_trip=datetime(2023, 1, 5))
+    setup_database.add_all([employee, trip])
+    setup_database.commit()
+
+    shallow = client.get("/employees/", params={"expand": "none"}).json()
+    assert shallow == [{"id": employee.id, "fio": "Employee A"}]
+
+    with_trips = client.get(f"/employees/{employee.id}", params={"expand": "business_trips"}).json()
+    assert with_trips["business_trips"][0]["destination"] == "City A"
+    assert "expenses" not in with_trips["business_trips"][0]
+
+    full = client.get(f"/employees/{employee.id}").json()
+    assert full["business_trips"][0]["expenses"] == []
+
+    response = client.get("/employees/", params={"expand": "unknown"})
+    assert response.status_code == 422
@@ -0,0 +1,59 @@
+from conftest import setup_database, client, count_queries
+
+
+def get(url, etag=None, **kwargs):
+    headers = {"If-None-Match": etag} if etag else {}
+    return client.get(url, headers=headers, **kwargs)
+
+
+# Тест на 304 без запроса данных, пока версия таблиц не изменилась.
+def test_not_modified_skips_query(setup_database):
+    client.post("/expense_types/", json={"name": "Питание"})
+    response = get("/expense_types/")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    with count_queries() as statements:
+        response = get("/expense_types/", etag)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 1 and "data_versions" in statements[0]
+
+    # Слабый ETag и список ETag тоже совпадают
+    assert get("/expense_types/", f'"other", W/{etag}').status_code == 304
+    assert get("/expense_types/", "*").status_code == 304
+
+
+# Тест на смену ETag после записи только в таблицах, от которых зависит ответ.
+def test_etag_follows_table_versions(setup_database):
+    etag = get("/expense_types/").headers["ETag"]
+    employees_etag = get("/employees/").headers["ETag"]
+
+    client.post("/employees/", json={"fio": "Иванов И.И."})
+    assert get("/expense_types/", etag).status_code == 304
+    response = get("/employees/", employees_etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != employees_etag
+
+    type_id = client.post("/expense_types/", json={"name": "Питание"}).json()["id"]
+    assert get("/expense_types/", etag).status_code == 200
+    # Ошибка не получает ETag
+    assert "ETag" not in get("/expense_types/999999").headers
+    assert "ETag" in get(f"/expense_types/{type_id}").headers
+
+
+# Тест на ETag потоковых ответов, аналитики и списка закрытых периодов.
+def test_conditional_reports_and_periods(setup_database):
+    for url in ("/export/expense_types", "/analytics/report/csv/all", "/analytics/all_analytics",
+                "/analytics/periods"):
+        etag = get(url).headers["ETag"]
+        assert get(url, etag).status_code == 304, url
+
+    analytics_etag = get("/analytics/total_expenses").headers["ETag"]
+    periods_etag = get("/analytics/periods").headers["ETag"]
+    assert client.post("/analytics/periods/2020-01/close").status_code == 200
+    assert get("/analytics/periods", periods_etag).status_code == 200
+    assert get("/analytics/total_expenses", analytics_etag).status_code == 200
+    assert client.post("/analytics/periods/2020-01/reopen").status_code == 200
@@ -131,3 +131,69 @@ def test_delete_expense(setup_database):
 def test_delete_expense_not_found(setup_database):
     response = client.delete("/expenses/999")
     assert response.status_code == 404
+
+
+# Тест на фильтрацию расходов по сумме, типу и сотруднику.
+def test_read_expenses_filters(setup_database):
+    expense_type, business_trip = create_test_data(setup_database)
+    other_trip = models.BusinessTrip(employee_id=2, destination="Other Destination",
+                                     start_trip=datetime(2023, 2, 1), end_trip=datetime(2023, 2, 5))
+    other_type = models.ExpenseType(name="Other Type")
+    setup_database.add_all([other_trip, other_type])
+    setup_database.commit()
+    setup_database.add_all([
+        models.Expense(business_trip_id=business_trip.id,
+                       expense_type_id=expense_type.id, amount=100.00),
+        models.Expense(business_trip_id=business_trip.id,
+                       expense_type_id=expense_type.id, amount=200.00),
+        models.Expense(business_trip_id=other_trip.id,
+                       expense_type_id=other_type.id, amount=300.00),
+    ])
+    setup_database.commit()
+
+    def amounts(**params):
+        response = client.get("/expenses/", params=params)
+        assert response.status_code == 200
+        return [item["amount"] for item in response.json()]
+
+    assert amounts(min_amount=150) == [200.0, 300.0]
+    assert amounts(max_amount=250) == [100.0, 200.0]
+    assert amounts(expense_type_id=expense_type.id) == [100.0, 200.0]
+    assert amounts(employee_id=2) == [300.0]
+    assert amounts(business_trip_id=business_trip.id, min_amount=150) == [200.0]
+
+
+# Тест на массовое создание расходов с ошибочным элементом в пакете.
+def test_create_expenses_bulk(setup_database):
+    expense_type, business_trip = create_test_data(setup_database)
+    items = [
+        {"business_trip_id": business_trip.id, "expense_type_id": expense_type.id, "amount": 10.0},
+        {"business_trip_id": business_trip.id, "expense_type_id": expense_type.id, "amount": "много"},
+        {"business_trip_id": business_trip.id, "expense_type_id": expense_type.id, "amount": 30.0},
+    ]
+    response = client.post("/expenses/bulk", json=items)
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[0]["errors"] is None and results[2]["errors"] is None
+    assert results[1]["id"] is None
+    assert results[1]["errors"][0]["loc"] == ["amount"]
+
+    created = client.get(f"/expenses/{results[2]['id']}").json()
+    assert created["amount"] == 30.0
+    assert client.get("/analytics/total_expenses").json() == 40.0
+
+
+# Тест на массовое удаление расходов.
+def test_delete_expenses_bulk(setup_database):
+    expense_type, business_trip = create_test_data(setup_database)
+    ids = [result["id"] for result in client.post("/expenses/bulk", json=[
+        {"business_trip_id": business_trip.id, "expense_type_id": expense_type.id, "amount": 10.0},
+        {"business_trip_id": business_trip.id, "expense_type_id": expense_type.id, "amount": 20.0},
+    ]).json()]
+
+    response = client.request("DELETE", "/expenses/bulk", json={"ids": [ids[0], 999]})
+    assert response.status_code == 200
+    assert response.json() == {"deleted": [ids[0]], "not_found": [999]}
+    assert client.get(f"/expenses/{ids[0]}").status_code == 404
+    assert client.get("/analytics/total_expenses").json() == 20.0
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from datetime import datetime
+import pytest
+import models
+from conftest import setup_database, client
+
+
+def create_trips(db, count):
+    db.add_all([
+        models.BusinessTrip(employee_id=1, destination=f"City {i}" if i % 2 else None,
+                            start_trip=datetime(2023, 1, 1), end_trip=datetime(2023, 1, 5))
+        for i in range(count)
+    ])
+    db.commit()
+
+
+# Тест на выгрузку в CSV.
+def test_export_csv(setup_database):
+    create_trips(setup_database, 3)
+    response = client.get("/export/business_trips", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["destination"] for row in rows] == ["", "City 1", ""]
+    assert rows[0]["start_trip"] == "2023-01-01T00:00:00"
+
+
+# Тест на выгрузку в NDJSON порциями больше одной.
+def test_export_ndjson_multiple_chunks(setup_database, monkeypatch):
+    from services import export
+    monkeypatch.setattr(export, "CHUNK_SIZE", 2)
+    create_trips(setup_database, 5)
+    chunks = list(export.stream_table(setup_database, models.BusinessTrip.__table__, "ndjson"))
+    assert len(chunks) == 3
+    response = client.get("/export/business_trips", params={"format": "ndjson"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [1, 2, 3, 4, 5]
+    assert rows[1]["destination"] == "City 1"
+
+
+# Тест на выгрузку в Parquet и Arrow (при наличии pyarrow).
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_arrow_formats(setup_database, fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    create_trips(setup_database, 3)
+    response = client.get("/export/business_trips", params={"format": fmt})
+    assert response.status_code == 200
+    if fmt == "parquet":
+        table = pq.read_table(io.BytesIO(response.content))
+    else:
+        table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("destination").to_pylist() == [None, "City 1", None]
+    assert table.column("start_trip").to_pylist()[0] == datetime(2023, 1, 1)
+
+
+# Тест на неизвестный формат выгрузки.
+def test_export_invalid_format(setup_database):
+    assert client.get("/export/expenses", params={"format": "xml"}).status_code == 422
+
+
+# Тест на выгрузку сумм расходов в рублях под прежним именем amount.
+def test_export_expense_amounts(setup_database):
+    create_trips(setup_database, 1)
+    expense_type = models.ExpenseType(name="Проживание")
+    setup_database.add_all([
+        models.Expense(business_trip_id=1, expense_type=expense_type, amount=amount)
+        for amount in (100.5, 0.1)])
+    setup_database.commit()
+
+    rows = list(csv.DictReader(io.StringIO(client.get("/export/expenses", params={"format": "csv"}).text)))
+    assert "amount_cents" not in rows[0]
+    assert [row["amount"] for row in rows] == ["100.5", "0.1"]
+    response = client.get("/export/expenses", params={"format": "ndjson"})
+    assert [json.loads(line)["amount"] for line in response.text.splitlines()] == [100.5, 0.1]
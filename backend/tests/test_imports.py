@@ -0,0 +1,69 @@
+from datetime import datetime
+import json
+import models
+from conftest import setup_database, client, engine
+from services import rollups
+from services.importer import iter_lines
+
+CSV_DATA = """fio,destination,start_trip,end_trip,expense_type,amount
+Иванов И.И.,Москва,2023-01-01T00:00:00,2023-01-05T00:00:00,Питание,100.5
+Иванов И.И.,Москва,2023-01-01T00:00:00,2023-01-05T00:00:00,Проживание,300
+Петров П.П.,,2023-02-01T00:00:00,2023-02-03T00:00:00,Питание,50
+Петров П.П.,Казань,не дата,2023-02-03T00:00:00,Питание,50
+"""
+
+
+# Тест на разбиение потока байтов на строки по границам фрагментов.
+def test_iter_lines_splits_across_chunks():
+    data = "первая\nвторая\r\nтретья".encode("utf-8")
+    chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+    assert list(iter_lines(chunks)) == ["первая\n", "вторая\r\n", "третья"]
+
+
+# Тест на импорт CSV: сопоставление с существующими записями и отклонение ошибочных строк.
+def test_import_expenses_csv(setup_database):
+    employee = models.Employee(fio="Иванов И.И.")
+    trip = models.BusinessTrip(employee=employee, destination="Москва",
+                               start_trip=datetime(2023, 1, 1), end_trip=datetime(2023, 1, 5))
+    setup_database.add_all([employee, trip])
+    setup_database.commit()
+
+    response = client.post("/import/expenses", params={"batch_size": 0},
+                           content=CSV_DATA.encode("utf-8"))
+    assert response.status_code == 422
+
+    response = client.post("/import/expenses", params={"batch_size": 2},
+                           content=CSV_DATA.encode("utf-8"))
+    assert response.status_code == 200
+    result = response.json()
+    assert result["processed"] == 4
+    assert result["imported"] == 3
+    assert result["rejected"] == 1
+    assert result["rejects"][0]["record"] == 4
+    assert result["employees_created"] == 1
+    assert result["expense_types_created"] == 2
+    assert result["business_trips_created"] == 1
+
+    expenses = client.get("/expenses/", params={"business_trip_id": trip.id}).json()
+    assert sorted(expense["amount"] for expense in expenses) == [100.5, 300.0]
+    trips = client.get("/business_trips/", params={"expand": "none"}).json()
+    assert sorted(str(trip["destination"]) for trip in trips) == ["None", "Москва"]
+    with engine.connect() as connection:
+        assert rollups.check(connection) == []
+
+
+# Тест на импорт NDJSON с некорректной строкой.
+def test_import_expenses_ndjson(setup_database):
+    lines = [
+        json.dumps({"fio": "Сидоров С.С.", "destination": "Сочи", "start_trip": "2023-03-01T00:00:00",
+                    "end_trip": "2023-03-04T00:00:00", "expense_type": "Такси", "amount": 20}),
+        "{не json",
+        json.dumps({"fio": "Сидоров С.С.", "destination": "Сочи", "start_trip": "2023-03-01T00:00:00",
+                    "end_trip": "2023-03-04T00:00:00", "expense_type": "Такси", "amount": 30}),
+    ]
+    response = client.post("/import/expenses", params={"format": "ndjson"},
+                           content="\n".join(lines).encode("utf-8"))
+    result = response.json()
+    assert (result["imported"], result["rejected"], result["business_trips_created"]) == (2, 1, 1)
+    assert result["rejects"][0]["error"].startswith("Invalid JSON")
+    assert client.get("/analytics/total_expenses").json() == 50.0
@@ -0,0 +1,135 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import event, func, select
+from conftest import setup_database
+import models
+from models import BusinessTrip, Employee, Expense, ExpenseType
+from services import rollups, service_analytics
+
+
+def explain(db, statement):
+    """Строки EXPLAIN QUERY PLAN для запроса SQLAlchemy."""
+    sql = str(statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+# Тест на покрывающие индексы при пересчете агрегатов по командировкам и типам расходов.
+def test_rollup_refresh_uses_covering_indexes(setup_database):
+    db = setup_database
+    assert explain(db, rollups._trip_totals_select().where(Expense.business_trip_id.in_([1, 2]))) == [
+        "SEARCH expenses USING COVERING INDEX ix_expenses_business_trip_id_amount_cents (business_trip_id=?)"]
+    assert explain(db, rollups._expense_type_totals_select().where(Expense.expense_type_id.in_([1, 2]))) == [
+        "SEARCH expenses USING COVERING INDEX ix_expenses_expense_type_id_amount_cents (expense_type_id=?)"]
+    plan = explain(db, rollups._employee_totals_select().where(BusinessTrip.employee_id.in_([1, 2])))
+    assert "COVERING INDEX ix_business_trips_employee_id_start_trip (employee_id=?)" in plan[0]
+
+
+# Тест на использование индексов в агрегациях по исходным таблицам.
+def test_analytics_joins_use_indexes(setup_database):
+    db = setup_database
+    by_type = (db.query(ExpenseType.name, func.sum(Expense.amount_cents))
+               .join(Expense, ExpenseType.id == Expense.expense_type_id)
+               .group_by(ExpenseType.name))
+    assert "SEARCH expenses USING COVERING INDEX ix_expenses_expense_type_id_amount_cents (expense_type_id=?)" \
+        in explain(db, by_type.statement)
+
+    by_employee = (db.query(Employee.fio, func.sum(Expense.amount_cents))
+                   .join(BusinessTrip, Employee.id == BusinessTrip.employee_id)
+                   .join(Expense, BusinessTrip.id == Expense.business_trip_id)
+                   .group_by(Employee.fio))
+    plan = explain(db, by_employee.statement)
+    assert not any(line.startswith("SCAN expenses") and "INDEX" not in line for line in plan)
+    assert any("ix_expenses_business_trip_id_amount_cents" in line for line in plan)
+
+    in_period = db.query(BusinessTrip.id).filter(BusinessTrip.start_trip >= "2024-01-01")
+    assert any("INDEX ix_business_trips_start_trip" in line for line in explain(db, in_period.statement))
+
+
+# Тест на то, что аналитика за период читает командировки по индексу даты начала.
+def test_period_analytics_use_start_trip_index(setup_database):
+    db = setup_database
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        service_analytics.get_expenses_by_period(db, "month", date(2024, 1, 1), date(2024, 1, 31))
+        service_analytics.get_total_expenses(db, date(2024, 1, 1), date(2024, 1, 31))
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    for statement, parameters in statements:
+        plan = [row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        assert any("INDEX ix_business_trips_start_trip (start_trip>? AND start_trip<?)" in line
+                   for line in plan), plan
+
+
+# Тест на совпадение схемы после миграций со схемой моделей.
+def test_migrations_match_models(tmp_path):
+    pytest.importorskip("alembic")
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+    import migrations
+    from database import create_db_engine
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    migrations.upgrade(engine)
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), models.Base.metadata) == []
+    engine.dispose()
+
+
+# Тест на миграции базы, созданной по текущим моделям без Alembic.
+def test_migrations_upgrade_schema_created_from_models(tmp_path):
+    pytest.importorskip("alembic")
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    import migrations
+    from database import create_db_engine
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'created.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    head = ScriptDirectory.from_config(migrations.Config(migrations.ALEMBIC_INI)).get_current_head()
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection)
+        assert context.get_current_revision() == head
+        assert compare_metadata(context, models.Base.metadata) == []
+    engine.dispose()
+
+
+# Тест на перевод сумм в копейки миграцией так же, как через API, и пересчет агрегатов.
+def test_migration_converts_amounts_like_api(tmp_path):
+    pytest.importorskip("alembic")
+    import migrations
+    from database import create_db_engine
+
+    amounts = [0.005, 0.005, 0.105, 1.005, 0.145]
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    migrations.upgrade(engine, "0002")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO employees (id, fio) VALUES (1, 'Иванов И.И.')")
+        connection.exec_driver_sql("INSERT INTO expense_types (id, name) VALUES (1, 'Питание')")
+        connection.exec_driver_sql(
+            "INSERT INTO business_trips (id, employee_id, destination, start_trip, end_trip) "
+            "VALUES (1, 1, 'Москва', '2023-01-01 00:00:00', '2023-01-05 00:00:00')")
+        connection.exec_driver_sql(
+            "INSERT INTO expenses (business_trip_id, expense_type_id, amount) VALUES (1, 1, ?)",
+            [(amount,) for amount in amounts])
+        # Агрегаты в рублях, как их вела старая схема
+        connection.exec_driver_sql(
+            "INSERT INTO trip_totals (business_trip_id, total_expenses, expense_count) VALUES (1, ?, ?)",
+            (sum(amounts), len(amounts)))
+        connection.exec_driver_sql(
+            "INSERT INTO expense_type_totals (expense_type_id, total_expenses, expense_count) "
+            "VALUES (1, ?, ?)", (sum(amounts), len(amounts)))
+        connection.exec_driver_sql(
+            "INSERT INTO employee_totals (employee_id, total_expenses, expense_count, trip_count) "
+            "VALUES (1, ?, ?, 1)", (sum(amounts), len(amounts)))
+    migrations.upgrade(engine)
+    with engine.connect() as connection:
+        cents = list(connection.scalars(select(Expense.amount_cents).order_by(Expense.id)))
+        assert cents == [models.to_cents(amount) for amount in amounts]
+        assert rollups.check(connection) == []
+    engine.dispose()
@@ -0,0 +1,42 @@
+import re
+import models
+from conftest import setup_database, client, count_queries
+from services import metrics
+
+
+def server_timing(response):
+    return {name: dict(re.findall(r'(\w+)=("[^"]*"|[\d.]+)', params))
+            for name, params in re.findall(r'(\w+);([^,]*)', response.headers["server-timing"])}
+
+
+# Тест на заголовок Server-Timing с числом и временем SQL-запросов обработчика.
+def test_server_timing_header(setup_database):
+    setup_database.add(models.Employee(fio="Иванов И.И."))
+    setup_database.commit()
+
+    with count_queries() as statements:
+        response = client.get("/employees/")
+    assert response.status_code == 200
+    timing = server_timing(response)
+    assert set(timing) == {"db", "handler", "serialize", "total"}
+    assert timing["db"]["desc"] == f'"{len(statements)} statements"'
+    assert float(timing["handler"]["dur"]) <= float(timing["total"]["dur"])
+
+
+# Тест на гистограммы по шаблону пути маршрута в формате Prometheus.
+def test_metrics_endpoint(setup_database):
+    metrics.reset()
+    client.get("/analytics/all_analytics")
+    client.get("/expenses/12345")
+    client.get("/no-such-path")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/analytics/all_analytics",status="200"} 1' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/expenses/{expense_id}",status="404"} 1' in text
+    assert 'route="unmatched",status="404"' in text
+    assert 'http_request_sql_statements_bucket{method="GET",route="/analytics/all_analytics",le="+Inf"} 1' in text
+    assert re.search(r'http_request_db_seconds_sum\{method="GET",route="/analytics/all_analytics"\} [\d.e-]+', text)
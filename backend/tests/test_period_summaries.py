@@ -0,0 +1,200 @@
+from datetime import date, datetime
+import pytest
+from sqlalchemy import update
+import models
+from conftest import setup_database, client, count_queries, engine
+from services import bulk, period_summaries, service_analytics
+from services.period_summaries import ClosedPeriodError
+
+JANUARY = date(2024, 1, 1)
+TODAY = date(2024, 3, 15)
+
+
+def add_data(db):
+    """Командировки в январе, феврале и марте 2024 года и расход без командировки."""
+    ivanov, petrov = models.Employee(fio="Иванов И.И."), models.Employee(fio="Петров П.П.")
+    food, hotel = models.ExpenseType(name="Питание"), models.ExpenseType(name="Проживание")
+    trips = [
+        models.BusinessTrip(employee=ivanov, destination="Москва",
+                            start_trip=datetime(2024, 1, 10), end_trip=datetime(2024, 1, 12)),
+        models.BusinessTrip(employee=petrov, destination="Казань",
+                            start_trip=datetime(2024, 1, 31, 23, 0), end_trip=datetime(2024, 2, 2)),
+        models.BusinessTrip(employee=ivanov, destination="Москва",
+                            start_trip=datetime(2024, 2, 5), end_trip=datetime(2024, 2, 7)),
+        models.BusinessTrip(employee=petrov, destination="Омск",
+                            start_trip=datetime(2024, 3, 1), end_trip=datetime(2024, 3, 3)),
+    ]
+    db.add_all(trips + [
+        models.Expense(business_trip=trips[0], expense_type=food, amount=100.25),
+        models.Expense(business_trip=trips[0], expense_type=hotel, amount=300.0),
+        models.Expense(business_trip=trips[1], expense_type=food, amount=50.0),
+        models.Expense(business_trip=trips[2], expense_type=hotel, amount=200.0),
+        models.Expense(business_trip=trips[3], expense_type=food, amount=10.0),
+        models.Expense(expense_type=food, amount=1.5),
+    ])
+    db.commit()
+    return trips
+
+
+RANGES = [
+    {},
+    {"date_from": date(2024, 1, 1), "date_to": date(2024, 1, 31)},
+    {"date_from": date(2024, 1, 1), "date_to": date(2024, 2, 10)},
+    {"date_from": date(2024, 1, 15)},
+    {"date_to": date(2024, 3, 31)},
+]
+
+
+def normalized(snapshot):
+    """Снимок аналитики без учета порядка равных мест в рейтингах."""
+    return dict(snapshot, employees_with_most_trips=sorted(snapshot["employees_with_most_trips"]),
+                most_popular_destinations=sorted(snapshot["most_popular_destinations"]))
+
+
+# Тест на совпадение аналитики из итогов закрытых месяцев с расчетом по исходным строкам.
+def test_closed_periods_match_raw_analytics(setup_database):
+    db = setup_database
+    add_data(db)
+    expected = [normalized(service_analytics.get_analytics_snapshot(db, **dates)) for dates in RANGES]
+
+    with engine.begin() as connection:
+        assert period_summaries.close_completed_periods(connection, TODAY) == [JANUARY, date(2024, 2, 1)]
+        assert period_summaries.check(connection) == []
+
+    for dates, snapshot in zip(RANGES, expected):
+        assert normalized(period_summaries.get_analytics_snapshot(db, **dates)) == snapshot
+    assert period_summaries.get_total_expenses(db, date(2024, 1, 1), date(2024, 1, 31)) == 450.25
+    assert period_summaries.get_expenses_by_employee(db, date_to=date(2024, 2, 29)) == [
+        ("Иванов И.И.", 600.25), ("Петров П.П.", 50.0)]
+
+
+# Тест на отдельные показатели: совпадают со снимком и читают только свои итоги.
+def test_closed_period_metrics_query_only_their_data(setup_database):
+    db = setup_database
+    add_data(db)
+    with engine.begin() as connection:
+        period_summaries.close_completed_periods(connection, TODAY)
+
+    for dates in RANGES[1:]:
+        snapshot = normalized(period_summaries.get_analytics_snapshot(db, **dates))
+        assert period_summaries.get_total_expenses(db, **dates) == snapshot["total_expenses"]
+        assert period_summaries.get_expenses_by_employee(db, **dates) == snapshot["expenses_by_employee"]
+        assert period_summaries.get_expenses_by_expense_type(db, **dates) == snapshot["expenses_by_expense_type"]
+        assert sorted(period_summaries.get_employees_with_most_trips(db, **dates)) == \
+            snapshot["employees_with_most_trips"]
+        assert sorted(period_summaries.get_most_popular_destinations(db, **dates)) == \
+            snapshot["most_popular_destinations"]
+        assert period_summaries.get_average_expense_per_trip(db, **dates) == snapshot["average_expense_per_trip"]
+
+    with count_queries() as statements:
+        period_summaries.get_total_expenses(setup_database, date(2024, 1, 1), date(2024, 3, 31))
+    assert statements
+    assert not any("period_" in statement for statement in statements)
+
+
+# Тест на то, что закрытые месяцы читаются из сохраненных итогов, а не по строкам.
+def test_closed_period_totals_are_read_from_partitions(setup_database):
+    db = setup_database
+    add_data(db)
+    with engine.begin() as connection:
+        period_summaries.close_period(connection, JANUARY, TODAY)
+        # Подмена итога видна в ответе только если месяц не пересчитывается
+        connection.execute(update(models.ClosedPeriod).values(total_cents=100))
+
+    assert period_summaries.get_total_expenses(db, date(2024, 1, 1), date(2024, 1, 31)) == 1.0
+    # Неполный месяц всегда считается по строкам
+    assert period_summaries.get_total_expenses(db, date(2024, 1, 1), date(2024, 1, 30)) == 400.25
+    with engine.begin() as connection:
+        assert period_summaries.check(connection)
+        period_summaries.rebuild_period(connection, JANUARY, TODAY)
+        assert period_summaries.check(connection) == []
+    assert period_summaries.get_total_expenses(db, date(2024, 1, 1), date(2024, 1, 31)) == 450.25
+
+
+# Тест на отказ закрыть текущий или уже закрытый месяц.
+def test_close_period_validation(setup_database):
+    with engine.begin() as connection:
+        with pytest.raises(ValueError):
+            period_summaries.close_period(connection, date(2024, 3, 1), TODAY)
+        period_summaries.close_period(connection, JANUARY, TODAY)
+        with pytest.raises(ValueError):
+            period_summaries.close_period(connection, JANUARY, TODAY)
+        assert period_summaries.reopen_period(connection, JANUARY)
+        assert not period_summaries.reopen_period(connection, JANUARY)
+
+
+# Тест на запрет изменений в закрытом месяце до его открытия.
+def test_closed_period_rejects_changes(setup_database):
+    db = setup_database
+    trips = add_data(db)
+    with engine.begin() as connection:
+        period_summaries.close_period(connection, JANUARY, TODAY)
+    food_id = trips[0].expenses[0].expense_type_id
+
+    db.add(models.Expense(business_trip_id=trips[0].id, expense_type_id=food_id, amount=1.0))
+    with pytest.raises(ClosedPeriodError):
+        db.commit()
+    db.rollback()
+
+    # Перенос командировки из открытого месяца в закрытый
+    trips[3].start_trip = datetime(2024, 1, 20)
+    with pytest.raises(ClosedPeriodError):
+        db.commit()
+    db.rollback()
+
+    with pytest.raises(ClosedPeriodError):
+        bulk.insert_business_trips(db, [{"employee_id": trips[0].employee_id, "destination": "Омск",
+                                         "start_trip": datetime(2024, 1, 5), "end_trip": datetime(2024, 1, 6)}])
+    db.rollback()
+
+    response = client.delete(f"/employees/{trips[0].employee_id}")
+    assert response.status_code == 409
+    response = client.post("/expenses/", json={
+        "business_trip_id": trips[1].id, "expense_type_id": food_id, "amount": 5.0})
+    assert response.status_code == 409
+    assert client.delete(f"/expenses/{trips[0].expenses[0].id}").status_code == 409
+    assert client.delete(f"/business_trips/{trips[0].id}").status_code == 409
+
+    # Изменения в открытом месяце разрешены
+    assert client.post("/expenses/", json={
+        "business_trip_id": trips[3].id, "expense_type_id": food_id, "amount": 5.0}).status_code == 200
+
+    assert client.post("/analytics/periods/2024-01/reopen").status_code == 200
+    assert client.post("/expenses/", json={
+        "business_trip_id": trips[1].id, "expense_type_id": food_id, "amount": 5.0}).status_code == 200
+
+
+# Тест на управление периодами через API.
+def test_periods_api(setup_database):
+    add_data(setup_database)
+
+    response = client.post("/analytics/periods/2024-01/close")
+    assert response.status_code == 200
+    assert response.json()["total_expenses"] == 450.25
+    assert response.json()["trip_count"] == 2
+    assert client.post("/analytics/periods/2024-01/close").status_code == 409
+    assert client.post("/analytics/periods/2099-01/close").status_code == 409
+    assert client.post("/analytics/periods/январь/close").status_code == 400
+
+    periods = client.get("/analytics/periods").json()
+    assert [(row["period"], row["expense_count"]) for row in periods] == [("2024-01-01", 3)]
+    assert client.get("/analytics/total_expenses", params={"from": "2024-01-01", "to": "2024-01-31"}).json() == 450.25
+    assert client.post("/analytics/periods/2024-01/rebuild").json()["total_expenses"] == 450.25
+
+    assert client.post("/analytics/periods/2024-01/reopen").status_code == 200
+    assert client.post("/analytics/periods/2024-01/reopen").status_code == 404
+    assert client.get("/analytics/periods").json() == []
+
+
+# Тест на отклонение строк импорта, попадающих в закрытый месяц.
+def test_import_rejects_closed_period_rows(setup_database):
+    add_data(setup_database)
+    with engine.begin() as connection:
+        period_summaries.close_period(connection, JANUARY, TODAY)
+
+    data = ("fio,destination,start_trip,end_trip,expense_type,amount\n"
+            "Иванов И.И.,Москва,2024-01-10T00:00:00,2024-01-12T00:00:00,Питание,1\n"
+            "Иванов И.И.,Москва,2024-02-05T00:00:00,2024-02-07T00:00:00,Питание,2\n")
+    result = client.post("/import/expenses", content=data.encode("utf-8")).json()
+    assert result["imported"] == 1
+    assert result["rejects"] == [{"record": 1, "error": "Period 2024-01 is closed, reopen it before changing its data"}]
@@ -0,0 +1,51 @@
+import threading
+import pytest
+from conftest import client
+from routers import admin
+from services import profiler
+
+TOKEN = "secret"
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+# Тест на то, что выборки стеков находят функцию, занимающую поток.
+def test_stack_sampler_finds_busy_function():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    sampler = profiler.StackSampler(interval=0.001)
+    sampler.start()
+    threading.Event().wait(0.2)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    lines = sampler.collapsed().splitlines()
+    assert sampler.samples > 0
+    busy = [line for line in lines if "test_profiler:busy_loop" in line]
+    assert busy and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert busy[0].startswith("threading:_bootstrap;")
+
+
+# Тест на профилирование и снимки памяти через API.
+def test_profile_endpoints(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", TOKEN)
+    headers = {"X-Admin-Token": TOKEN}
+    assert client.get("/debug/profile", params={"seconds": 0.05}).status_code == 401
+
+    response = client.get("/debug/profile", params={"seconds": 0.05, "idle": True}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["x-profile-samples"]) > 0
+    assert response.text
+
+    response = client.get("/debug/memory", params={"seconds": 0.05, "limit": 5}, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) <= 5
+
+    with profiler.profile_lock:
+        assert client.get("/debug/profile", params={"seconds": 0.05}, headers=headers).status_code == 409
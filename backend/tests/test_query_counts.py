@@ -0,0 +1,56 @@
+from datetime import datetime
+import pytest
+import models
+from conftest import setup_database, client, count_queries
+
+# Запросы одного списка: основная выборка плюс по одному на уровень вложенности
+MAX_QUERIES = 4
+
+
+def create_graph(db, employees, trips_per_employee=3, expenses_per_trip=3):
+    expense_types = [models.ExpenseType(name=f"Type {employees}-{i}") for i in range(3)]
+    db.add_all(expense_types)
+    for i in range(employees):
+        employee = models.Employee(fio=f"Employee {i}")
+        for j in range(trips_per_employee):
+            trip = models.BusinessTrip(employee=employee, destination=f"City {j}",
+                                       start_trip=datetime(2023, 1, 1), end_trip=datetime(2023, 1, 5))
+            for k in range(expenses_per_trip):
+                db.add(models.Expense(business_trip=trip,
+                                      expense_type=expense_types[k % 3], amount=10.0))
+        db.add(employee)
+    db.commit()
+
+
+def queries_for(url):
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    # Чтение версии таблиц для ETag — один запрос на любой GET, его не считаем
+    return len([statement for statement in statements if "data_versions" not in statement])
+
+
+# Тест на то, что число SQL-запросов списков не растет с числом строк.
+@pytest.mark.parametrize("url", [
+    "/employees/", "/business_trips/", "/expenses/", "/expense_types/",
+    "/employees/1", "/business_trips/1", "/expenses/1",
+])
+def test_list_endpoints_issue_constant_queries(setup_database, url):
+    create_graph(setup_database, employees=1)
+    small = queries_for(url)
+    create_graph(setup_database, employees=10)
+    large = queries_for(url)
+
+    assert small == large
+    assert large <= MAX_QUERIES
+
+
+# Тест на то, что неразвернутые связи не загружаются.
+@pytest.mark.parametrize("url, expected_queries", [
+    ("/employees/?expand=none", 1),
+    ("/employees/?expand=business_trips", 2),
+    ("/business_trips/?expand=none", 1),
+])
+def test_shallow_endpoints_skip_relations(setup_database, url, expected_queries):
+    create_graph(setup_database, employees=3)
+    assert queries_for(url) == expected_queries
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from conftest import setup_database, client, engine
+from database import create_read_engine, get_read_db
+from main import app
+import models
+
+
+@pytest.fixture
+def replica(setup_database, tmp_path):
+    """Реплика — отдельный файл SQLite со снимком основной базы."""
+    employee_id = client.post("/employees/", json={"fio": "Иванов И.И."}).json()["id"]
+    expense_type_id = client.post("/expense_types/", json={"name": "Питание"}).json()["id"]
+    trip_id = client.post("/business_trips/", json={
+        "employee_id": employee_id, "destination": "Москва",
+        "start_trip": "2024-01-01T00:00:00", "end_trip": "2024-01-05T00:00:00"}).json()["id"]
+    client.post("/expenses/", json={
+        "business_trip_id": trip_id, "expense_type_id": expense_type_id, "amount": 100.0})
+    path = tmp_path / "replica.db"
+    with engine.connect() as connection:
+        connection.exec_driver_sql(f"VACUUM INTO '{path}'")
+    read_engine = create_read_engine(f"sqlite:///{path}")
+    ReadSession = sessionmaker(autoflush=False, bind=read_engine, info={"read_only": True})
+
+    def override_get_read_db():
+        db = ReadSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = app.dependency_overrides[get_read_db]
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    yield ReadSession, trip_id, expense_type_id
+    app.dependency_overrides[get_read_db] = previous
+    read_engine.dispose()
+
+
+# Тест на то, что чтение и аналитика идут в реплику, а запись — в основную базу.
+def test_reads_go_to_replica(replica):
+    _, trip_id, expense_type_id = replica
+    client.post("/expenses/", json={
+        "business_trip_id": trip_id, "expense_type_id": expense_type_id, "amount": 50.0})
+    assert client.get("/analytics/total_expenses").json() == 100.0
+    response = client.post("/employees/", json={"fio": "Петров П.П."})
+    assert response.status_code == 200
+    assert [employee["fio"] for employee in client.get("/employees/").json()] == ["Иванов И.И."]
+    assert client.get(f"/employees/{response.json()['id']}").status_code == 404
+    # PUT читает и пишет через основную базу
+    assert client.put(f"/employees/{response.json()['id']}", json={"fio": "Сидоров С.С."}).status_code == 200
+
+
+# Тест на запрет изменений через сессию чтения.
+def test_read_session_rejects_writes(replica):
+    db = replica[0]()
+    db.add(models.Employee(fio="Сидоров С.С."))
+    with pytest.raises(RuntimeError, match="Read-only"):
+        db.flush()
+    db.rollback()
+    # Соединения SQLite-реплики открыты в режиме query_only
+    with pytest.raises(OperationalError):
+        db.execute(text("DELETE FROM employees"))
+    db.close()
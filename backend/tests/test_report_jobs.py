@@ -0,0 +1,78 @@
+import json
+import time
+import pytest
+from conftest import setup_database, client, engine
+from services import report_jobs, versions
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_jobs.report_jobs, "directory", str(tmp_path))
+    yield report_jobs.report_jobs
+
+
+def wait_for(job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(f"/analytics/reports/{job_id}")
+        if response.status_code != 202 or time.monotonic() > deadline:
+            return response
+        time.sleep(0.01)
+
+
+# Тест на увеличение версий таблиц при изменениях через API.
+def test_data_versions_follow_writes(setup_database):
+    with engine.connect() as connection:
+        before = versions.get_versions(connection)
+    employee_id = client.post("/employees/", json={"fio": "Иванов И.И."}).json()["id"]
+    with engine.connect() as connection:
+        after = versions.get_versions(connection)
+    assert after["employees"] == before["employees"] + 1
+    assert after["expenses"] == before["expenses"]
+
+    client.delete(f"/employees/{employee_id}")
+    with engine.connect() as connection:
+        deleted = versions.get_versions(connection)
+    assert deleted["employees"] == after["employees"] + 1
+    assert deleted["business_trips"] == after["business_trips"] + 1
+
+    # Одна команда обновляет существующие строки версий и создает недостающие
+    tables = ["employees", "closed_periods"]
+    with engine.begin() as connection:
+        versions.bump(connection, tables + ["unknown"])
+        assert versions.get_versions(connection, tables) == {
+            "employees": deleted["employees"] + 1, "closed_periods": 1}
+
+
+# Тест на построение отчета в фоне и повторное использование файла на диске.
+def test_report_job_is_built_and_cached(setup_database, jobs, tmp_path):
+    client.post("/employees/", json={"fio": "Иванов И.И."})
+
+    response = client.post("/analytics/reports", json={"report_type": "json", "data_type": "all"})
+    assert response.status_code == 202
+    job = response.json()
+    response = wait_for(job["id"])
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('filename="report.json"')
+    assert json.loads(response.content)["total_expenses"] == 0.0
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # Данные не менялись: задание готово сразу
+    again = client.post("/analytics/reports", json={"report_type": "json", "data_type": "all"}).json()
+    assert again["status"] == "done"
+    assert again["data_version"] == job["data_version"]
+
+    # После изменения данных отчет строится заново, старый файл удаляется
+    client.post("/employees/", json={"fio": "Петров П.П."})
+    fresh = client.post("/analytics/reports", json={"report_type": "json", "data_type": "all"}).json()
+    assert fresh["data_version"] != job["data_version"]
+    assert wait_for(fresh["id"]).status_code == 200
+    assert [path.name for path in tmp_path.iterdir()] == [
+        f"json-all-{fresh['data_version']}.json"]
+
+
+# Тест на ошибки постановки задания и неизвестное задание.
+def test_report_job_errors(setup_database, jobs):
+    assert client.post("/analytics/reports", json={"report_type": "xml", "data_type": "all"}).status_code == 400
+    assert client.post("/analytics/reports", json={"report_type": "json", "data_type": "x"}).status_code == 400
+    assert client.get("/analytics/reports/unknown").status_code == 404
@@ -0,0 +1,96 @@
+import json
+from services.reports import TextReport, JSONReport, buffered
+from conftest import setup_database, client
+
+DATA = {
+    "total_expenses": 450.0,
+    "expenses_by_employee": [{"employee": "Иванов И.И.", "total_expenses": 450.0}],
+    "most_popular_destinations": [],
+    "average_expense_per_trip": "225.00",
+}
+
+
+# Тест на совпадение потокового текстового отчета с построчной сборкой.
+def test_text_report_stream_matches_plain_format():
+    expected = "".join(f"{key}: {value}\n" for key, value in DATA.items())
+    assert TextReport().generate(DATA) == expected
+
+
+# Тест на совпадение потокового JSON отчета с json.dumps.
+def test_json_report_stream_matches_dumps():
+    assert JSONReport().generate(DATA) == json.dumps(DATA, indent=4, ensure_ascii=False)
+
+
+# Тест на разбиение отчета на фрагменты.
+def test_buffered_chunks():
+    assert list(buffered(["ab", "c", "def", "g"], size=3)) == ["abc", "def", "g"]
+    items = [{"employee": f"Employee {i}", "total_expenses": i} for i in range(10_000)]
+    chunks = list(JSONReport().stream({"expenses_by_employee": items}))
+    assert len(chunks) > 1
+    assert json.loads("".join(chunks)) == {"expenses_by_employee": items}
+
+
+# Тест на выгрузку отчета через API и ошибку для неизвестного типа данных.
+def test_report_endpoint(setup_database):
+    response = client.get("/analytics/report/json/total_expenses")
+    assert response.status_code == 200
+    assert response.json() == {"total_expenses": 0.0}
+    assert client.get("/analytics/report/text/unknown").status_code == 400
+    assert client.get("/analytics/report/xml/all").status_code == 400
+
+
+# Тест на CSV отчет: одна таблица без заголовка раздела, несколько — с заголовками.
+def test_csv_report():
+    from services.reports import CSVReport
+    rows = [{"employee": "Иванов И.И.", "total_expenses": 450.0},
+            {"employee": "Петров П.П.", "total_expenses": 10.5}]
+    assert CSVReport().generate({"expenses_by_employee": rows}) == (
+        "employee,total_expenses\r\nИванов И.И.,450.0\r\nПетров П.П.,10.5\r\n")
+    report = CSVReport().generate(DATA)
+    assert report.startswith("total_expenses,450.0\r\naverage_expense_per_trip,225.00\r\n\r\n")
+    assert "\r\nexpenses_by_employee\r\nemployee,total_expenses\r\n" in report
+
+
+# Тест на XLSX отчет: лист на таблицу и лист со скалярными показателями.
+def test_xlsx_report():
+    import io
+    import pytest
+    openpyxl = pytest.importorskip("openpyxl")
+    from services.reports import XLSXReport
+    workbook = openpyxl.load_workbook(io.BytesIO(XLSXReport().generate(DATA)))
+    assert workbook.sheetnames == ["summary", "expenses_by_employee", "most_popular_destinations"]
+    assert list(workbook["expenses_by_employee"].values) == [
+        ("employee", "total_expenses"), ("Иванов И.И.", 450)]
+
+
+# Тест на Parquet отчет: собственные колонки для одной таблицы и длинный формат для нескольких.
+def test_parquet_report():
+    import io
+    import pytest
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    from services.reports import ParquetReport
+    table = pq.read_table(io.BytesIO(ParquetReport().generate(
+        {"expenses_by_employee": DATA["expenses_by_employee"]})))
+    assert table.to_pylist() == DATA["expenses_by_employee"]
+
+    table = pq.read_table(io.BytesIO(ParquetReport().generate(DATA)))
+    assert table.column_names == ["metric", "name", "value"]
+    assert table.to_pylist()[-1] == {
+        "metric": "expenses_by_employee", "name": "Иванов И.И.", "value": 450.0}
+
+    # Пустая таблица — объявленные колонки без строк
+    table = pq.read_table(io.BytesIO(ParquetReport().generate({"most_popular_destinations": []})))
+    assert table.column_names == ["metric", "name", "value"]
+    assert table.num_rows == 0
+
+
+# Тест на выбор новых форматов через маршрут отчетов.
+def test_report_endpoint_spreadsheet_formats(setup_database):
+    response = client.get("/analytics/report/csv/expenses_by_employee")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    for report_type in ("xlsx", "parquet"):
+        response = client.get(f"/analytics/report/{report_type}/all")
+        assert response.status_code == 200
+        assert response.headers["content-disposition"].endswith(f"report.{report_type}")
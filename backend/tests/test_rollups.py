@@ -0,0 +1,117 @@
+from datetime import datetime
+import models
+from conftest import setup_database, client, engine
+from services import rollups, service_analytics
+
+
+def assert_consistent(db):
+    with engine.connect() as connection:
+        assert rollups.check(connection) == []
+    db.expire_all()
+    assert rollups.get_analytics_snapshot(db) == service_analytics.get_analytics_snapshot(db)
+
+
+def create_trip(employee_id, destination):
+    response = client.post("/business_trips/", json={
+        "employee_id": employee_id,
+        "destination": destination,
+        "start_trip": "2023-01-01T00:00:00",
+        "end_trip": "2023-01-05T00:00:00",
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def create_expense(trip_id, expense_type_id, amount):
+    response = client.post("/expenses/", json={
+        "business_trip_id": trip_id, "expense_type_id": expense_type_id, "amount": amount})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+# Тест на поддержку агрегатов при создании, изменении и удалении через API.
+def test_rollups_follow_api_writes(setup_database):
+    ivanov = client.post("/employees/", json={"fio": "Иванов И.И."}).json()["id"]
+    petrov = client.post("/employees/", json={"fio": "Петров П.П."}).json()["id"]
+    food = client.post("/expense_types/", json={"name": "Питание"}).json()["id"]
+    hotel = client.post("/expense_types/", json={"name": "Проживание"}).json()["id"]
+
+    trip1 = create_trip(ivanov, "Москва")
+    trip2 = create_trip(petrov, "Казань")
+    expense1 = create_expense(trip1, food, 100.0)
+    create_expense(trip1, hotel, 300.0)
+    create_expense(trip2, food, 50.0)
+    assert_consistent(setup_database)
+    assert client.get("/analytics/total_expenses").json() == 450.0
+
+    # Перенос командировки к другому сотруднику и смена направления
+    client.put(f"/business_trips/{trip1}", json={"employee_id": petrov, "destination": "Казань"})
+    client.put(f"/expenses/{expense1}", json={"amount": 150.0, "expense_type_id": hotel})
+    assert_consistent(setup_database)
+    assert client.get("/analytics/expenses_by_employee").json() == [
+        {"employee": "Петров П.П.", "total_expenses": 500.0}]
+    assert client.get("/analytics/most_popular_destinations").json() == [
+        {"destination": "Казань", "trip_count": 2}]
+
+    client.delete(f"/expenses/{expense1}")
+    client.delete(f"/expense_types/{food}")
+    assert_consistent(setup_database)
+
+    client.delete(f"/employees/{petrov}")
+    assert_consistent(setup_database)
+    assert client.get("/analytics/all_analytics").json() == {
+        "total_expenses": 0.0,
+        "expenses_by_employee": [],
+        "expenses_by_expense_type": [],
+        "employees_with_most_trips": [],
+        "most_popular_destinations": [],
+        "average_expense_per_trip": "0.00",
+    }
+
+
+# Тест на пересчет агрегатов после записи в обход ORM.
+def test_rollups_rebuild_and_check(setup_database):
+    trip = models.BusinessTrip(employee_id=1, destination="Москва",
+                               start_trip=datetime(2023, 1, 1), end_trip=datetime(2023, 1, 5))
+    setup_database.add_all([models.Employee(id=1, fio="Иванов И.И."), trip])
+    setup_database.commit()
+
+    with engine.begin() as connection:
+        connection.execute(models.Expense.__table__.insert(), [
+            {"business_trip_id": trip.id, "expense_type_id": 1, "amount_cents": 1000},
+            {"business_trip_id": trip.id, "expense_type_id": 1, "amount_cents": 2000},
+        ])
+        assert len(rollups.check(connection)) == 3
+        rollups.rebuild(connection)
+        assert rollups.check(connection) == []
+
+    assert client.get("/analytics/average_expense_per_trip").json() == "30.00"
+
+
+# Тест на аналитику за период: она считается по исходным строкам, а не по агрегатам.
+def test_period_analytics_api(setup_database):
+    employee = client.post("/employees/", json={"fio": "Иванов И.И."}).json()["id"]
+    food = client.post("/expense_types/", json={"name": "Питание"}).json()["id"]
+    for start, amount in (("2024-01-10", 100.0), ("2024-02-10", 40.0), ("2024-02-20", 60.0)):
+        trip = client.post("/business_trips/", json={
+            "employee_id": employee, "destination": "Москва",
+            "start_trip": f"{start}T00:00:00", "end_trip": f"{start}T12:00:00"}).json()["id"]
+        create_expense(trip, food, amount)
+
+    february = {"from": "2024-02-01", "to": "2024-02-29"}
+    assert client.get("/analytics/total_expenses").json() == 200.0
+    assert client.get("/analytics/total_expenses", params=february).json() == 100.0
+    assert client.get("/analytics/expenses_by_expense_type", params=february).json() == [
+        {"expense_type": "Питание", "total_expenses": 100.0}]
+    assert client.get("/analytics/average_expense_per_trip", params=february).json() == "50.00"
+    assert client.get("/analytics/most_popular_destinations", params={"to": "2024-01-31"}).json() == [
+        {"destination": "Москва", "trip_count": 1}]
+    assert client.get("/analytics/all_analytics", params=february).json()["total_expenses"] == 100.0
+    assert client.get("/analytics/expenses_by_period").json() == [
+        {"period": "2024-01-01", "total_expenses": 100.0, "expense_count": 1, "trip_count": 1},
+        {"period": "2024-02-01", "total_expenses": 100.0, "expense_count": 2, "trip_count": 2},
+    ]
+
+    assert client.get("/analytics/expenses_by_period", params={"period": "year"}).status_code == 422
+    assert client.get("/analytics/total_expenses",
+                      params={"from": "2024-03-01", "to": "2024-02-01"}).status_code == 400
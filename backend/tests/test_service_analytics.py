@@ -65,11 +65,12 @@ def test_get_expenses_by_employee(db_session, mocker: MockerFixture):
 
     # Мокаем query у Session
     mock_query = mocker.patch.object(db_session, "query")
-    mock_query.return_value.join.return_value.join.return_value.group_by.return_value.all.return_value = mock_result
+    grouped = mock_query.return_value.join.return_value.join.return_value.group_by.return_value
+    grouped.order_by.return_value.all.return_value = mock_result
 
     result = get_expenses_by_employee(db_session)
     assert result == mock_result
-    mock_query.return_value.join.return_value.join.return_value.group_by.return_value.all.assert_called_once()
+    grouped.order_by.return_value.all.assert_called_once()
 
 
 def test_get_expenses_by_expense_type(db_session, mocker: MockerFixture):
@@ -80,11 +81,12 @@ def test_get_expenses_by_expense_type(db_session, mocker: MockerFixture):
 
     # Мокаем query у Session
     mock_query = mocker.patch.object(db_session, "query")
-    mock_query.return_value.join.return_value.group_by.return_value.all.return_value = mock_result
+    grouped = mock_query.return_value.join.return_value.group_by.return_value
+    grouped.order_by.return_value.all.return_value = mock_result
 
     result = get_expenses_by_expense_type(db_session)
     assert result == mock_result
-    mock_query.return_value.join.return_value.group_by.return_value.all.assert_called_once()
+    grouped.order_by.return_value.all.assert_called_once()
 
 
 def test_get_employees_with_most_trips(db_session, mocker: MockerFixture):
@@ -137,3 +139,190 @@ def test_get_average_expense_per_trip_empty(db_session, mocker: MockerFixture):
     assert result == 0.0
     # Проверяем, что scalar был вызван именно у запроса среднего значения
     mock_query.return_value.scalar.assert_called_once()
+
+
+def add_sample_data(db):
+    """Добавляет двух сотрудников с командировками и расходами."""
+    from datetime import datetime
+    from models import Employee, BusinessTrip, Expense, ExpenseType
+
+    ivanov, petrov = Employee(fio="Иванов И.И."), Employee(fio="Петров П.П.")
+    food, hotel = ExpenseType(name="Питание"), ExpenseType(name="Проживание")
+    trip1 = BusinessTrip(employee=ivanov, destination="Москва",
+                         start_trip=datetime(2023, 1, 1), end_trip=datetime(2023, 1, 5))
+    trip2 = BusinessTrip(employee=ivanov, destination="Казань",
+                         start_trip=datetime(2023, 2, 1), end_trip=datetime(2023, 2, 5))
+    # Командировка без расходов учитывается только в подсчете поездок
+    trip3 = BusinessTrip(employee=petrov, destination="Москва",
+                         start_trip=datetime(2023, 3, 1), end_trip=datetime(2023, 3, 5))
+    db.add_all([
+        trip3,
+        Expense(business_trip=trip1, expense_type=food, amount=100.0),
+        Expense(business_trip=trip1, expense_type=hotel, amount=300.0),
+        Expense(business_trip=trip1, expense_type=food, amount=20.0),
+        Expense(business_trip=trip2, expense_type=food, amount=50.0),
+    ])
+    db.flush()
+
+
+def test_sql_and_numpy_engines_agree(db_session, monkeypatch):
+    from services import service_analytics
+
+    add_sample_data(db_session)
+
+    results = {}
+    for engine_name in ("sql", "numpy"):
+        monkeypatch.setattr(service_analytics, "ANALYTICS_ENGINE", engine_name)
+        results[engine_name] = (
+            get_total_expenses(db_session),
+            sorted(tuple(row) for row in get_expenses_by_employee(db_session)),
+            sorted(tuple(row) for row in get_expenses_by_expense_type(db_session)),
+            get_average_expense_per_trip(db_session),
+        )
+
+    assert results["sql"] == results["numpy"]
+    assert results["sql"] == (
+        470.0,
+        [("Иванов И.И.", 470.0)],
+        [("Питание", 170.0), ("Проживание", 300.0)],
+        235.0,
+    )
+
+
+def test_get_analytics_snapshot_matches_separate_queries(db_session):
+    from sqlalchemy import event
+    from services.service_analytics import get_analytics_snapshot
+
+    add_sample_data(db_session)
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        snapshot = get_analytics_snapshot(db_session)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert snapshot["total_expenses"] == get_total_expenses(db_session)
+    assert snapshot["expenses_by_employee"] == sorted(
+        tuple(row) for row in get_expenses_by_employee(db_session))
+    assert snapshot["expenses_by_expense_type"] == sorted(
+        tuple(row) for row in get_expenses_by_expense_type(db_session))
+    assert snapshot["employees_with_most_trips"] == [
+        ("Иванов И.И.", 2), ("Петров П.П.", 1)]
+    assert snapshot["most_popular_destinations"] == [("Москва", 2), ("Казань", 1)]
+    assert snapshot["average_expense_per_trip"] == get_average_expense_per_trip(
+        db_session)
+
+
+def test_amounts_are_summed_in_cents(db_session, monkeypatch):
+    from datetime import datetime
+    from models import BusinessTrip, Employee, Expense, ExpenseType
+    from services import service_analytics
+
+    employee = Employee(fio="Сидоров С.С.")
+    trip = BusinessTrip(employee=employee, destination="Омск",
+                        start_trip=datetime(2024, 3, 1), end_trip=datetime(2024, 3, 2))
+    food = ExpenseType(name="Питание")
+    db_session.add_all([Expense(business_trip=trip, expense_type=food, amount=amount)
+                        for amount in (0.1, 0.2, 10.005)])
+    db_session.flush()
+
+    assert [expense.amount_cents for expense in trip.expenses] == [10, 20, 1001]
+    for engine_name in ("sql", "numpy"):
+        monkeypatch.setattr(service_analytics, "ANALYTICS_ENGINE", engine_name)
+        assert get_total_expenses(db_session) == 10.31
+
+
+def add_period_data(db):
+    """Добавляет командировки в январе, феврале и апреле 2024 года."""
+    from datetime import datetime
+    from models import BusinessTrip, Employee, Expense, ExpenseType
+
+    ivanov, petrov = Employee(fio="Иванов И.И."), Employee(fio="Петров П.П.")
+    food = ExpenseType(name="Питание")
+    january = BusinessTrip(employee=ivanov, destination="Москва",
+                           start_trip=datetime(2024, 1, 31, 18, 0), end_trip=datetime(2024, 2, 2))
+    february = BusinessTrip(employee=petrov, destination="Казань",
+                            start_trip=datetime(2024, 2, 1), end_trip=datetime(2024, 2, 3))
+    april = BusinessTrip(employee=ivanov, destination="Москва",
+                         start_trip=datetime(2024, 4, 10), end_trip=datetime(2024, 4, 12))
+    db.add_all([
+        Expense(business_trip=january, expense_type=food, amount=100.0),
+        Expense(business_trip=january, expense_type=food, amount=50.5),
+        Expense(business_trip=february, expense_type=food, amount=30.0),
+        april,
+    ])
+    db.flush()
+
+
+def test_period_filters_include_both_dates(db_session, monkeypatch):
+    from datetime import date
+    from services import service_analytics
+    from services.service_analytics import get_analytics_snapshot
+
+    add_period_data(db_session)
+    january = {"date_from": date(2024, 1, 1), "date_to": date(2024, 1, 31)}
+
+    for engine_name in ("sql", "numpy"):
+        monkeypatch.setattr(service_analytics, "ANALYTICS_ENGINE", engine_name)
+        assert get_total_expenses(db_session, **january) == 150.5
+        assert [tuple(row) for row in get_expenses_by_employee(db_session, **january)] == [("Иванов И.И.", 150.5)]
+        assert [tuple(row) for row in get_expenses_by_expense_type(db_session, **january)] == [("Питание", 150.5)]
+        assert get_average_expense_per_trip(db_session, date_from=date(2024, 1, 1)) == 90.25
+
+    assert sorted(tuple(row) for row in get_employees_with_most_trips(db_session, date_from=date(2024, 2, 1))) == [
+        ("Иванов И.И.", 1), ("Петров П.П.", 1)]
+    assert sorted(tuple(row) for row in get_most_popular_destinations(db_session, date_to=date(2024, 3, 31))) == [
+        ("Казань", 1), ("Москва", 1)]
+
+    snapshot = get_analytics_snapshot(db_session, date_from=date(2024, 2, 1), date_to=date(2024, 4, 30))
+    assert snapshot["total_expenses"] == 30.0
+    assert sorted(snapshot["most_popular_destinations"]) == [("Казань", 1), ("Москва", 1)]
+    assert snapshot["average_expense_per_trip"] == 30.0
+
+
+def test_grouped_expenses_are_sorted_by_name(db_session, monkeypatch):
+    from datetime import date, datetime
+    from models import BusinessTrip, Employee, Expense, ExpenseType
+    from services import service_analytics
+
+    hotel, food = ExpenseType(name="Проживание"), ExpenseType(name="Питание")
+    for fio, expense_type in (("Петров П.П.", hotel), ("Иванов И.И.", food)):
+        trip = BusinessTrip(employee=Employee(fio=fio), destination="Москва",
+                            start_trip=datetime(2024, 1, 10), end_trip=datetime(2024, 1, 12))
+        db_session.add(Expense(business_trip=trip, expense_type=expense_type, amount=10.0))
+    db_session.flush()
+
+    for engine_name in ("sql", "numpy"):
+        monkeypatch.setattr(service_analytics, "ANALYTICS_ENGINE", engine_name)
+        for period in ({}, {"date_from": date(2024, 1, 1), "date_to": date(2024, 1, 31)}):
+            assert [row[0] for row in get_expenses_by_employee(db_session, **period)] == [
+                "Иванов И.И.", "Петров П.П."]
+            assert [row[0] for row in get_expenses_by_expense_type(db_session, **period)] == [
+                "Питание", "Проживание"]
+
+
+def test_get_expenses_by_period(db_session):
+    from datetime import date
+    from services.service_analytics import get_expenses_by_period
+
+    add_period_data(db_session)
+
+    assert get_expenses_by_period(db_session, "month") == [
+        ("2024-01-01", 150.5, 2, 1),
+        ("2024-02-01", 30.0, 1, 1),
+        ("2024-04-01", 0.0, 0, 1),
+    ]
+    assert get_expenses_by_period(db_session, "quarter") == [
+        ("2024-01-01", 180.5, 3, 2),
+        ("2024-04-01", 0.0, 0, 1),
+    ]
+    # 31 января 2024 года — среда, неделя начинается с понедельника 29 января
+    assert get_expenses_by_period(db_session, "week", date_to=date(2024, 2, 29)) == [
+        ("2024-01-29", 180.5, 3, 2)]
+    assert get_expenses_by_period(db_session, "day", date_from=date(2024, 2, 1)) == [
+        ("2024-02-01", 30.0, 1, 1), ("2024-04-10", 0.0, 0, 1)]
+    with pytest.raises(ValueError):
+        get_expenses_by_period(db_session, "year")
@@ -0,0 +1,61 @@
+import pytest
+from datetime import datetime
+import models
+from conftest import setup_database, client
+from routers import admin
+from services.slow_queries import slow_query_log
+
+TOKEN = "secret"
+
+
+@pytest.fixture
+def slow_log(tmp_path, monkeypatch):
+    """Журнал во временном каталоге с нулевым порогом: медленным считается любой запрос."""
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", TOKEN)
+    saved = {name: getattr(slow_query_log, name) for name in ("path", "threshold_ms", "backups")}
+    slow_query_log.configure(path=str(tmp_path / "slow.log"), threshold_ms=0)
+    yield slow_query_log
+    slow_query_log.configure(**saved)
+
+
+# Тест на запись медленного запроса с маршрутом, параметрами и планом.
+def test_slow_query_is_logged_with_plan(setup_database, slow_log):
+    db = setup_database
+    db.add(models.BusinessTrip(employee=models.Employee(fio="Иванов И.И."), destination="Москва",
+                               start_trip=datetime(2024, 1, 10), end_trip=datetime(2024, 1, 12)))
+    db.commit()
+
+    assert client.get("/analytics/total_expenses", params={"from": "2024-01-01", "to": "2024-01-31"}).status_code == 200
+
+    response = client.get("/admin/slow_queries", headers={"X-Admin-Token": TOKEN},
+                          params={"route": "GET /analytics/total_expenses", "statement": "start_trip"})
+    assert response.status_code == 200
+    entries = response.json()
+    assert entries
+    entry = entries[0]
+    assert entry["statement"].lstrip().startswith("SELECT")
+    assert "2024-01-01 00:00:00" in str(entry["parameters"])
+    assert entry["duration_ms"] >= 0
+    # Выборка за период читает диапазон индекса по дате начала
+    assert "ix_business_trips_start_trip" in entry["plan"]
+
+    # Запросы вне API (тест напрямую через сессию) пишутся без маршрута
+    db.query(models.Employee).all()
+    assert slow_log.entries(limit=1)[0]["route"] is None
+
+
+# Тест на записи без планов для изменений данных и на фильтр по длительности.
+def test_slow_query_filters(setup_database, slow_log):
+    assert client.post("/employees/", json={"fio": "Петров П.П."}).status_code == 200
+    entries = slow_log.entries(route="POST /employees/", statement="INSERT")
+    assert entries and entries[0]["plan"] is None
+    assert slow_log.entries(min_ms=10 ** 6) == []
+
+
+# Тест на доступ к административным маршрутам только с токеном.
+def test_admin_requires_token(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", None)
+    assert client.get("/admin/slow_queries").status_code == 403
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", TOKEN)
+    assert client.get("/admin/slow_queries").status_code == 401
+    assert client.get("/admin/slow_queries", headers={"X-Admin-Token": "wrong"}).status_code == 401
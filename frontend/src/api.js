@@ -0,0 +1,18 @@
+import axios from "axios";
+
+// Максимальный размер страницы списков на сервере (routers/pagination.py)
+const PAGE_SIZE = 1000;
+
+// Загружает все страницы списка, переходя по курсору из заголовка X-Next-Cursor
+export const fetchAllPages = async (url) => {
+  const items = [];
+  let afterId = null;
+  do {
+    const params = { limit: PAGE_SIZE };
+    if (afterId !== null) params.after_id = afterId;
+    const response = await axios.get(url, { params });
+    items.push(...response.data);
+    afterId = response.headers["x-next-cursor"] ?? null;
+  } while (afterId !== null);
+  return items;
+};
@@ -1,4 +1,5 @@
 import axios from "axios";
+import { fetchAllPages } from "../api";
 import { useState, useEffect } from "react";
 import {
   Box,
@@ -62,11 +63,11 @@ const BusinessTripsPage = () => {
     }
 
     try {
-      const response = await axios.get("http://localhost:8000/business_trips/");
-      setBusinessTrips(response.data);
+      const data = await fetchAllPages("http://localhost:8000/business_trips/");
+      setBusinessTrips(data);
       sessionStorage.setItem(
         "businessTripsData",
-        JSON.stringify(response.data)
+        JSON.stringify(data)
       );
       console.log("Данные поездок загружены с сервера и закэшированы");
     } catch (error) {
@@ -76,8 +77,8 @@ const BusinessTripsPage = () => {
 
   const fetchEmployees = async () => {
     try {
-      const response = await axios.get("http://localhost:8000/employees/");
-      setEmployees(response.data);
+      const data = await fetchAllPages("http://localhost:8000/employees/");
+      setEmployees(data);
     } catch (error) {
       console.error("Error fetching employees:", error);
     }
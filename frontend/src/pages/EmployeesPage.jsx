@@ -1,4 +1,5 @@
 import axios from "axios";
+import { fetchAllPages } from "../api";
 import { useState, useEffect } from "react";
 import {
   Box,
@@ -43,9 +44,9 @@ const EmployeesPage = () => {
     }
 
     try {
-      const response = await axios.get("http://localhost:8000/employees/");
-      setEmployees(response.data);
-      sessionStorage.setItem("employeesData", JSON.stringify(response.data));
+      const data = await fetchAllPages("http://localhost:8000/employees/");
+      setEmployees(data);
+      sessionStorage.setItem("employeesData", JSON.stringify(data));
       console.log("Данные сотрудников загружены с сервера и закэшированы");
     } catch (error) {
       console.error("Error fetching employees:", error);
@@ -1,4 +1,5 @@
 import axios from "axios";
+import { fetchAllPages } from "../api";
 import { useState, useEffect } from "react";
 import {
   Box,
@@ -43,9 +44,9 @@ const ExpenseTypesPage = () => {
     }
 
     try {
-      const response = await axios.get("http://localhost:8000/expense_types/");
-      setExpenseTypes(response.data);
-      sessionStorage.setItem("expenseTypesData", JSON.stringify(response.data));
+      const data = await fetchAllPages("http://localhost:8000/expense_types/");
+      setExpenseTypes(data);
+      sessionStorage.setItem("expenseTypesData", JSON.stringify(data));
       console.log("Данные типов расходов загружены с сервера и закэшированы");
     } catch (error) {
       console.error("Error fetching expense types:", error);
@@ -1,4 +1,5 @@
 import axios from "axios";
+import { fetchAllPages } from "../api";
 import { useState, useEffect } from "react";
 import {
   Box,
@@ -49,8 +50,8 @@ const ExpensesPage = () => {
 
   const fetchExpenses = async () => {
     try {
-      const response = await axios.get("http://localhost:8000/expenses/");
-      setExpenses(response.data);
+      const data = await fetchAllPages("http://localhost:8000/expenses/");
+      setExpenses(data);
     } catch (error) {
       console.error("Error fetching expenses:", error);
     }
@@ -58,8 +59,8 @@ const ExpensesPage = () => {
 
   const fetchBusinessTrips = async () => {
     try {
-      const response = await axios.get("http://localhost:8000/business_trips/");
-      setBusinessTrips(response.data);
+      const data = await fetchAllPages("http://localhost:8000/business_trips/");
+      setBusinessTrips(data);
     } catch (error) {
       console.error("Error fetching business trips:", error);
     }
@@ -67,8 +68,8 @@ const ExpensesPage = () => {
 
   const fetchExpenseTypes = async () => {
     try {
-      const response = await axios.get("http://localhost:8000/expense_types/");
-      setExpenseTypes(response.data);
+      const data = await fetchAllPages("http://localhost:8000/expense_types/");
+      setExpenseTypes(data);
     } catch (error) {
       console.error("Error fetching expense types:", error);
     }